@@ -0,0 +1,69 @@
+from time import perf_counter, sleep
+import argparse
+import os
+import random
+
+# Without a display SDL renders offscreen, so this also runs on servers
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from briscola import App
+from game.bots import greedy_bot
+
+# Frame times while the bot thinks: the GUI runs at 60 fps against the bot (game/ai.py) with the greedy bot playing
+# the human's cards, and the frame time percentiles of the frames spent waiting for the bot are compared with the
+# rest. A search that ran in the frame loop would show up as frames of the whole thinking time
+# Run from the project folder with: python -m benchmarks.ai [--games 2] [--ms 300]
+
+
+FPS = 60
+
+
+def play(app: App, games, rng: random.Random):
+    """Runs the frame loop paced like pyxel.run until `games` games are over, plays the human seat instantly."""
+    human = 1 - app.ai_player
+    frame = 1 / FPS
+    next_frame = perf_counter()
+    cards = []  # (iterations, seconds) of every bot card
+    for game in range(games):
+        app.new_game(game)
+        while app.game_status != "win":
+            if app.game_status == "play" and app.engine.to_move == human and app.piles[f'foundation{human}'].is_empty:
+                card = greedy_bot(app.engine, rng)
+                app.perform_move(app.cards[card].pile, app.piles[f'foundation{human}'], 1)
+                app.piles[f'foundation{human}'].top_card.set_face_up()
+            if app.pause: app.end_round = True
+
+            answered = app.ai.last_elapsed
+            app.timed_update()
+            app.timed_render()
+            if app.ai.last_elapsed != answered: cards.append((app.ai.last_iterations, app.ai.last_elapsed))
+
+            next_frame += frame
+            delay = next_frame - perf_counter()
+            if delay > 0: sleep(delay)
+            else: next_frame = perf_counter()
+    return cards
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.ai")
+    parser.add_argument("--games", type=int, default=2)
+    parser.add_argument("--ms", type=int, default=300, help="bot thinking time per card")
+    args = parser.parse_args()
+
+    app = App(run=False, ai_player=1, ai_budget_ms=args.ms)
+    cards = play(app, args.games, random.Random(0))
+    app.ai.close()
+
+    timer = app.frame_timer
+    for phase, label in (('frame', "every frame"), ('frame thinking', "bot thinking")):
+        p50, p95, p99 = timer.percentiles(phase)
+        print(f"{label:13s} {len(timer.samples.get(phase, ())):5d} frames   p50 {p50 * 1e3:6.2f} ms  p95 {p95 * 1e3:6.2f} ms  p99 {p99 * 1e3:6.2f} ms")
+    iterations = sum(i for i, _ in cards)
+    seconds = sum(s for _, s in cards)
+    print(f"bot: {len(cards)} cards, {iterations / max(len(cards), 1):,.0f} iterations a card, {iterations / max(seconds, 1e-9):,.0f} iterations/s")
+
+
+if __name__ == '__main__':
+    main()
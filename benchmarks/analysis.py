@@ -0,0 +1,49 @@
+from time import perf_counter, sleep
+import argparse
+import random
+
+from game.analysis import Analyzer
+from game.bots import BOTS
+from game.engine import GameState
+
+# Post-game analysis of one game (game/analysis.py): time until every move is scored on the process pool, the pool's
+# start included, then again with every position cached, as when the analysis is opened a second time
+# Run from the project folder with: python -m benchmarks.analysis [--seed 1] [--workers N] [--bots greedy random]
+
+
+def play_game(seed, bots) -> GameState:
+    state = GameState()
+    state.deal(seed)
+    rng = random.Random(seed)
+    while not state.is_terminal(): state.play(BOTS[bots[state.to_move]](state, rng))
+    return state
+
+
+def analyze(analyzer: Analyzer, state: GameState) -> float:
+    start = perf_counter()
+    analyzer.start(state.deck, state.history)
+    while not analyzer.finished:
+        sleep(0.001)
+        analyzer.poll()
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.analysis")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None, help="pool size (default: one per core)")
+    parser.add_argument("--bots", nargs=2, default=("greedy", "random"), choices=sorted(BOTS))
+    args = parser.parse_args()
+
+    state = play_game(args.seed, args.bots)
+    analyzer = Analyzer(args.workers)
+    first = analyze(analyzer, state)
+    print("\n".join(analyzer.lines))
+    cached = analyze(analyzer, state)
+    analyzer.close()
+    print(f"{len(analyzer.moves)} moves, {len(analyzer.cache)} positions searched on {analyzer.workers} workers: "
+          f"{first:.2f}s with the pool starting, {cached * 1e3:.2f} ms cached")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+from time import perf_counter
+import random
+import sys
+
+import numpy as np
+
+from game.batch import BatchSim, random_policy, greedy_policy
+from game.engine import GameState
+from benchmarks.engine import play_random_game
+
+# Games per second of the NumPy batch simulator against the scalar engine, tests/test_batch.py checks they play the same games
+# Run from the project folder with: python -m benchmarks.batch [games per batch]
+
+
+def main():
+    batch = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    batches = 8
+
+    scalar_games = 5000
+    state = GameState()
+    rng = random.Random(0)
+    start = perf_counter()
+    for seed in range(scalar_games): play_random_game(state, seed, rng)
+    scalar_rate = scalar_games / (perf_counter() - start)
+
+    print(f"scalar: {scalar_rate:,.0f} games/s")
+    np_rng = np.random.default_rng(0)
+    policy = random_policy(np_rng)
+    for label, policies in (("random", (policy, policy)), ("random vs greedy", (policy, greedy_policy))):  # One call per move, then one per seat
+        sim = BatchSim(batch, seed=0)
+        sim.run(policies)  # Warm up
+        start = perf_counter()
+        for _ in range(batches):
+            sim.deal()
+            sim.run(policies)
+        batch_rate = batch * batches / (perf_counter() - start)
+        print(f"batch, {label}: {batch_rate:,.0f} games/s in batches of {batch} games ({batch_rate / scalar_rate:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+from time import perf_counter
+import random
+import sys
+
+from game.bitboard import BitState
+from game.engine import GameState
+
+# Random games, copies and hashes on the mask based BitState
+# Run from the project folder with: python -m benchmarks.bitboard [games]
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(0)
+    starts = []
+    for seed in range(games):
+        game = GameState()
+        game.deal(seed)
+        starts.append(BitState.from_game(game))
+
+    start = perf_counter()
+    for state in starts:
+        state = state.copy()
+        while not state.is_terminal():
+            state.play(rng.choice(state.legal_moves()))
+    elapsed = perf_counter() - start
+    print(f"play:  {games / elapsed:,.0f} games/s, {games * 20 / elapsed:,.0f} tricks/s")
+
+    start = perf_counter()
+    for state in starts: state.copy()
+    elapsed = perf_counter() - start
+    print(f"copy:  {elapsed / games * 1e9:.0f} ns")
+
+    start = perf_counter()
+    for state in starts: hash(state)
+    elapsed = perf_counter() - start
+    print(f"hash:  {elapsed / games * 1e9:.0f} ns")
+
+
+if __name__ == '__main__':
+    main()
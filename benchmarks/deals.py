@@ -0,0 +1,43 @@
+from time import perf_counter
+import sys
+
+from game.deals import DealStream
+from game.engine import GameState
+
+# Cost of one deal: a seeded Python shuffle per game against decks generated a block at a time with NumPy
+# Run from the project folder with: python -m benchmarks.deals [deals]
+
+
+def timed(label, deals, function):
+    start = perf_counter()
+    function()
+    elapsed = perf_counter() - start
+    print(f"{label:34s} {elapsed / deals * 1e6:6.2f} us/deal {deals / elapsed:12,.0f} deals/s")
+
+
+def main():
+    deals = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    state = GameState()
+
+    def seeded():
+        for seed in range(deals): state.deal(seed)
+
+    def stream_decks():
+        stream = DealStream(1)
+        for _ in range(deals): next(stream)
+
+    def stream_deals():
+        stream = DealStream(1)
+        for _ in range(deals): stream.deal(state)
+
+    def stream_take():
+        DealStream(1).take(deals)
+
+    timed("GameState.deal(seed)", deals, seeded)
+    timed("DealStream, deck views", deals, stream_decks)
+    timed("DealStream.deal(GameState)", deals, stream_deals)
+    timed("DealStream.take (for BatchSim)", deals, stream_take)
+
+
+if __name__ == '__main__':
+    main()
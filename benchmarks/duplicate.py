@@ -0,0 +1,42 @@
+from time import process_time
+import argparse
+
+from game.bots import BOTS
+from game.tournament import Sprt, run_tournament
+
+# Duplicate deals against independent ones: the same SPRT match is run with several master seeds both ways and the
+# games and CPU seconds it takes to reach a decision are compared, as well as how often it decides for H1
+# Run from the project folder with: python -m benchmarks.duplicate [--bots endgame greedy] [--sprt 60 80] [--points] [--matches 10]
+
+
+def match(bots, bounds, points, seed, duplicate, limit) -> tuple:  # (games, cpu seconds, decision) of one SPRT match, inline
+    start = process_time()
+    tally = run_tournament(*bots, limit, master_seed=seed, duplicate=duplicate, sprt=Sprt(*bounds, points=points))
+    return tally.games, process_time() - start, tally.sprt.result
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.duplicate")
+    parser.add_argument("--bots", nargs=2, default=("endgame", "greedy"), choices=sorted(BOTS))
+    parser.add_argument("--sprt", nargs=2, type=float, default=None, metavar=("ELO0", "ELO1"), help="default: 60 80, or 6 8 with --points")
+    parser.add_argument("--points", action="store_true", help="test A's point margin per game instead of its Elo")
+    parser.add_argument("--matches", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=200000, help="games after which a match is left undecided")
+    args = parser.parse_args()
+    bounds = args.sprt or ((6.0, 8.0) if args.points else (60.0, 80.0))
+
+    print(f"{args.bots[0]} vs {args.bots[1]}, SPRT [{bounds[0]:g}, {bounds[1]:g}] {'points' if args.points else 'Elo'}, {args.matches} matches each")
+    results = {}
+    for duplicate in (False, True):
+        runs = [match(args.bots, bounds, args.points, seed, duplicate, args.limit) for seed in range(args.matches)]
+        games = sum(run[0] for run in runs) / len(runs)
+        cpu = sum(run[1] for run in runs) / len(runs)
+        decisions = [run[2] for run in runs]
+        results[duplicate] = games, cpu
+        print(f"{'duplicate' if duplicate else 'independent':11s} deals: {games:9,.0f} games {cpu:7.2f} CPU s a match, "
+              f"H1 {decisions.count('H1')}, H0 {decisions.count('H0')}, undecided {decisions.count(None)}")
+    print(f"duplicate deals: {results[False][0] / results[True][0]:.2f}x fewer games, {results[False][1] / results[True][1]:.2f}x less CPU")
+
+
+if __name__ == '__main__':
+    main()
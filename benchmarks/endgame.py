@@ -0,0 +1,44 @@
+from time import perf_counter
+import sys
+
+from game.endgame import EndgameSolver
+from tests.reference import minimax, positions
+
+# Exact endgame solver: checks it against plain minimax, then reports nodes/s and time per solve
+# Run from the project folder with: python -m benchmarks.endgame [positions]
+
+
+def time_solves(label, states, solver):
+    start = perf_counter()
+    nodes = solver.nodes
+    for state in states: solver.solve(state)
+    elapsed = perf_counter() - start
+    print(f"{label}: {len(states)} solves, {elapsed / len(states) * 1e3:.3f} ms/solve, "
+          f"{(solver.nodes - nodes) / elapsed:,.0f} nodes/s, {len(solver.table)} table entries")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    check = positions(200, 17, seed=1) + positions(20, 15, seed=2)
+    for state in check:
+        value, card = EndgameSolver().solve(state)
+        expected = minimax(state)
+        if value != expected: raise AssertionError(f"solver says {value}, minimax says {expected}")
+        child = state.copy()
+        before = child.score0
+        child.play(card)
+        if child.score0 - before + minimax(child) != expected: raise AssertionError(f"best card {card} does not reach {expected}")
+    print(f"check: {len(check)} positions match plain minimax")
+
+    last_three = positions(count, 17)
+    time_solves("last 3 tricks, cold table", last_three, EndgameSolver())
+    solver = EndgameSolver()
+    for state in last_three: solver.solve(state)
+    time_solves("last 3 tricks, warm table", last_three, solver)
+    time_solves("last 6 tricks, known stock", positions(count // 20, 14), EndgameSolver())
+    time_solves("last 3 tricks, 5000 entry table", last_three, EndgameSolver(max_entries=5000))
+
+
+if __name__ == '__main__':
+    main()
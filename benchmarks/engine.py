@@ -0,0 +1,32 @@
+from time import perf_counter
+import random
+import sys
+
+from game.engine import GameState
+
+# Games per second of the headless engine with random players
+# Run from the project folder with: python -m benchmarks.engine [games]
+
+
+def play_random_game(state: GameState, seed, rng: random.Random):  # Deals and plays one game to the end
+    state.deal(seed)
+    while not state.is_terminal():
+        state.play(rng.choice(state.legal_moves()))
+    return state.overall_winner()
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    state = GameState()
+    rng = random.Random(0)
+
+    start = perf_counter()
+    for seed in range(games): play_random_game(state, seed, rng)
+    elapsed = perf_counter() - start
+
+    print(f"{games} games in {elapsed:.3f}s")
+    print(f"{games / elapsed:,.0f} games/s, {games * 20 / elapsed:,.0f} tricks/s")
+
+
+if __name__ == '__main__':
+    main()
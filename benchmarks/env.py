@@ -0,0 +1,32 @@
+from time import perf_counter
+import sys
+
+import numpy as np
+
+from game.batch import first_card_policy, greedy_policy, random_policy
+from game.env import VectorEnv
+
+# Vectorized RL environment: agent steps per second (one trick in every game per step) with actions taken straight
+# from the observation's action mask, so the time measured is the environment's
+# Run from the project folder with: python -m benchmarks.env [games]
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    episodes = 20
+    for name, opponent in (("first card", first_card_policy), ("greedy", greedy_policy), ("random", random_policy(np.random.default_rng(1)))):
+        env = VectorEnv(games, opponent=opponent, seed=1)
+        obs = env.reset()
+        slots = np.empty(games, dtype=np.int8)
+        start = perf_counter()
+        for _ in range(episodes * 20):
+            np.argmax(obs["action_mask"], axis=1, out=slots)  # First card in the hand
+            obs, rewards, dones, info = env.step(slots)
+        elapsed = perf_counter() - start
+        steps = episodes * 20
+        print(f"opponent {name:10s} {steps / elapsed:8,.0f} steps/s of {games} games, "
+              f"{steps * games / elapsed:12,.0f} game steps/s, {elapsed / steps * 1e6:8.1f} us/step")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+
+# Without a display SDL renders offscreen, so this also runs on servers
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from briscola import App
+
+# GUI frame cost: mean update and render times while cards are dealt and animate, while the table is idle
+# and with the rules panel open
+# Run from the project folder with: python -m benchmarks.frame [frames]
+
+
+def run_frames(app: App, frames):  # Same calls pyxel.run makes every frame
+    for _ in range(frames):
+        app.timed_update()
+        app.timed_render()
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    app = App(run=False)
+
+    app.new_game(0)
+    run_frames(app, 30)  # Deal and the first half second of cards sliding into place
+    print(f"animating: {app.frame_timer.report()}")
+
+    run_frames(app, 120)  # Let everything settle
+    app.frame_timer.samples.clear()
+    run_frames(app, frames)
+    print(f"idle:      {app.frame_timer.report()}, {len(app.moving_cards)} cards moving, "
+          f"{sum(pile.dirty for pile in app.piles.values())} piles to position")
+
+    app.show_game_rules = True
+    app.frame_timer.samples.clear()
+    run_frames(app, frames)
+    print(f"rules:     {app.frame_timer.report()}, "
+          f"layers redrawn {app.background.redraws} + {app.overlay.redraws} times in {app.frame_timer.frames} frames")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+from statistics import median
+import argparse
+import json
+import subprocess
+import sys
+
+# Startup cost: import time of the modules the CLI, the server and the batch tools start from, each in a fresh
+# interpreter. Only the GUI needs pyxel (game/backend.py starts it with the window), so it must not be in
+# sys.modules after any of these imports: exit code 1 if it is, or if an import takes longer than its budget
+# Run from the project folder with: python -m benchmarks.imports [--repeats 7]
+
+
+BUDGETS = {  # module -> milliseconds allowed, a few times what they take on a laptop so noise doesn't fail them
+    "game.engine": 40,
+    "game.card": 40,
+    "game.pile": 40,
+    "game.replay": 60,
+    "game.tournament": 80,
+    "game.server": 120,
+    "briscola": 150,
+}
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, 'pyxel' in sys.modules]))
+"""
+
+
+def import_time(module, repeats) -> tuple:
+    """(best and median import time in ms, whether pyxel got loaded) over fresh interpreters."""
+    times, pyxel = [], False
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(module=module)], capture_output=True, text=True, check=True).stdout
+        elapsed, loaded = json.loads(out)
+        times.append(elapsed * 1e3)
+        pyxel |= loaded
+    return min(times), median(times), pyxel
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.imports", description="Import time of the pyxel-free entry points")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("modules", nargs="*", help="default: every module with a budget")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules or BUDGETS:
+        best, middle, pyxel = import_time(module, args.repeats)
+        budget = BUDGETS.get(module)
+        problems = []
+        if pyxel: problems.append("loads pyxel")
+        if budget is not None and best > budget: problems.append(f"over its {budget} ms budget")
+        failed |= bool(problems)
+        print(f"{module:18s} {best:7.1f} ms best {middle:7.1f} ms median   {', '.join(problems) or 'ok'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
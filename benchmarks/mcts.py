@@ -0,0 +1,51 @@
+from time import perf_counter
+import random
+import sys
+
+from game.bots import greedy_bot
+from game.engine import GameState
+from game.mcts import MctsPlayer
+
+# ISMCTS throughput: iterations per second at different points of a game, to size budgets for latency targets
+# Run from the project folder with: python -m benchmarks.mcts [budget ms]
+
+
+def position(seed, tricks) -> GameState:  # A random game played up to `tricks` tricks
+    rng = random.Random(seed)
+    state = GameState()
+    state.deal(seed)
+    while state.tricks < tricks: state.play(rng.choice(state.legal_moves()))
+    return state
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    for tricks in (0, 5, 10, 15, 17):
+        rates = []
+        for seed in range(10):
+            player = MctsPlayer(budget_ms=budget_ms, rng=random.Random(seed))
+            player.choose(position(seed, tricks))
+            rates.append(player.iterations_per_second())
+        print(f"after {tricks:2d} tricks: {sum(rates) / len(rates):8,.0f} iterations/s "
+              f"({sum(rates) / len(rates) * budget_ms / 1000:,.0f} per {budget_ms:g} ms budget)")
+
+    # One game against the greedy bot to show how much of the tree carries over between tricks
+    player = MctsPlayer(budget_ms=budget_ms, rng=random.Random(0))
+    state = GameState()
+    state.deal(0)
+    reused = searched = 0
+    start = perf_counter()
+    while not state.is_terminal():
+        if state.to_move == 0:
+            card = player.choose(state)
+            reused += player.reused
+            searched += player.last_iterations
+        else: card = greedy_bot(state, None)
+        state.play(card)
+    print(f"one game vs greedy: {state.scores[0]}-{state.scores[1]} in {perf_counter() - start:.1f}s, "
+          f"{reused / max(reused + searched, 1):.0%} of root visits came from reused subtrees")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+from time import perf_counter
+import sys
+
+from game.card import Card
+from game.pile import Pile
+
+# Card moves per second between piles, dealing a stock into six hands and collecting them in a deck like App does
+# Run from the project folder with: python -m benchmarks.pile [rounds]
+
+
+def deal_round(stock: Pile, hands, deck: Pile, bulk):  # Moves every card out of the stock and back, 80 moves
+    while not stock.is_empty:
+        for hand in hands:
+            if bulk: stock.move_cards(hand, 1)
+            else: hand.add(stock.draw(1))
+        for hand in hands:
+            if hand.is_empty: continue
+            if bulk: hand.move_cards(deck, 1)
+            else: deck.add(hand.draw(1))
+    if bulk: deck.move_cards(stock, len(deck))
+    else: stock.add(deck.draw(len(deck)))
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    cards = [Card(i // 10, i % 10) for i in range(40)]
+
+    for label, bulk in (("add(draw())", False), ("move_cards()", True)):
+        stock = Pile(20, 60, render_all=False)
+        hands = [Pile(52 + 20 * i, 100) for i in range(6)]
+        deck = Pile(120, 100, render_all=False)
+        stock.add(list(cards))
+
+        start = perf_counter()
+        for _ in range(rounds): deal_round(stock, hands, deck, bulk)
+        elapsed = perf_counter() - start
+        print(f"{label:13s} {rounds * 80 / elapsed:10,.0f} card moves/s")
+
+
+if __name__ == '__main__':
+    main()
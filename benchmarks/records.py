@@ -0,0 +1,77 @@
+from time import perf_counter
+import json
+import os
+import random
+import sys
+import tempfile
+
+from game.engine import GameState
+from game.records import RecordReader, RecordWriter
+
+# Game record I/O: the binary format of game/records.py against JSON lines, file size and games per second both ways
+# Run from the project folder with: python -m benchmarks.records [games]
+
+
+def sample_games(count, seed=0) -> list:  # (seed, briscola, plays) of random games
+    rng = random.Random(seed)
+    state = GameState()
+    games = []
+    for _ in range(count):
+        deal = rng.getrandbits(64)
+        state.deal(deal)
+        while not state.is_terminal(): state.play(rng.choice(state.legal_moves()))
+        games.append((deal, state.deck[-7], list(state.history)))
+    return games
+
+
+def timed(label, games, function):
+    start = perf_counter()
+    function()
+    elapsed = perf_counter() - start
+    print(f"  {label:28s} {games / elapsed:12,.0f} games/s")
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    unique = sample_games(min(games, 5000))
+    corpus = [unique[i % len(unique)] for i in range(games)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = os.path.join(folder, "games.jsonl")
+        bin_path = os.path.join(folder, "games.bin")
+
+        def write_json():
+            with open(json_path, "w") as file:
+                for seed, briscola, plays in corpus: file.write(json.dumps({"seed": seed, "briscola": briscola, "plays": plays}) + "\n")
+
+        def read_json():
+            with open(json_path) as file:
+                for line in file: json.loads(line)["plays"]
+
+        def write_binary():
+            with RecordWriter(bin_path) as writer:
+                for seed, briscola, plays in corpus: writer.write_game(seed, briscola, plays)
+
+        def read_binary():
+            with RecordReader(bin_path) as reader:
+                for seed, briscola, plays in reader: pass
+
+        def read_array():
+            with RecordReader(bin_path) as reader: reader.array()["plays"].sum()
+
+        print(f"{games} games")
+        print("JSON lines")
+        timed("write", games, write_json)
+        timed("read and parse", games, read_json)
+        print(f"  {'size':28s} {os.path.getsize(json_path) / games:12.1f} bytes/game")
+
+        print("binary records")
+        timed("write", games, write_binary)
+        timed("read (iterate)", games, read_binary)
+        try: timed("read (numpy array, sum)", games, read_array)
+        except ImportError: pass
+        print(f"  {'size':28s} {os.path.getsize(bin_path) / games:12.1f} bytes/game")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+from time import perf_counter
+import os
+import random
+import sys
+
+# Without a display SDL renders offscreen, so this also runs on servers
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from benchmarks.records import sample_games
+from game.replay import Replay, CHECKPOINT_TRICKS
+
+# Replay seeks: random access to any move of a recorded game, as a GameState and laid out on the GUI's piles,
+# and bulk loading the same position out of many games for analysis
+# Run from the project folder with: python -m benchmarks.replay [games]
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    records = sample_games(games)
+    rng = random.Random(0)
+
+    for every in (CHECKPOINT_TRICKS, 20):
+        replays = [Replay.from_record(record, every) for record in records]
+        for replay in replays: replay.state_at(len(replay))  # Takes every snapshot, like scrubbing once through the game
+        seeks = [(replay, rng.randrange(len(replay) + 1)) for replay in replays for _ in range(10)]
+        start = perf_counter()
+        for replay, move in seeks: replay.state_at(move)
+        elapsed = perf_counter() - start
+        label = f"snapshot every {every} tricks" if every < 20 else "no snapshots (from the deal)"
+        print(f"seek, {label:30s} {elapsed / len(seeks) * 1e6:8.1f} us")
+
+    start = perf_counter()
+    for record in records: Replay.from_record(record).state_at(20)
+    elapsed = perf_counter() - start
+    print(f"bulk load move 20 of every game:     {games / elapsed:8,.0f} games/s")
+
+    from briscola import App
+    app = App(run=False)
+    app.load_replay(Replay.from_record(records[0]))
+    moves = [rng.randrange(41) for _ in range(2000)]
+    start = perf_counter()
+    for move in moves: app.seek_replay(move)
+    elapsed = perf_counter() - start
+    print(f"seek and lay out App.piles:          {elapsed / len(moves) * 1e6:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
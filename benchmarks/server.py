@@ -0,0 +1,120 @@
+from collections import deque
+from multiprocessing import get_context
+from time import perf_counter
+import argparse
+import asyncio
+import json
+import random
+
+from game.server import TableServer, serve
+
+# Soak test of game/server.py: a client simulator keeps every one of thousands of tables busy (one request in flight
+# per table, random legal cards) and measures the moves per second the server sustains and the reply latency.
+# The server runs in its own process, its CPU time gives moves per second of one core even though the simulator
+# shares the machine.
+# Run from the project folder with: python -m benchmarks.server [--tables 10000] [--connections 20] [--seconds 20]
+
+
+def run_server(ports):  # Server process, sends back the port it got
+    asyncio.run(serve(port=0, server=TableServer(seed=0), ready=ports.put))
+
+
+class TableClient(asyncio.Protocol):  # One connection driving its share of the tables
+    def __init__(self, tables, first_id, rng: random.Random, counters) -> None:
+        self.ids = range(first_id, first_id + tables)
+        self.rng = rng
+        self.counters = counters  # Shared by every connection: moves, games, latencies
+        self.sent = deque()  # Send time of every request waiting for its reply, replies come back in order
+        self.buffer = b""
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.send([{"op": "new", "table": table} for table in self.ids])
+
+    def send(self, requests):
+        now = perf_counter()
+        self.sent.extend(now for _ in requests)
+        self.transport.write("".join(json.dumps(request) + "\n" for request in requests).encode())
+
+    def data_received(self, data):
+        lines = (self.buffer + data).split(b"\n")
+        self.buffer = lines.pop()
+        now = perf_counter()
+        counters = self.counters
+        latencies = counters["latencies"]
+        requests = []
+        for line in lines:
+            reply = json.loads(line)
+            latencies.append(now - self.sent.popleft())
+            status = reply.get("status")
+            if status == "play":
+                requests.append({"op": "play", "table": reply["table"], "card": self.rng.choice(reply["hand"])})
+                counters["moves"] += 1
+            elif status == "pause": requests.append({"op": "end_round", "table": reply["table"]})
+            elif status == "win":
+                requests.append({"op": "new", "table": reply["table"]})
+                counters["games"] += 1
+            else: raise RuntimeError(f"unexpected reply {reply}")
+        if requests: self.send(requests)
+
+
+async def stats(host, port) -> dict:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"op": "stats"}\n')
+    reply = json.loads(await reader.readline())
+    writer.close()
+    return reply
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, len(ordered) * p // 100)]
+
+
+async def soak(host, port, tables, connections, seconds, warmup):
+    loop = asyncio.get_running_loop()
+    counters = {"moves": 0, "games": 0, "latencies": deque(maxlen=200000)}
+    rng = random.Random(0)
+    share = -(-tables // connections)
+    clients = []
+    for first in range(0, tables, share):
+        transport, _ = await loop.create_connection(lambda: TableClient(min(share, tables - first), first, rng, counters), host, port)
+        clients.append(transport)
+
+    await asyncio.sleep(warmup)  # Every table dealt and playing
+    before, moves, games = await stats(host, port), counters["moves"], counters["games"]
+    counters["latencies"].clear()
+    start = perf_counter()
+    await asyncio.sleep(seconds)
+    after, elapsed = await stats(host, port), perf_counter() - start
+    moves, games = counters["moves"] - moves, counters["games"] - games
+    latencies = sorted(counters["latencies"])
+    for transport in clients: transport.close()
+
+    server_moves = after["moves"] - before["moves"]
+    cpu = after["cpu_seconds"] - before["cpu_seconds"]
+    print(f"{after['tables']} tables on {after['connections'] - 1} connections, {elapsed:.1f}s")
+    print(f"moves:    {moves / elapsed:10,.0f}/s sustained ({games / elapsed:,.0f} games/s)")
+    print(f"requests: {(after['requests'] - before['requests']) / elapsed:10,.0f}/s")
+    print(f"server:   {server_moves / max(cpu, 1e-9):10,.0f} moves per CPU second ({cpu / elapsed:.0%} of a core busy)")
+    print(f"latency:  p50 {percentile(latencies, 50) * 1e3:.1f} ms, p99 {percentile(latencies, 99) * 1e3:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.server", description="Soak test of the table server")
+    parser.add_argument("--tables", type=int, default=10000)
+    parser.add_argument("--connections", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    args = parser.parse_args()
+
+    context = get_context("fork")
+    ports = context.Queue()
+    server = context.Process(target=run_server, args=(ports,), daemon=True)
+    server.start()
+    try: asyncio.run(soak("127.0.0.1", ports.get(timeout=10), args.tables, args.connections, args.seconds, args.warmup))
+    finally: server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+from time import perf_counter
+import random
+
+import numpy as np
+
+from game.batch import BatchSim, greedy_policy, seeded_decks
+from game.bots import greedy_bot
+from game.engine import GameState
+from game.stats import GameStats
+
+# Streaming statistics (game/stats.py): checks that the batch and the scalar paths count the same games the same way
+# and that shards merge back exactly in any order, then measures how many games a minute each path takes in
+# Run from the project folder with: python -m benchmarks.stats
+
+
+def finished_games(games) -> list:  # Greedy vs greedy on seeds 0..games-1, the same games as greedy_policy's
+    states = []
+    rng = random.Random(0)
+    for seed in range(games):
+        state = GameState()
+        state.deal(seed)
+        while not state.is_terminal(): state.play(greedy_bot(state, rng))
+        states.append(state)
+    return states
+
+
+def main():
+    games = 4000
+    states = finished_games(games)
+    scalar = GameStats()
+    for state in states: scalar.add(state)
+
+    sim = BatchSim(games, captures=True)
+    sim.deal(seeded_decks(range(games)))
+    sim.run((greedy_policy, greedy_policy))
+    batch = GameStats()
+    batch.add_batch(sim)
+    if scalar != batch: raise AssertionError("the batch games counted differently from the same scalar games")
+    print(f"cross-check: {games} games counted the same from GameState and BatchSim")
+
+    shards = [GameStats() for _ in range(7)]
+    for i, state in enumerate(states): shards[i * 7 // games].add(state, swapped=i % 2)
+    random.Random(1).shuffle(shards)
+    merged = GameStats()
+    for shard in shards: merged.merge(GameStats.from_json(shard.to_json()))
+    whole = GameStats()
+    for i, state in enumerate(states): whole.add(state, swapped=i % 2)
+    if merged != whole: raise AssertionError("merged shards differ from one aggregator")
+    print(f"merge: 7 shards through JSON, in shuffled order, equal one aggregator")
+
+    stats = GameStats()
+    repeats = 250
+    start = perf_counter()
+    for _ in range(repeats):
+        for state in states: stats.add(state)
+    stats.flush()
+    scalar_rate = repeats * games / (perf_counter() - start)
+
+    stats = GameStats()
+    sim = BatchSim(100000, seed=0, captures=True)
+    sim.run((greedy_policy, greedy_policy))
+    repeats = 20
+    start = perf_counter()
+    for _ in range(repeats): stats.add_batch(sim, swapped=np.arange(sim.n) % 2)
+    batch_rate = repeats * sim.n / (perf_counter() - start)
+
+    print(f"add(GameState):     {scalar_rate * 60:14,.0f} games/minute")
+    print(f"add_batch(BatchSim): {batch_rate * 60:13,.0f} games/minute")
+    print(f"memory: {stats.points.nbytes + stats.captures.nbytes:,} bytes of counts whatever the number of games")
+    print(stats.report())
+
+
+if __name__ == '__main__':
+    main()
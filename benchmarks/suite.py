@@ -0,0 +1,260 @@
+from time import perf_counter
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+
+# Without a display SDL renders offscreen, so the GUI cases also run on servers
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# Benchmark suite: times the hot paths of the engine, the frame loop and the renderer, prints the results as JSON
+# and compares them with this machine's baseline, failing (exit code 1) when a case got slower than its threshold allows.
+# Timings from different machines say nothing about each other, so every host keeps its own baseline, written on
+# its first run. Each case is timed right after a fixed reference workload and compared as a multiple of it, so the
+# whole machine running slower for a while (another process, a lower clock) doesn't look like a regression, and the
+# spread of its repeated samples is added to its limit.
+# Run from the project folder with:
+#   python -m benchmarks.suite                        compare with benchmarks/baselines/<host>.json, write it if missing
+#   python -m benchmarks.suite --save-baseline        store this machine's numbers as the new baseline
+#   python -m benchmarks.suite -k render --json out.json
+
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines")  # One file per host, not in the repository
+THRESHOLD = 0.25  # Allowed slowdown against the baseline, 0.25 = 25 % slower
+REPEATS = 7  # Samples of each case, the best is its time and the gap to the next best its noise
+TARGET_SECONDS = 0.05  # Each sample runs the case for about this long
+RETRIES = 2  # Times a case that looks slower than its threshold is timed again
+
+CASES = {}  # name -> (setup, threshold), setup(context) returns a function doing one operation
+
+
+def case(name, threshold=THRESHOLD):
+    def register(setup):
+        CASES[name] = (setup, threshold)
+        return setup
+    return register
+
+
+class Context:  # Shared objects, the App is only built if a GUI case runs (pyxel can only be initialized once)
+    def __init__(self) -> None:
+        self._app = None
+
+    @property
+    def app(self):
+        if self._app is None:
+            from briscola import App
+            import pyxel
+            pyxel.play = lambda *args, **kwargs: None  # No sound during the frame cases
+            self._app = App(run=False)
+        return self._app
+
+    def idle_app(self):  # Fresh deal with every card in place
+        app = self.app
+        app.reset_move()
+        app.show_game_rules = app.show_briscola_rules = False
+        app.new_game(0)
+        for _ in range(120):
+            app.update()
+            app.render()
+        return app
+
+
+@case("trick_resolution")
+def trick_resolution(context):  # The second card of a trick on the engine: winner, captures and refill
+    from game.engine import GameState
+    state = GameState()
+    state.deal(0)
+    state.play(state.legal_moves()[0])
+
+    def run():
+        trick = state.copy()
+        trick.play(trick.legal_moves()[0])
+    return run
+
+
+@case("lay_out")
+def lay_out_piles(context):  # The piles rebuilt from the engine after a card is played (App.perform_move)
+    from game.replay import lay_out
+    app = context.idle_app()
+    return lambda: lay_out(app.engine, app.piles, app.cards, now=False)
+
+
+@case("headless_game")
+def headless_game(context):  # Deal to the last trick on the engine with random players
+    from benchmarks.engine import play_random_game
+    from game.engine import GameState
+    state = GameState()
+    rng = random.Random(0)
+    seeds = iter(range(10 ** 9))
+    return lambda: play_random_game(state, next(seeds), rng)
+
+
+@case("update_idle")
+def update_idle(context):
+    return context.idle_app().update
+
+
+@case("update_drag", threshold=0.35)
+def update_drag(context):  # A hand card held by the cursor, repositioned every frame
+    app = context.idle_app()
+    app.set_cursor_offset(4, 4)
+    app.config_move(source=app.piles['pl0_1'], amount=1)  # Never released, no mouse events come in
+    return app.update
+
+
+@case("render_idle", threshold=0.5)  # Pyxel's offscreen renderer is noisier than pure Python
+def render_idle(context):
+    return context.idle_app().render
+
+
+@case("render_rules", threshold=0.5)
+def render_rules(context):
+    app = context.idle_app()
+    app.show_game_rules = True
+    return app.render
+
+
+@case("pile_add_draw")
+def pile_add_draw(context):  # One card from a pile to another and back
+    from game.card import Card
+    from game.pile import Pile
+    source, target = Pile(20, 60, render_all=False), Pile(52, 100)
+    source.add([Card(i // 10, i % 10) for i in range(40)])
+
+    def run():
+        target.add(source.draw(1))
+        source.add(target.draw(1))
+    return run
+
+
+def reference():  # Fixed pure Python work every case is measured against
+    total = 0
+    for i in range(500): total += i * i % 7
+    return total
+
+
+def baseline_path() -> str:
+    host = "".join(c if c.isalnum() or c in "-_." else "_" for c in platform.node()) or "unknown"
+    return os.path.join(BASELINES, f"{host}.json")
+
+
+def time_case(run) -> list:
+    """Time of one call in microseconds, REPEATS samples sorted from the best."""
+    loops = 1
+    while True:  # Calibrate so a sample lasts about TARGET_SECONDS
+        start = perf_counter()
+        for _ in range(loops): run()
+        elapsed = perf_counter() - start
+        if elapsed >= TARGET_SECONDS / 10 or loops >= 1 << 20: break
+        loops *= 4
+    loops = max(1, int(loops * TARGET_SECONDS / max(elapsed, 1e-9)))
+
+    samples = []
+    for _ in range(REPEATS):
+        start = perf_counter()
+        for _ in range(loops): run()
+        samples.append((perf_counter() - start) / loops * 1e6)
+    return sorted(samples)
+
+
+def spread(samples) -> float:  # How far the best sample could be off: the gap to the next best
+    return samples[1] / samples[0] - 1
+
+
+def run_suite(names, context: Context) -> dict:
+    results, relative, noise = {}, {}, {}
+    for name in names:
+        setup, _ = CASES[name]
+        run = setup(context)
+        base = time_case(reference)  # Just before the case, so both see the machine in the same state
+        samples = time_case(run)
+        results[name] = round(samples[0], 3)
+        relative[name] = round(samples[0] / base[0], 4)
+        noise[name] = round(spread(samples) + spread(base), 4)
+    return {
+        "unit": "us/op",
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "host": platform.node(),
+        "results": results,
+        "relative": relative,  # Time of each case in reference workloads, what is compared
+        "noise": noise,
+    }
+
+
+def limit(report, baseline, name) -> float:  # Allowed slowdown of a case, its threshold plus the noise of the noisier run
+    return CASES[name][1] + max(report["noise"][name], baseline.get("noise", {}).get(name, 0))
+
+
+def change(report, baseline, name):  # Relative slowdown of a case against the baseline, None without one
+    base = baseline.get("relative", {}).get(name)
+    return None if base is None else report["relative"][name] / base - 1
+
+
+def compare(report, baseline) -> tuple:
+    """Lines describing each case against the baseline, and whether any regressed past its limit."""
+    lines, failed = [], False
+    for name, value in report["results"].items():
+        slower = change(report, baseline, name)
+        if slower is None:
+            lines.append(f"{name:18s} {value:10.3f} us   (no baseline)")
+            continue
+        allowed = limit(report, baseline, name)
+        regressed = slower > allowed
+        failed |= regressed
+        status = "REGRESSION" if regressed else "ok"
+        lines.append(f"{name:18s} {value:10.3f} us   baseline {baseline['results'][name]:10.3f} us   "
+                     f"{slower:+7.1%} relative (limit +{allowed:.0%})  {status}")
+    return lines, failed
+
+
+def save(report, baseline, path):  # Cases left out with -k keep their old numbers
+    saved = dict(report, **{key: {**baseline.get(key, {}), **report[key]} for key in ("results", "relative", "noise")})
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as file: file.write(json.dumps(saved, indent=2) + "\n")
+    print(f"baseline saved to {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="Mini-Briscola benchmark suite")
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to this file ('-' for stdout)")
+    parser.add_argument("--baseline", default=None, help="baseline file to compare with (default: benchmarks/baselines/<host>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results into the baseline instead of comparing")
+    args = parser.parse_args(argv)
+    path = args.baseline or baseline_path()
+
+    names = [name for name in CASES if args.filter in name]
+    context = Context()
+    report = run_suite(names, context)
+    output = json.dumps(report, indent=2)
+
+    if args.json == "-": print(output)
+    elif args.json:
+        with open(args.json, "w") as file: file.write(output + "\n")
+
+    baseline = {}
+    if os.path.exists(path):
+        with open(path) as file: baseline = json.load(file)
+
+    if args.save_baseline or not baseline:  # A machine's first run is its baseline
+        save(report, baseline, path)
+        return 0
+    lines, failed = compare(report, baseline)
+    for _ in range(RETRIES):  # A slow run is timed again before it counts, on a busy machine one timing can be off
+        if not failed: break
+        slow = [name for name in report["results"] if (change(report, baseline, name) or 0) > limit(report, baseline, name)]
+        again = run_suite(slow, context)
+        for name in slow:
+            if again["relative"][name] < report["relative"][name]:
+                for key in ("results", "relative", "noise"): report[key][name] = again[key][name]
+        lines, failed = compare(report, baseline)
+    print("\n".join(lines))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+from time import perf_counter
+import argparse
+import os
+import tempfile
+
+from game.bitboard import BitState
+from game.endgame import EndgameSolver
+from game.engine import GameState, NO_CARD
+from game.records import RecordReader, RecordWriter
+from game.symmetry import canonical_key
+from game.tournament import run_tournament
+
+# Suit symmetry on a corpus of recorded games: how many distinct positions are left once equivalent ones share a
+# canonical key, for the keys different caches would use, and what it buys a shared endgame table
+# Run from the project folder with: python -m benchmarks.symmetry [records.bin] (default: a fresh greedy vs random tournament)
+
+
+def corpus(path, games) -> list:
+    """Every position of every game in a record file, as BitStates."""
+    positions = []
+    state = GameState()
+    with RecordReader(path) as records:
+        for i in range(min(games, len(records))):
+            seed, _, plays = records[i]
+            state.deal(seed)
+            positions.append(BitState.from_game(state))
+            for card in plays:
+                state.play(card)
+                positions.append(BitState.from_game(state))
+    return positions
+
+
+def solver_view(state: BitState) -> BitState:  # What the endgame solver keys on, the captured cards don't change what is left to take
+    view = state.copy()
+    view.deck0 = view.deck1 = view.seen = 0
+    return view
+
+
+def policy_view(state: BitState) -> BitState:  # What a policy table keys on: the mover's hand, the lead and the briscola
+    view = BitState()
+    view.hand0 = state.hand0 if state.to_move == 0 else state.hand1
+    view.f1 = state.f1 if state.to_move == 0 else state.f0
+    view.briscola_suit = state.briscola_suit
+    return view
+
+
+def reduction(label, states):
+    start = perf_counter()
+    canonical = {canonical_key(state) for state in states}
+    elapsed = perf_counter() - start
+    raw = {state.key() for state in states}
+    print(f"{label:34s} {len(states):8,} positions {len(raw):8,} distinct {len(canonical):8,} canonical "
+          f"({len(raw) / max(len(canonical), 1):5.2f}x)   {elapsed / len(states) * 1e6:5.1f} us/key")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.symmetry")
+    parser.add_argument("records", nargs="?", help="record file (game/records.py), default: record a new tournament")
+    parser.add_argument("-n", "--games", type=int, default=2000)
+    args = parser.parse_args()
+
+    path = args.records
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "corpus.bin")
+        with RecordWriter(path) as writer: run_tournament("greedy", "random", args.games, writer=writer)
+    positions = corpus(path, args.games)
+
+    endgames = [state for state in positions if state.stock_len == 0 and state.briscola == NO_CARD and not state.is_terminal()]
+    reduction("every position", positions)
+    reduction("endgames (stock empty)", endgames)
+    reduction("endgames, solver view", [solver_view(state) for state in endgames])
+    reduction("last two tricks, solver view", [solver_view(state) for state in endgames if (state.hand0 | state.hand1).bit_count() + (state.f0 != NO_CARD) + (state.f1 != NO_CARD) <= 4])
+    reduction("policy view (hand, lead, briscola)", [policy_view(state) for state in positions if not state.is_terminal()])
+
+    for canonical in (False, True):  # One solver for the whole corpus, like endgame_bot without clearing between games
+        solver = EndgameSolver(canonical=canonical)
+        start = perf_counter()
+        for state in endgames: solver.solve(state)
+        elapsed = perf_counter() - start
+        print(f"endgame solver, {'canonical' if canonical else 'raw':9s} table: {elapsed / len(endgames) * 1e6:7.1f} us/solve, "
+              f"{solver.nodes:,} nodes, {len(solver.table):,} entries")
+
+
+if __name__ == '__main__':
+    main()
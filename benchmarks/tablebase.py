@@ -0,0 +1,58 @@
+from time import perf_counter
+import random
+import sys
+
+from tests.reference import positions
+from game.endgame import EndgameSolver
+from game.tablebase import Tablebase, TABLEBASE
+
+# Endgame tablebase (game/tablebase.py): checks it against the alpha-beta solver on positions of the last three tricks,
+# at the start of a trick and with a card on the table, then times a lookup against a solve
+# Generate the table first with: python briscola.py tablebase
+# Run from the project folder with: python -m benchmarks.tablebase [positions] [tablebase path]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    path = sys.argv[2] if len(sys.argv) > 2 else TABLEBASE
+    start = perf_counter()
+    table = Tablebase(path)
+    print(f"opened {path} in {(perf_counter() - start) * 1e3:.2f} ms, {len(table.data) / 1e6:.1f} MB mapped")
+
+    rng = random.Random(0)
+    starts = positions(count, 17)
+    answers = []  # Random cards played into the last three tricks, a card on the table or not
+    for state in starts:
+        state = state.copy()
+        for _ in range(rng.randrange(1, 6)): state.play(rng.choice(state.legal_moves()))
+        if not state.is_terminal(): answers.append(state)
+
+    for state in starts + answers:
+        value, card = EndgameSolver().solve(state)
+        looked_up, best = table.solve(state)
+        if looked_up != value: raise AssertionError(f"tablebase says {looked_up}, solver says {value}")
+        child = state.copy()
+        before = child.score0
+        child.play(best)
+        if child.score0 - before + (EndgameSolver().solve(child)[0] if not child.is_terminal() else 0) != value:
+            raise AssertionError(f"best card {best} does not reach {value}")
+    print(f"check: {len(starts) + len(answers)} positions match the endgame solver")
+
+    for label, states in (("start of a trick", starts), ("card on the table", answers)):
+        start = perf_counter()
+        for state in states: EndgameSolver().solve(state)
+        solved = (perf_counter() - start) / len(states)
+        start = perf_counter()
+        for state in states: table.solve(state)
+        looked_up = (perf_counter() - start) / len(states)
+        print(f"{label:17s}: solver {solved * 1e6:7.1f} us, tablebase {looked_up * 1e6:5.1f} us ({solved / looked_up:.0f}x), value and best card")
+
+    hands = [(state.hand0, state.hand1) for state in starts]
+    start = perf_counter()
+    for hand0, hand1 in hands: table.points(hand0, hand1)
+    print(f"one value: {(perf_counter() - start) / len(hands) * 1e6:.1f} us")
+    table.close()
+
+
+if __name__ == '__main__':
+    main()
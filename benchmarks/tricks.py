@@ -0,0 +1,39 @@
+from time import perf_counter
+import random
+import sys
+
+from game.tricks import TRICK_WINNER, TABLE_SIZE, reference_winner, trick_index, verify_table
+
+# Checks the trick winner table against the original rules over the whole domain and times both
+# Run from the project folder with: python -m benchmarks.tricks [lookups]
+
+
+def main():
+    mismatches = verify_table()
+    print(f"table: {TABLE_SIZE} entries, {len(mismatches)} mismatches against the case by case rules")
+    if mismatches:
+        for mismatch in mismatches[:10]: print("  f0=%d f1=%d briscola_suit=%d leader=%d expected=%d" % mismatch)
+        sys.exit(1)
+
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    rng = random.Random(0)
+    tricks = []
+    for _ in range(lookups):
+        f0, f1 = rng.sample(range(40), 2)
+        tricks.append((f0, f1, rng.randrange(4), rng.randrange(2)))
+    indexes = [trick_index(*trick) for trick in tricks]
+
+    start = perf_counter()
+    for trick in tricks: reference_winner(*trick)
+    cascade = perf_counter() - start
+
+    start = perf_counter()
+    for index in indexes: TRICK_WINNER[index]
+    table = perf_counter() - start
+
+    print(f"case by case: {cascade / lookups * 1e9:.0f} ns/trick")
+    print(f"table lookup: {table / lookups * 1e9:.0f} ns/trick ({cascade / table:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
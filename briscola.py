@@ -1,32 +1,85 @@
 from time import perf_counter, time_ns
-import random
-import pyxel
+import argparse
+import atexit
+import sys
 
+from game import backend
 from game.card import Card
 from game.pile import Pile
 from game.move import Move
-from game.consts import CARD_HEIGHT, CARD_WIDTH
+from game.consts import CARD_HEIGHT, CARD_WIDTH, BUDGET_MS
+from game.engine import GameState
+from game.frametimer import FrameTimer
+from game.layers import Layer, BACKGROUND_BANK, OVERLAY_BANK, TRANSPARENT
+from game.records import RecordReader, RecordWriter
+from game.replay import Replay, lay_out
+from game.tracker import CardTracker
 
-# Buttons used in the game
+pyxel = None  # Loaded by App when the window opens (game/backend.py), importing this module doesn't load pyxel
+
+# Buttons used in the game, names of pyxel's key constants looked up when the window opens (App.buttons)
 Buttons = {
-    'end_round': pyxel.KEY_R,
-    'new': pyxel.KEY_N, 
-    'briscola_rules': pyxel.KEY_B,
-    'game_rules': pyxel.KEY_G,
-    'select': pyxel.MOUSE_BUTTON_LEFT,
-    'cancel': pyxel.MOUSE_BUTTON_RIGHT,
-    'pl0_cards_face_switch': pyxel.KEY_1,
-    'pl1_cards_face_switch': pyxel.KEY_2
+    'end_round': 'KEY_R',
+    'new': 'KEY_N', 
+    'briscola_rules': 'KEY_B',
+    'game_rules': 'KEY_G',
+    'select': 'MOUSE_BUTTON_LEFT',
+    'cancel': 'MOUSE_BUTTON_RIGHT',
+    'pl0_cards_face_switch': 'KEY_1',
+    'pl1_cards_face_switch': 'KEY_2',
+    'profiler': 'KEY_P',
+    'cards_left': 'KEY_C',
+    'analyze': 'KEY_A'
 }
 
+PROFILER_REFRESH = 15  # Frames between updates of the profiler's numbers, 4 times a second
+
+# Text of the rules panels
+GAME_RULES = """Game Rules:
+
+-1: Flips Player 1's cards
+    making them play first
+-2: Flips Player 2's cards
+    making them play first
+-R  Ends the current round/trick
+-N  Starts a new game
+-C  Shows the points and trumps
+    still to be played
+-A  Analyzes a finished game
+
+Either double click on a card to
+'quick-play' it or drag and drop
+it to the desired location.
+"""
+
+BRISCOLA_RULES = """Briscola Rules:
+
+-Goal: Score more than 60 points
+by collecting high-value cards.
+-Card Values:
+Ace: 11; 3: 10; King: 4; Queen: 3;
+Jack: 2
+-Gameplay:
+*Each player gets 3 cards
+*The top deck card determines the 
+ Briscola suit
+*Players play one card per turn
+*Highest Briscola card wins the trick
+*If no Briscola cards, highest 
+ leading suit card wins.
+*Trick winner takes cards and leads
+ the next trick.
+"""
+
 
 class App:
-    def __init__(self) -> None:
+    def __init__(self, run = True, record_path = None, replay:Replay = None, profile_path = None, ai_player = None, ai_budget_ms = BUDGET_MS) -> None:  # run=False sets the game up without entering pyxel's loop (benchmarks, tests)
         width = 160
         height = 144
 
-        pyxel.init(width, height, title="Mini-Briscola", fps= 60)
-        pyxel.load("assets/assets_italian.pyxres")  
+        global pyxel
+        pyxel = backend.start(width, height, title="Mini-Briscola", fps= 60)
+        self.buttons = {action: getattr(pyxel, key) for action, key in Buttons.items()}
 
         pyxel.mouse(True)
 
@@ -45,16 +98,28 @@ class App:
 
         self.show_game_rules = False
         self.show_briscola_rules = False
-
+        self.show_profiler = False
+        self.show_cards_left = False
+        self.show_analysis = False
+        self.profiler_lines = []  # Rows of the profiler, refreshed every PROFILER_REFRESH frames
 
         self.end_round = False # Bool to know whether the button to end the current round was pressed
         self.first_mover = 0 # Bool that stores who the first mover of the turn is
         self.win_turn = 5 # Default value when no one has won the turn yet
-        self.mover_advantage = 5 # Default value when no one has has moved yet
         self.pause = False # Check to see if we're in the pausing status
         self.briscola_suit = 0 # Variable to store the Briscola suit
-
-        self.cards = [Card(i // 10, i % 10) for i in range(40)]
+        self.replay = None # Recorded game being scrubbed through, if any (game/replay.py)
+        self.replay_move = 0 # Cards of the replay shown on the table
+        self.ai_player = ai_player # Seat played by the bot (0 or 1), None when both players are human
+        self.ai = None # Worker process searching the bot's cards (game/ai.py)
+        if ai_player != None:
+            from game.ai import AiWorker  # Loads multiprocessing, only with a bot to play against
+            self.ai = AiWorker(ai_budget_ms)
+        if self.ai: atexit.register(self.ai.close)
+        self.analyzer = None # Scores every card of a finished game on a process pool (game/analysis.py), started on first use
+
+        self.moving_cards = set()  # Cards whose animation hasn't finished, the only ones ticked every frame
+        self.cards = [Card(i // 10, i % 10, moving=self.moving_cards) for i in range(40)]
         # Ace, 2, 3, 4, 5, 6, 7, Jack, Queen, King = 10
 
         self.piles = {  # Layout of the game
@@ -78,8 +143,30 @@ class App:
 
         for key in self.piles.keys(): self.piles[key].id = key
 
+        self.engine = GameState()  # Headless copy of the game that owns the rules, the piles are the view of it
+        self.tracker = CardTracker()  # Unseen cards, points and trumps left, updated by the engine on every move (game/tracker.py)
+        self.engine.tracker = self.tracker
+        self.records = RecordWriter(record_path, flush_records = 1) if record_path else None  # Seed and cards played of every game (game/records.py)
+
+        self.frame_timer = FrameTimer(keep_frames = profile_path != None)  # Rolling update and render times, split in phases while profiling
+        if profile_path: atexit.register(self.frame_timer.dump, profile_path)  # pyxel.quit() and closing the window run atexit
+        self.background = Layer(BACKGROUND_BANK, width, height)  # Cached table and slots
+        self.overlay = Layer(OVERLAY_BANK, width, height, colkey=TRANSPARENT)  # Cached text panels over the cards
+
         self.new_game()  
-        pyxel.run(self.update, self.render)  
+        if replay: self.load_replay(replay)
+        if run: pyxel.run(self.timed_update, self.timed_render)
+
+
+    # What pyxel.run calls every frame, update and render timed by the frame timer
+    def timed_update(self):
+        timer = self.frame_timer
+        timer.begin_frame()
+        if self.ai and self.ai.thinking and timer.frames: timer.add('frame thinking', timer.samples['frame'][-1])  # Frames while the bot searches
+        timer.time('update', self.update)
+
+    def timed_render(self):
+        self.frame_timer.time('render', self.render)
 
 
     def get_cursor_pos(self):  # Cursor position 
@@ -98,6 +185,12 @@ class App:
     # The method that creates the game state (resets the game state and starts a new one) 
     def new_game(self, seed = None):  
         
+        # A game left before the end is recorded with the cards played so far (replays are already recorded)
+        if self.records and self.engine.history and not self.engine.is_terminal() and not self.replay: self.record_game()
+        self.replay = None
+        self.show_analysis = False
+        if self.ai: self.ai.cancel()  # The bot drops the old game's search
+
         # Sets all cards face down, clears assigned pile
         for card in self.cards:
             card.set_face_down()
@@ -109,17 +202,17 @@ class App:
         # Resets state
         self.rng_seed = time_ns() if seed == None else seed
             
-        random.seed(self.rng_seed)
+        self.engine.deal(self.rng_seed)
         self.game_status = "new"
         self.reset_move()  # Move state reset to default
 
         self.move_count = 0
         self.first_turn = True
+        self.first_mover = 0
 
-        # Assigns cards to stock pile and shuffle
+        # Assigns cards to stock pile in the engine's shuffled order
         stock = self.piles["stock"]
-        stock.add(self.cards)
-        stock.shuffle()
+        stock.add([self.cards[i] for i in self.engine.deck])
         stock.position_cards(now = True)
 
 
@@ -152,6 +245,7 @@ class App:
 
     # Returns a list of cards currently moving (will always be one)
     def get_cards_moving(self):  
+        if not self.moving_cards: return []  # Idle frames skip the scan
         cards = [c for c in self.cards if c.is_moving() == True]
         return cards
 
@@ -188,6 +282,9 @@ class App:
         # Source is empty, invalid
         if source.is_empty: return False
 
+        # The bot's cards are played by the bot only
+        if self.ai and target.id == f'foundation{self.ai_player}': return False
+
         # Moves from pl0_1, pl0_2, pl0_3 to foundation0 (only if foundation0 is empty and the cards are face up)
         if source.id in ['pl0_1', 'pl0_2', 'pl0_3'] and target.id == 'foundation0':
             # Look if at least one card is face up
@@ -198,7 +295,7 @@ class App:
             ]
             
             if any(face_up_conditions):  # if at least one is face up (for the last rounds of the game)
-                if target.is_empty: return True
+                if target.is_empty and source.top_card.index in self.engine.legal_moves(): return True
 
 
         # Moves from pl1_1, pl1_2, pl1_3 to foundation1 (only if foundation1 is empty and the cards are face up)
@@ -210,26 +307,15 @@ class App:
             ]
             
             if any(face_up_conditions):  
-                if target.is_empty: return True
-
-
-
-        # Moves from stock to pl0_1, pl0_2, pl0_3, pl1_1, pl1_2, pl1_3 (only if there is an empty slot)
-        if source.id == 'stock' and target.id in ['pl0_1', 'pl0_2', 'pl0_3', 'pl1_1', 'pl1_2', 'pl1_3']:
-            if target.is_empty: return True
-
-        if source.id == 'briscola' and target.id in ['pl0_1', 'pl0_2', 'pl0_3', 'pl1_1', 'pl1_2', 'pl1_3']:
-            if target.is_empty: return True
+                if target.is_empty and source.top_card.index in self.engine.legal_moves(): return True
 
+        # Nothing else can be dragged, hands are refilled by the engine only
         return False          
     
     
     # Determines the *overall* winner of the game (not the round winner)
     def overall_winner(self):  
-        sum_player1 = sum(card.points for card in self.piles['deck1'].cards)
-        if sum_player1 > 60: return 1
-        elif sum_player1 == 60: return 5 # Default value if the overall game resulted in a tie
-        else: return 0
+        return self.engine.overall_winner()  # 5 if the overall game resulted in a tie
          
             
     # Performs the movement of cards between piles 
@@ -249,7 +335,15 @@ class App:
         elif amount == 0: return
         
         # Move cards from source to target
-        target.add(source.draw(amount))
+        source.move_cards(target, amount)
+
+        # Cards played to a foundation are played in the engine, which decides who takes the trick and who draws.
+        # The piles follow the engine: at once after a lead, after the pause showing the trick otherwise ("new_hand")
+        if target.id in ('foundation0', 'foundation1'):
+            winner = self.engine.play(target.top_card.index)
+            if winner == None: lay_out(self.engine, self.piles, self.cards, now = False)
+            else: self.win_turn = winner
+            if self.records and self.engine.is_terminal() and not self.replay: self.record_game()
         
         # Play sound
         pyxel.play(0, 0)
@@ -264,6 +358,40 @@ class App:
         if flip_target_pile: target.flip()
 
 
+    # Appends the current game to the record file
+    def record_game(self):
+        self.records.write_game(self.rng_seed, self.engine.deck[-7], self.engine.history)
+
+
+    # Starts scrubbing through a recorded game
+    def load_replay(self, replay:Replay, move = 0):
+        self.replay = replay
+        self.seek_replay(move)
+
+
+    # Shows the replay's position after `move` cards at once, without animations
+    def seek_replay(self, move):
+        move = max(0, min(move, len(self.replay)))
+        state = self.replay.state_at(move)
+
+        self.replay_move = move
+        self.rng_seed = self.replay.seed
+        if self.ai: self.ai.cancel()
+        self.show_analysis = False
+        self.engine = state  # The game can be played on from here
+        state.tracker = self.tracker
+        self.tracker.sync(state)
+        self.briscola_suit = state.briscola_suit
+        self.first_mover = state.leader
+        self.win_turn = 5
+        self.pause = False
+        self.end_round = False
+        self.reset_move()
+
+        lay_out(state, self.piles, self.cards)
+        self.game_status = "win" if state.is_terminal() else "play"
+
+
     # Resets the move state back to defaults
     def reset_move(self): 
         self.next_move.source = None
@@ -317,120 +445,89 @@ class App:
     # Handles the input from keyboard and mouse/trackpad
     def handle_input(self):  
         # New game
-        if pyxel.btnp(Buttons['new']): self.new_game()
+        if pyxel.btnp(self.buttons['new']): self.new_game()
 
         # Ends the current round and starts a new one
-        elif pyxel.btnp(Buttons['end_round']): self.end_round = True
+        elif pyxel.btnp(self.buttons['end_round']): self.end_round = True
 
         # Shows game rules and briscola rules
-        elif pyxel.btnp(Buttons['game_rules']):
+        elif pyxel.btnp(self.buttons['game_rules']):
             self.show_game_rules = not self.show_game_rules
             if self.show_game_rules: self.show_briscola_rules = False  # If the game rules are shown, the briscola rules are hidden
+            self.show_analysis = False
 
-        elif pyxel.btnp(Buttons['briscola_rules']):
+        elif pyxel.btnp(self.buttons['briscola_rules']):
             self.show_briscola_rules = not self.show_briscola_rules
             if self.show_briscola_rules: self.show_game_rules = False  # If the briscola rules are shown, the game rules are hidden
+            self.show_analysis = False
 
+        # Scrubs through a replay: arrows move one card (hold to repeat), with shift one trick
+        elif self.replay and pyxel.btnp(pyxel.KEY_RIGHT, hold = 12, repeat = 2):
+            self.seek_replay(self.replay_move + (2 if pyxel.btn(pyxel.KEY_SHIFT) else 1))
 
-    # Used to create text with a shadow
-    def drop_text(self, x, y, s, fg=pyxel.COLOR_WHITE, bg=pyxel.COLOR_BLACK):  
-        pyxel.text(x, y+1, s, bg)
-        pyxel.text(x, y, s, fg)
-     
-        
-    # First method of game logic extracts the data from each pile at the beginning of the round 
-    def extract_pile_data(self):  
+        elif self.replay and pyxel.btnp(pyxel.KEY_LEFT, hold = 12, repeat = 2):
+            self.seek_replay(self.replay_move - (2 if pyxel.btn(pyxel.KEY_SHIFT) else 1))
 
+        elif pyxel.btnp(self.buttons['cards_left']): self.show_cards_left = not self.show_cards_left
 
-        # Extracts foundation top cards and suits data
-        foundation0_top_card = self.piles['foundation0'].top_card
-        foundation1_top_card = self.piles['foundation1'].top_card
+        # Post-game analysis, results show up as the pool sends them back
+        elif pyxel.btnp(self.buttons['analyze']) and self.game_status == "win": self.toggle_analysis()
 
-        foundation0_suit = foundation0_top_card.suit if foundation0_top_card else None
-        foundation1_suit = foundation1_top_card.suit if foundation1_top_card else None
+        # Frame profiler, phases are only timed while it is shown or frames are written to a file
+        elif pyxel.btnp(self.buttons['profiler']):
+            self.show_profiler = not self.show_profiler
+            self.frame_timer.detail = self.show_profiler or self.frame_timer.current != None
+            self.profiler_lines = []
 
-        # Verifies if the cards played are briscola
-        foundation0_is_briscola = foundation0_suit == self.briscola_suit if foundation0_top_card else False
-        foundation1_is_briscola = foundation1_suit == self.briscola_suit if foundation1_top_card else False
 
-        return {
-            'briscola_suit': self.briscola_suit,
-            'foundation0_top_card': foundation0_top_card,
-            'foundation1_top_card': foundation1_top_card,
-            'foundation0_is_briscola': foundation0_is_briscola,
-            'foundation1_is_briscola': foundation1_is_briscola,
-            'foundation0_suit': foundation0_suit,
-            'foundation1_suit': foundation1_suit,
-        }
+    # Opens the analysis of the finished game (positions already analyzed come from the cache) or closes it
+    def toggle_analysis(self):
+        self.show_analysis = not self.show_analysis
+        if not self.show_analysis: return
+        self.show_game_rules = self.show_briscola_rules = False
+        if self.analyzer == None:
+            from game.analysis import Analyzer  # Loads multiprocessing, only once an analysis is asked for
+            self.analyzer = Analyzer()
+            atexit.register(self.analyzer.close)
+        self.analyzer.start(self.engine.deck, self.engine.history)
 
 
-    # Second method of game logic determines the winner of every turn
-    def determine_winning_turn(self, pile_data):  
-        self.win_turn = 5 #default value
+    # Used to create text with a shadow
+    def drop_text(self, x, y, s, fg=7, bg=0, target=None):  # White on a black shadow, target is a layer's image or None for the screen
+        if target == None: target = pyxel
+        target.text(x, y+1, s, bg)
+        target.text(x, y, s, fg)
+     
+        
+    # Starts the bot's search when it's its turn and plays its card when the worker answers, never waits for it
+    def update_ai(self):
+        foundation = self.piles[f'foundation{self.ai_player}']
+        if self.engine.to_move != self.ai_player or not foundation.is_empty or self.engine.is_terminal(): return
 
-        f0_card = pile_data['foundation0_top_card']
-        f1_card = pile_data['foundation1_top_card']
-        f0_is_briscola = pile_data['foundation0_is_briscola']
-        f1_is_briscola = pile_data['foundation1_is_briscola']
-        f0_suit = pile_data['foundation0_suit']
-        f1_suit = pile_data['foundation1_suit']
+        if not self.ai.thinking:
+            self.ai.think(self.engine)
+            return
 
-        # Case 1: One of the played cards is briscola and one is not
-        if f0_is_briscola and not f1_is_briscola: self.win_turn = 0
-        elif f1_is_briscola and not f0_is_briscola: self.win_turn = 1
-            
-        # Case 2: Both of the played cards are briscola     
-        elif f1_is_briscola and f0_is_briscola:
-            if f0_card and f1_card:
-                if f0_card.points == 0 and f1_card.points == 0:
-                    self.win_turn = 1 if f1_card.rank > f0_card.rank else 0
-                elif f0_card.points > f1_card.points: self.win_turn = 0
-                elif f1_card.points > f0_card.points: self.win_turn = 1
-        
-        # Case 3: None is briscola
-        elif not f1_is_briscola and not f0_is_briscola:
-            # Case 3.1: Cards have the same suit
-            if f1_suit == f0_suit and f0_card and f1_card: 
-                # Case 3.1.1: None of the cards have points, winner is decided based on rank
-                if f0_card.points == 0 and f1_card.points == 0: 
-                    if f1_card.rank > f0_card.rank: self.win_turn = 1 
-                    else: self.win_turn = 0
-                # Case 3.1.2: At least one of the cards has points, the card with more points wins   
-                elif f0_card.points > f1_card.points: self.win_turn = 0
-                elif f1_card.points > f0_card.points: self.win_turn = 1
-    
-            #Case 3.2 Cards have different suits
-            elif f1_suit!= f0_suit and f0_card and f1_card:
-                self.win_turn = 1 if self.mover_advantage == 1 else 0
+        card = self.ai.poll()
+        if card == None: return
+        self.perform_move(self.cards[card].pile, foundation, 1)  # Slides over with Card.move_to when the foundation positions it
+        foundation.top_card.set_face_up()
 
 
     # Updates the game state continuously, effectively running the game 
     def update(self):  
+        split = self.frame_timer.split
         self.handle_input()
+        split('update input')
+        status = self.game_status
 
         # NEW GAME IS SET UP
         if self.game_status == "new": 
 
-            # List of piles to deal cards to
-            target_piles = ['pl0_1', 'pl0_2', 'pl0_3', 'pl1_1', 'pl1_2', 'pl1_3']
-            
-            # Get the piles from self.piles
-            f_piles = [self.piles[pile_id] for pile_id in target_piles]
-
-            moving = self.get_cards_moving()
-
-            if len(moving) == 0:
-                for pile in f_piles:
-                    self.perform_move(self.piles["stock"], pile, 1)
-                    pile.top_card.set_face_down()
-
-            # Add a card from stock to the briscola pile and set it face up
-            self.perform_move(self.piles["stock"], self.piles["briscola"], 1)
-            self.piles["briscola"].top_card.set_face_up()
-
-            # Extracts briscola card and suit data
-            briscola_card = self.piles['briscola'].top_card
-            self.briscola_suit = briscola_card.suit if briscola_card else None
+            # The cards the engine dealt slide from the stock to the hands and the briscola pile
+            lay_out(self.engine, self.piles, self.cards, now = False)
+            pyxel.play(0, 0)
+            self.briscola_suit = self.engine.briscola_suit
                 
             self.game_status = "play"
 
@@ -456,31 +553,27 @@ class App:
                     if pile.is_empty == False: pile.top_card.set_face_down()
 
             # If '1' is pressed on the keyboard, the faces of player 0's cards are shown
-            if pyxel.btnp(Buttons['pl0_cards_face_switch']) and (self.first_mover == 0 or not self.piles['foundation1'].is_empty):
+            if pyxel.btnp(self.buttons['pl0_cards_face_switch']) and self.ai_player != 0 and (self.first_mover == 0 or not self.piles['foundation1'].is_empty):
                 target_piles = ['pl0_1', 'pl0_2', 'pl0_3']
                 f_piles = [self.piles[pile_id] for pile_id in target_piles]
                 for pile in f_piles:
                     if pile.is_empty == False: pile.top_card.set_face_up()
             
             # If '2' is pressed on the keyboard, the faces of player 1's cards are shown
-            if pyxel.btnp(Buttons['pl1_cards_face_switch']) and (self.first_mover == 1 or not self.piles['foundation0'].is_empty):
+            if pyxel.btnp(self.buttons['pl1_cards_face_switch']) and self.ai_player != 1 and (self.first_mover == 1 or not self.piles['foundation0'].is_empty):
                 target_piles = ['pl1_1', 'pl1_2', 'pl1_3']
                 f_piles = [self.piles[pile_id] for pile_id in target_piles]
                 for pile in f_piles:
                     if pile.is_empty == False: pile.top_card.set_face_up()
 
-            # Defines who has the mover advantage
-            if self.piles['foundation0'].is_empty and not self.piles['foundation1'].is_empty:
-                self.mover_advantage = 1
-            else: self.mover_advantage = 0
-
             # Left Mouse draws and places
             if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
                 click_time = perf_counter()
                 self.on_click(*self.get_cursor_pos(), pyxel.btn(pyxel.KEY_SHIFT) or click_time - self.last_click_time < 0.5)
                 self.last_click_time = click_time
 
-            if pyxel.btnr(pyxel.MOUSE_BUTTON_LEFT): map(lambda p: p.position_cards(), self.piles.values())
+            if pyxel.btnr(pyxel.MOUSE_BUTTON_LEFT):
+                for pile in self.piles.values(): pile.dirty = True
 
             # Release movement 
             if self.config["drag_and_drop"]:
@@ -507,17 +600,17 @@ class App:
 
                 self.reset_move()
 
+            # The bot's card, once its worker has found it
+            if self.ai: self.update_ai()
+
             # Cards in hand
             if self.next_move.source and self.next_move.amount > 0: 
                 self.next_move.source.position_cards(*self.get_offset_cursor(), self.next_move.amount, now = True)
             if not self.piles["foundation0"].is_empty and not self.piles["foundation1"].is_empty: 
                 self.game_status = "foudations_ready"
        
-        # WINNER IS DECIDED (GAME LOGIC)
+        # WINNER IS DECIDED, the engine did it when the second card was played (perform_move)
         elif self.game_status == "foudations_ready":
-            
-            pile_data = self.extract_pile_data()
-            self.determine_winning_turn(pile_data)
             self.game_status = 'pause'
         
         # GAME IS PAUSED 
@@ -528,67 +621,35 @@ class App:
         # CARDS GET REDISTRIBUTED TO THE WINNER AND PLAYERS GET NEW HAND
         elif self.game_status == "new_hand":
 
-            # Redistributes the cards to the winner
-            target_deck = self.piles['deck1'] if self.win_turn == 1 else self.piles['deck0']
-            self.first_mover = self.win_turn
-        
-            while not self.piles['foundation0'].is_empty:
-                card = self.piles['foundation0'].draw(1)  
-                target_deck.add(card) 
+            # The trick goes to the winner's deck and the hands are refilled, as the engine already did
+            lay_out(self.engine, self.piles, self.cards, now = False)
+            self.first_mover = self.engine.leader
 
-            while not self.piles['foundation1'].is_empty:
-                card = self.piles['foundation1'].draw(1)  
-                target_deck.add(card)
-                    
-            if target_deck.top_card: target_deck.top_card.set_face_down()
-
-            # Refills the specified piles from the source pile
-            def refill_pile(piles, source_pile, pile_names):
-                for pile_name in pile_names:
-                    if piles[pile_name].is_empty:
-                        card = source_pile.draw(1)
-                        piles[pile_name].add(card)
-                        if piles[pile_name].top_card: piles[pile_name].top_card.set_face_down()
-
-            # List of pile names to be checked
-            pl0_piles = ["pl0_1", "pl0_2", "pl0_3"]
-            pl1_piles = ["pl1_1", "pl1_2", "pl1_3"]
-
-            # Refilling logic
-            if len(self.piles['stock'].cards) > 1: refill_pile(self.piles, self.piles['stock'], pl0_piles + pl1_piles)
-
-            elif len(self.piles['stock'].cards) == 1 and not self.piles['briscola'].is_empty:
-                if not self.piles['stock'].is_empty:
-                    if self.win_turn == 0:
-                        refill_pile(self.piles, self.piles['stock'], pl0_piles)
-                        refill_pile(self.piles, self.piles['briscola'], pl1_piles)
-                    else:
-                        refill_pile(self.piles, self.piles['stock'], pl1_piles)
-                        refill_pile(self.piles, self.piles['briscola'], pl0_piles)
-
-            # Defining the loop such that rounds repeat       
-            if all(self.piles[pile].is_empty for pile in self.piles if pile.startswith("pl")): self.game_status = "win"
-            
+            # Defining the loop such that rounds repeat
+            if self.engine.is_terminal(): self.game_status = "win"
             else: self.game_status = "play"
         
         # SETTING GAME STATUS TO WIN 
-        elif self.game_status == "win": pass                            
+        elif self.game_status == "win":
+            if self.show_analysis and not self.analyzer.finished: self.analyzer.poll()
+        split('update ' + status)
       
-        for card in self.cards: card.update() # Update cards and same with piles
-        for pile in self.piles.values(): pile.position_cards()
+        # Only animating cards and piles whose cards changed are updated, idle frames do nothing here
+        for card in tuple(self.moving_cards): card.update()
+        split('update cards')
+        for pile in self.piles.values():
+            if pile.dirty: pile.position_cards()
+        split('update piles')
 
     # Executes the rendering of the game (draws game elements)
     def render(self):
+        split = self.frame_timer.split
         stock = self.piles["stock"]
 
-        pyxel.cls(12)  # Background color
-
-        # Render stock pile's unique slot
-        if len(stock) == 0: pyxel.blt(stock.x, stock.y, 0, 32, 0, CARD_WIDTH, CARD_HEIGHT, 14)
-
-        # Render pile slots
-        for pile in self.piles.values():
-            if pile.render_slot: pyxel.blt(pile.x, pile.y, 0, 16, 0, CARD_WIDTH, CARD_HEIGHT, 14)
+        # Background color and pile slots, cached in an image bank and redrawn only when the stock runs out
+        self.background.refresh(len(stock) == 0, self.draw_background)
+        self.background.blt()
+        split('render background')
 
         # Render piles and cards
         for pile in self.piles.values():
@@ -596,30 +657,99 @@ class App:
 
         # Render currently selected pile
         if self.next_move.source != None: self.next_move.source.render()
+        split('render piles')
 
         # Render moving cards on top of the rest
         moving = self.get_cards_moving()
 
         for card in moving: card.render()
+        split('render moving')
+
+        show_turn = self.win_turn != 5 and self.game_status == 'pause'
+        if show_turn:
+            self.pause = True
+
+            # Turns downwards the faces of all of the player's cards so while the text is shown players can't turn their cards' faces upwards
+            target_piles = ['pl0_1', 'pl0_2', 'pl0_3', 'pl1_1', 'pl1_2', 'pl1_3']
+            f_piles = [self.piles[pile_id] for pile_id in target_piles]
+            for pile in f_piles:
+                if pile.is_empty == False: pile.top_card.set_face_down()
+
+            if self.end_round == True: self.pause = False
+
+        elif self.next_move.source: self.next_move.source.render()
+
+        # Winner and turn panels, footer and rules, cached like the background and redrawn only when one of them changes
+        winner = (self.overall_winner(), *self.engine.scores) if self.game_status == "win" else None
+        replay = f"Replay {self.replay_move}/{len(self.replay)}  [<] [>]" if self.replay else None
+        tracker = self.tracker
+        cards_left = f"Left: {tracker.points_in_play} pts  Trumps: {tracker.trump_names() or '-'}" if self.show_cards_left else None
+        analysis = self.analyzer.lines if self.show_analysis else None
+        key = (winner, self.win_turn if show_turn else None, self.show_game_rules, self.show_briscola_rules, replay, cards_left, analysis)
+        self.overlay.refresh(key, self.draw_overlay)
+        self.overlay.blt()
+        split('render overlay')
+
+        if self.show_profiler:
+            self.draw_profiler()
+            split('render profiler')
+
+
+    # Draws the frame profiler in the top left corner: p50, p95 and p99 of every phase over the last frames, in ms
+    def draw_profiler(self):
+        timer = self.frame_timer
+        if not self.profiler_lines or timer.frames % PROFILER_REFRESH == 0:
+            lines = ["ms          p50   p95   p99"]
+            for phase in sorted(timer.samples, key = lambda phase: (phase != 'frame', phase)):  # frame, render and its phases, update and its phases
+                label = phase if ' ' not in phase else ' ' + phase.split(' ', 1)[1]
+                p50, p95, p99 = timer.percentiles(phase)
+                lines.append(f"{label[:11]:11s}{p50 * 1e3:6.2f}{p95 * 1e3:6.2f}{p99 * 1e3:6.2f}")
+            self.profiler_lines = lines
+
+        pyxel.rect(0, 0, 30 * 4 + 4, len(self.profiler_lines) * 6 + 3, pyxel.COLOR_BLACK)
+        for i, line in enumerate(self.profiler_lines): pyxel.text(2, 2 + i * 6, line, pyxel.COLOR_WHITE if i else pyxel.COLOR_YELLOW)
+
+
+    # Draws the table into the background layer
+    def draw_background(self, target, stock_empty):
+        stock = self.piles["stock"]
+
+        target.cls(12)  # Background color
+
+        # Render stock pile's unique slot
+        if stock_empty: target.blt(stock.x, stock.y, 0, 32, 0, CARD_WIDTH, CARD_HEIGHT, 14)
+
+        # Render pile slots
+        for pile in self.piles.values():
+            if pile.render_slot: target.blt(pile.x, pile.y, 0, 16, 0, CARD_WIDTH, CARD_HEIGHT, 14)
+
+
+    # Draws the text panels into the overlay layer, in the order they stack on screen, returns the regions drawn in
+    def draw_overlay(self, target, key):
+        winner, win_turn, show_game_rules, show_briscola_rules, replay, cards_left, analysis = key
+        top = pyxel.height - 7  # Highest row used, the footer is always there
+
+        # Position of the replay, above the table
+        if replay != None:
+            self.drop_text(2, 1, replay, 7, target=target)
+            top = 1
+
+        # Points and trumps still to be played, under the replay if there is one
+        if cards_left != None:
+            self.drop_text(2, 1 if replay == None else 8, cards_left, 7, target=target)
+            top = 1
 
         # Renders who won the game
-        if self.game_status == "win":  
+        if winner != None:
             screen_width = pyxel.width
             screen_height = pyxel.height
 
             # If it's not a tie 
-            if self.overall_winner() != 5:
-                text1 = f"Player {self.overall_winner()+1} won!"
-                pl0_points = sum(card.points for card in self.piles['deck0'].cards)
-                pl1_points = sum(card.points for card in self.piles['deck1'].cards)
-                text2 = f"Player 1 points: {pl0_points}"
-                text3 = f"Player 2 points: {pl1_points}"
-            else:
-                text1 = "It's a tie!"
-                pl0_points = sum(card.points for card in self.piles['deck0'].cards)
-                pl1_points = sum(card.points for card in self.piles['deck1'].cards)
-                text2 = f"Player 1 points: {pl0_points}"
-                text3 = f"Player 2 points: {pl1_points}"
+            overall_winner, pl0_points, pl1_points = winner
+            if overall_winner != 5: text1 = f"Player {overall_winner+1} won!"
+            else: text1 = "It's a tie!"
+            text2 = f"Player 1 points: {pl0_points}"
+            text3 = f"Player 2 points: {pl1_points}"
 
             # Text specificities
             max_text_width = max(len(text2), len(text3)) * 4  
@@ -632,23 +762,22 @@ class App:
 
             rect_x = (screen_width - rect_width) // 2
             rect_y = (screen_height - rect_height) // 2
+            top = min(top, rect_y)
 
-            pyxel.rect(rect_x, rect_y, rect_width, rect_height, pyxel.COLOR_NAVY)
+            target.rect(rect_x, rect_y, rect_width, rect_height, pyxel.COLOR_NAVY)
 
             text1_x = rect_x + (rect_width - text1_width) // 2  
             text_y = rect_y + padding  
 
-            self.drop_text(text1_x, text_y, text1, 7)  
-            self.drop_text(rect_x + padding, text_y + line_height + padding, text2, 7)  
-            self.drop_text(rect_x + padding, text_y + 2 * (line_height + padding), text3, 7)
+            self.drop_text(text1_x, text_y, text1, 7, target=target)  
+            self.drop_text(rect_x + padding, text_y + line_height + padding, text2, 7, target=target)  
+            self.drop_text(rect_x + padding, text_y + 2 * (line_height + padding), text3, 7, target=target)
 
         # Render text that says which player won the turn
-        if self.win_turn != 5 and self.game_status == 'pause':
-            self.pause = True
+        if win_turn != None:
             screen_width = pyxel.width
-            screen_height = pyxel.height
 
-            text1 = f"Player {self.win_turn+1} won the turn!"
+            text1 = f"Player {win_turn+1} won the turn!"
 
             text1_width = len(text1) * 4
             line_height = 6
@@ -659,76 +788,68 @@ class App:
 
             rect_x = (screen_width - rect_width) // 2
             rect_y = 121
+            top = min(top, rect_y)
 
-            pyxel.rect(rect_x, rect_y, rect_width, rect_height, pyxel.COLOR_NAVY)
+            target.rect(rect_x, rect_y, rect_width, rect_height, pyxel.COLOR_NAVY)
 
             text1_x = rect_x + (rect_width - text1_width) // 2
             text_y = 121 + padding
 
-            self.drop_text(text1_x, text_y, text1, 7)
-            
-            # Turns downwards the faces of all of the player's cards so while the text is shown players can't turn their cards' faces upwards
-            target_piles = ['pl0_1', 'pl0_2', 'pl0_3', 'pl1_1', 'pl1_2', 'pl1_3']
-            f_piles = [self.piles[pile_id] for pile_id in target_piles]
-            for pile in f_piles:
-                if pile.is_empty == False: pile.top_card.set_face_down()
-
-            if self.end_round == True: self.pause = False
- 
-        else:
-            if not self.next_move.source:
-                pile = self.get_pile_at(*self.get_cursor_pos())
-                card = self.get_card_at(*self.get_cursor_pos())
-
-            else: self.next_move.source.render()
+            self.drop_text(text1_x, text_y, text1, 7, target=target)
 
         # Display game rules and briscola rules
         s = "  [G] Game Rules    [B] Briscola Rules"
-        self.drop_text(2, pyxel.height - 7, s, 7)
+        self.drop_text(2, pyxel.height - 7, s, 7, target=target)
 
-        if self.show_game_rules: 
-            pyxel.rect(2, 4, 156, 136, pyxel.COLOR_NAVY)
-
-            s = """Game Rules:
-
--1: Flips Player 1's cards
-    making them play first
--2: Flips Player 2's cards
-    making them play first
--R  Ends the current round/trick
--N  Starts a new game
-
-Either double click on a card to
-'quick-play' it or drag and drop
-it to the desired location.
-"""
-            self.drop_text(8, 8, s)
+        if show_game_rules: 
+            target.rect(2, 4, 156, 136, pyxel.COLOR_NAVY)
+            self.drop_text(8, 8, GAME_RULES, target=target)
         
-        if self.show_briscola_rules: 
-            pyxel.rect(2, 4, 156, 136, pyxel.COLOR_NAVY)
-
-            s = """Briscola Rules:
-
--Goal: Score more than 60 points
-by collecting high-value cards.
--Card Values:
-Ace: 11; 3: 10; King: 4; Queen: 3;
-Jack: 2
--Gameplay:
-*Each player gets 3 cards
-*The top deck card determines the 
- Briscola suit
-*Players play one card per turn
-*Highest Briscola card wins the trick
-*If no Briscola cards, highest 
- leading suit card wins.
-*Trick winner takes cards and leads
- the next trick.
-"""
-            self.drop_text(8, 8, s)
-
-def main():  # Starts the game
-    App()
+        if show_briscola_rules: 
+            target.rect(2, 4, 156, 136, pyxel.COLOR_NAVY)
+            self.drop_text(8, 8, BRISCOLA_RULES, target=target)
+
+        # Post-game analysis, moves that lost a blunder's worth of points end with ??
+        if analysis != None:
+            target.rect(2, 4, 156, 136, pyxel.COLOR_NAVY)
+            for i, line in enumerate(analysis): self.drop_text(6, 8 + i * 7 + (4 if i > 2 else 0), line, 7 if i != 3 else 6, target=target)
+
+        # The rules and analysis panels hide everything above the footer's last rows and need no color key
+        if show_game_rules or show_briscola_rules or analysis != None: return [(2, 4, 156, 136, True), (0, 140, pyxel.width, pyxel.height - 140, False)]
+        return [(0, top, pyxel.width, pyxel.height - top, False)]
+
+
+def main():  # Starts the game, a bot tournament (python briscola.py tournament ...), the table server (python briscola.py server ...), merges statistics (python briscola.py stats ...) or generates the endgame tablebase (python briscola.py tablebase ...)
+    if len(sys.argv) > 1 and sys.argv[1] == 'tournament':
+        from game import tournament
+        tournament.main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'server':
+        from game import server
+        server.main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'stats':
+        from game import stats
+        stats.main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'tablebase':
+        from game import tablebase
+        tablebase.main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(prog="briscola.py", description="Mini-Briscola")
+    parser.add_argument("--record", metavar="PATH", help="append every game played to a binary record file (game/records.py)")
+    parser.add_argument("--replay", metavar="PATH", help="open a game of a record file and scrub through it with the arrow keys")
+    parser.add_argument("--game", type=int, default=0, help="which game of the --replay file to open (default: the first)")
+    parser.add_argument("--profile", metavar="PATH", help="time every frame by phase and write the times to PATH on exit (JSON if it ends in .json, CSV otherwise)")
+    parser.add_argument("--ai", type=int, nargs="?", const=2, choices=(1, 2), metavar="PLAYER", help="play against the computer, which plays PLAYER (default: 2)")
+    parser.add_argument("--ai-ms", type=int, default=BUDGET_MS, help=f"the computer's thinking time per card in ms (default: {BUDGET_MS})")
+    args = parser.parse_args()
+
+    replay = None
+    if args.replay:
+        with RecordReader(args.replay) as games: replay = Replay.from_record(games[args.game])
+    App(record_path = args.record, replay = replay, profile_path = args.profile, ai_player = args.ai - 1 if args.ai else None, ai_budget_ms = args.ai_ms)
 
 if __name__ == '__main__':  # Runs the game
     main()
@@ -0,0 +1,85 @@
+from multiprocessing import get_context
+from queue import Empty
+import os
+
+from game import tablebase
+from game.bitboard import BitState
+from game.consts import BUDGET_MS
+from game.engine import GameState, NO_CARD
+from game.mcts import MctsPlayer
+
+# Bot opponent for the GUI: the ISMCTS search (game/mcts.py) runs in a worker process so the frame loop never waits
+# for it, even on one core (the worker runs at a lower priority) and without sharing the GIL with pyxel's loop.
+# think(game) hands the worker a copy of the position and returns at once, poll() returns the card once the budget
+# is spent (the best card found so far) and cancel() drops a search nobody wants anymore, e.g. on a new game.
+# Requests are numbered: the worker stops a search as soon as its number is cancelled and stale answers are dropped.
+# In the last three tricks both hands are known, the worker answers at once with the exact card from the endgame
+# tablebase (game/tablebase.py) if it was generated
+
+
+NICE = 10  # Worker priority below the GUI's, where the OS supports it
+
+
+def work(requests, answers, cancelled):  # Worker process: one search per request until it gets None
+    if hasattr(os, "nice"): os.nice(NICE)
+    player = MctsPlayer(budget_ms=BUDGET_MS)  # Positions arrive as copies, its tree is reused when one follows the last
+    while True:
+        request = requests.get()
+        if request is None: return
+        ticket, state, budget_ms = request
+        if cancelled.value >= ticket: continue
+
+        table = tablebase.load() if not state.stock and state.briscola == NO_CARD else None
+        if table is not None:
+            answers.put((ticket, table.solve(BitState.from_game(state))[1], 0, 0.0))
+            continue
+
+        player.budget_ms = budget_ms
+        card = player.choose(state, stop=lambda: cancelled.value >= ticket)
+        answers.put((ticket, card, player.last_iterations, player.last_elapsed))
+
+
+class AiWorker:
+    def __init__(self, budget_ms=BUDGET_MS) -> None:
+        self.budget_ms = budget_ms
+        context = get_context("spawn")  # Nothing of the GUI process (pyxel, SDL) is inherited
+        self.requests = context.Queue()
+        self.answers = context.Queue()
+        self.cancelled = context.RawValue('q', 0)  # Highest request number cancelled or answered
+        self.ticket = 0  # Number of the last request
+        self.last_iterations = 0  # Search of the last card answered
+        self.last_elapsed = 0.0
+        self.process = context.Process(target=work, args=(self.requests, self.answers, self.cancelled), daemon=True)
+        self.process.start()
+
+    @property
+    def thinking(self) -> bool:  # A request is waiting for its answer
+        return self.ticket > self.cancelled.value
+
+    def think(self, game: GameState):
+        """Starts a search for game.to_move's card, cancelling the one still running if any."""
+        self.cancel()
+        self.ticket += 1
+        self.requests.put((self.ticket, game.copy(), self.budget_ms))
+
+    def poll(self):  # The card for the last think() once the worker has it, else None. Never blocks
+        while True:
+            try: ticket, card, iterations, elapsed = self.answers.get_nowait()
+            except Empty:
+                if not self.process.is_alive(): raise RuntimeError("the bot's worker process exited")  # Rather than waiting forever
+                return None
+            if ticket != self.ticket or not self.thinking: continue  # Answer to a cancelled request
+            self.cancelled.value = ticket
+            self.last_iterations = iterations
+            self.last_elapsed = elapsed
+            return card
+
+    def cancel(self):
+        self.cancelled.value = self.ticket
+
+    def close(self):
+        if not self.process.is_alive(): return
+        self.cancel()
+        self.requests.put(None)
+        self.process.join(1)
+        if self.process.is_alive(): self.process.terminate()
@@ -0,0 +1,156 @@
+from multiprocessing import get_context
+from queue import SimpleQueue, Empty
+import os
+import random
+
+from game import tablebase
+from game.ai import NICE
+from game.bitboard import BitState
+from game.endgame import EndgameSolver
+from game.engine import GameState, NO_CARD
+from game.enums import Suit
+from game.mcts import MctsPlayer
+from game.tracker import RANK_NAMES
+
+# Post-game analysis: every card of a finished game is scored against the other cards the player could have played,
+# from what that player knew (their hand, the briscola and the cards played so far). Values are the mover's expected
+# points at the end of the game: exact once the stock is empty (both hands are known then, game/tablebase.py if it was
+# generated, else game/endgame.py) and ISMCTS estimates before (game/mcts.py, random playouts). The positions are
+# independent, so they are spread over a process pool and the results come back one by one while the GUI keeps
+# running, cached by what the mover knew
+
+
+ITERATIONS = 3000  # ISMCTS iterations per position
+BLUNDER = 10  # Points lost against the best card that make a move a blunder
+SUIT_NAMES = tuple(suit.name[:2] for suit in Suit)[:4]
+
+
+def card_name(card) -> str:  # e.g. "KSw" for the King of Swords
+    return RANK_NAMES[card % 10] + SUIT_NAMES[card // 10]
+
+
+def position_key(state: GameState) -> tuple:  # What the mover knows: the briscola card, every card played in order and their hand
+    return (state.deck[-7], tuple(state.history), tuple(sorted(card for card in state.hands[state.to_move] if card != NO_CARD)))
+
+
+def evaluate(state: GameState, iterations=ITERATIONS) -> dict:
+    """Mover's expected points at the end of the game for every card they can play."""
+    mover = state.to_move
+    bit_state = BitState.from_game(state)
+    values = {}
+    if bit_state.stock_len == 0 and bit_state.briscola == NO_CARD:  # Nothing hidden anymore, solved exactly
+        solver = tablebase.load() or EndgameSolver()  # Same values, the tablebase only reads them
+        for card in state.legal_moves():
+            after = bit_state.copy()
+            after.play(card)
+            final0 = after.score0 + (solver.solve(after)[0] if not after.is_terminal() else 0)
+            values[card] = final0 if mover == 0 else 120 - final0
+        return values
+
+    player = MctsPlayer(iterations=iterations, rng=random.Random(f"analysis:{position_key(state)}"))
+    player.choose(state)
+    for card, node in player.root.children.items(): values[card] = node.reward / node.visits * 120
+    return values
+
+
+def lower_priority():  # Pool initializer, the GUI's frames come first
+    if hasattr(os, "nice"): os.nice(NICE)
+
+
+def evaluate_job(job) -> tuple:  # Pool worker: (key, state, iterations) -> (key, values)
+    key, state, iterations = job
+    return key, evaluate(state, iterations)
+
+
+class Move:  # One card of the analyzed game
+    __slots__ = ("number", "player", "card", "key", "values")
+
+    def __init__(self, number, player, card, key) -> None:
+        self.number = number  # Cards played before it
+        self.player = player
+        self.card = card
+        self.key = key
+        self.values = None  # Card -> expected points, None until the result is in
+
+    @property
+    def best(self) -> int:
+        return max(self.values, key=self.values.__getitem__)
+
+    @property
+    def loss(self) -> float:  # Expected points given away against the best card
+        return self.values[self.best] - self.values[self.card]
+
+
+class Analyzer:
+    """Analyzes finished games on a process pool started on first use, one game at a time. start() sends the
+    positions that aren't cached, poll() picks up the results that came back, never blocking."""
+
+    def __init__(self, workers=None, iterations=ITERATIONS) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.iterations = iterations
+        self.pool = None
+        self.cache = {}  # position_key -> values, kept across games
+        self.answers = SimpleQueue()  # (key, values) or an exception, filled by the pool's result thread
+        self.moves = []  # Moves of the game being analyzed
+        self.waiting = {}  # position_key -> moves waiting for it
+        self.lines = ()  # Summary for the overlay, rebuilt when results come in
+
+    @property
+    def done(self) -> int:
+        return len(self.moves) - sum(len(moves) for moves in self.waiting.values())
+
+    @property
+    def finished(self) -> bool:
+        return not self.waiting
+
+    def start(self, deck, history):
+        """Analyzes the game dealt from `deck` in which `history` was played."""
+        self.moves = []
+        self.waiting = {}
+        state = GameState()
+        state.deal_deck(list(deck))
+        for number, card in enumerate(history):
+            move = Move(number, state.to_move, card, position_key(state))
+            self.moves.append(move)
+            moves = state.legal_moves()
+            if len(moves) == 1: move.values = {card: 0.0}  # Nothing to choose, the last trick
+            elif move.key in self.cache: move.values = self.cache[move.key]
+            elif move.key in self.waiting: self.waiting[move.key].append(move)
+            else:
+                self.waiting[move.key] = [move]
+                if self.pool is None: self.pool = get_context("spawn").Pool(self.workers, lower_priority)  # Nothing of the GUI process is inherited
+                self.pool.apply_async(evaluate_job, ((move.key, state.copy(), self.iterations),), callback=self.answers.put, error_callback=self.answers.put)
+            state.play(card)
+        self.lines = self.summary()
+
+    def poll(self) -> bool:  # Takes in the results that came back, True if there were any
+        new = False
+        while True:
+            try: answer = self.answers.get_nowait()
+            except Empty: break
+            if isinstance(answer, BaseException): raise answer  # A position failed in the pool, it would wait forever
+            key, values = answer
+            self.cache[key] = values
+            for move in self.waiting.pop(key, ()): move.values = values  # Results of an earlier game only fill the cache
+            new = True
+        if new: self.lines = self.summary()
+        return new
+
+    def summary(self, rows=13) -> tuple:  # 13 rows fill the GUI's panel
+        """Text of the analysis: progress, points lost and blunders per player, then the costliest moves in game order."""
+        scored = [move for move in self.moves if move.values is not None]
+        lines = [f"Analysis {self.done}/{len(self.moves)}" + ("" if self.finished else " ...")]
+        for player in (0, 1):
+            played = [move for move in scored if move.player == player]
+            blunders = sum(move.loss >= BLUNDER for move in played)
+            lines.append(f"Player {player + 1}: {sum(move.loss for move in played):5.1f} pts lost, {blunders} blunder" + "s" * (blunders != 1))
+        worst = sorted((move for move in scored if move.loss >= 1), key=lambda move: move.loss, reverse=True)[:rows]
+        if worst: lines.append("Tr Pl Card   Exp Best   Exp  Lost")
+        for move in sorted(worst, key=lambda move: move.number):
+            best = move.best
+            lines.append(f"{move.number // 2 + 1:2d} P{move.player + 1} {card_name(move.card):4s} {move.values[move.card]:5.1f} "
+                         f"{card_name(best):4s} {move.values[best]:5.1f} {move.loss:5.1f}" + (" ??" if move.loss >= BLUNDER else ""))
+        return tuple(lines)
+
+    def close(self):
+        if self.pool is not None: self.pool.terminate()
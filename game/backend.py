@@ -0,0 +1,22 @@
+# Rendering backend: pyxel is imported and started only when the GUI opens, so the rules, the bots, the server and
+# the batch tools import without loading pyxel's native extension. Drawing code reads backend.pyxel once it has started
+
+import os
+
+
+ASSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "assets_italian.pyxres")  # Card sprites in image bank 0, banks 1 and 2 are left for game/layers.py
+
+pyxel = None  # The pyxel module, set by start()
+
+
+def start(width, height, title, fps, assets=ASSETS):
+    """Imports pyxel, opens the window and loads the asset file, returns the pyxel module."""
+    global pyxel
+    import pyxel
+    pyxel.init(width, height, title=title, fps=fps)
+    pyxel.load(assets)
+    return pyxel
+
+
+def is_loaded() -> bool:  # Whether the GUI has started in this process
+    return pyxel is not None
@@ -0,0 +1,210 @@
+import numpy as np
+
+from game.consts import DECK_SIZE, POINTS, SUIT
+from game.deals import random_decks
+from game.tricks import TRICK_WINNER, SUIT_BLOCK
+from game.engine import shuffled_deck, TRICKS_PER_GAME, TIE
+
+# Vectorized simulator: N games held in NumPy arrays and advanced one trick at a time in lockstep
+# Same deal, rules and refill order as game.engine.GameState, so results can be checked against it
+
+# Arrays are laid out game last, so one hand slot of every game is a contiguous (N,) row
+
+# A policy is any callable policy(sim, hands, lead) -> slots
+#   hands: (3, N) int8 hand of the player to move in every game, -1 for empty slots
+#   lead:  (N,) int8 card already on the table, -1 when the player to move opens the trick
+#   slots: (N,) ints, the hand slot to play in every game, must point to a card
+# Each seat's policy is only asked about the games in which that seat is to move: its `sim` is then a Rows view
+# whose per-game arrays (base, scores, ...) hold those games only. A policy playing both seats is asked once
+
+
+POINTS_ARRAY = np.array(POINTS, dtype=np.int16)
+SUIT_ARRAY = np.array(SUIT, dtype=np.int8)
+WINNER_ARRAY = np.frombuffer(TRICK_WINNER, dtype=np.uint8)
+
+STOCK_SIZE = DECK_SIZE - 7  # Cards left in the stock after the deal
+SLOTS = np.arange(3, dtype=np.int8)[:, None]  # Compared with (N,) slot arrays to get (3, N) masks
+NO_POINTS = 1000  # Point value given to empty slots so they never look cheapest
+ONE = np.uint64(1)
+
+
+# np.where is slow on unpredictable conditions, so choices are made with bit masks that are 0 (false) or -1 (true)
+def full_mask(condition) -> np.ndarray:  # bool array -> int8 array of 0 / -1
+    return -condition.view(np.int8)
+
+
+def select(mask, a, b, out=None) -> np.ndarray:  # a where mask is -1, b where it is 0, written into out if given (out may be a, not b)
+    if out is None: return b ^ ((a ^ b) & mask)
+    np.bitwise_xor(a, b, out=out)
+    out &= mask
+    out ^= b
+    return out
+
+
+def argmin3(values) -> np.ndarray:  # Same as values.argmin(axis=0) for (3, N) arrays, lowest slot wins ties
+    lowest = np.minimum(values[0], values[1])
+    slot = (values[1] < values[0]).view(np.int8)
+    return select(full_mask(values[2] < lowest), 2, slot).astype(np.int8)
+
+
+def random_stocks(n, rng: np.random.Generator) -> np.ndarray:
+    """n shuffled decks (game.deals.random_decks) laid out like BatchSim.stock, one deck per column."""
+    return np.ascontiguousarray(random_decks(n, rng).T).view(np.int8)
+
+
+def seeded_decks(seeds) -> np.ndarray:
+    """Decks in the exact order GameState.deal(seed) uses, slow (one Python shuffle each), meant for cross-checks."""
+    return np.array([shuffled_deck(seed) for seed in seeds], dtype=np.uint8)
+
+
+def pick_slot(valid, k) -> np.ndarray:
+    """Slot of the k-th (from 0) card in every game, valid is the (3, N) int8 array of 1 for cards and 0 for empty slots."""
+    count0 = valid[0]
+    count1 = count0 + valid[1]
+    return (count0 <= k).view(np.int8) + (count1 <= k).view(np.int8)
+
+
+def random_policy(rng: np.random.Generator):  # Plays a uniformly random card
+    def policy(sim, hands, lead):
+        valid = (hands >= 0).view(np.int8)
+        count = (valid[0] + valid[1] + valid[2]).astype(np.uint32)
+        n = count.shape[0]
+        k = (rng.bit_generator.random_raw((n + 3) // 4).view(np.uint16)[:n] * count) >> 16
+        return pick_slot(valid, k.astype(np.int8))
+    return policy
+
+
+def first_card_policy(sim, hands, lead):  # Plays the first card in slot order, like GameState.legal_moves()[0]
+    return pick_slot((hands >= 0).view(np.int8), 0)
+
+
+def greedy_policy(sim, hands, lead):
+    """Leads its lowest point card, follows by taking the trick with its cheapest winning card or throwing its lowest point card."""
+    valid = full_mask(hands >= 0)
+    cards = (hands & valid).astype(np.int32)
+    points = select(valid.astype(np.int16), np.take(POINTS_ARRAY, cards), NO_POINTS)
+
+    # A card wins if it is played after the lead with the leader in seat 0 and the table says seat 1 takes it
+    following = full_mask(lead >= 0)
+    lead_card = (lead & following).astype(np.int32)
+    wins = full_mask(np.take(WINNER_ARRAY, sim.base + lead_card * DECK_SIZE + cards) == 1) & valid & following
+
+    cheapest_win = argmin3(select(wins.astype(np.int16), points, NO_POINTS))
+    cheapest = argmin3(points)
+    return select(wins[0] | wins[1] | wins[2], cheapest_win, cheapest)
+
+
+class Rows:  # Some of the games of a BatchSim, what a policy gets as `sim` when it only plays part of the batch
+    def __init__(self, sim, rows) -> None:
+        self.sim = sim
+        self.rows = rows  # Indexes of the games
+        self.n = len(rows)
+
+    def __getattr__(self, name):  # Per-game arrays of the sim cut down to the rows, on first use
+        value = getattr(self.sim, name)
+        if isinstance(value, np.ndarray) and value.shape[-1] == self.sim.n: value = value.take(self.rows, axis=-1)
+        setattr(self, name, value)
+        return value
+
+
+class BatchSim:  # N games dealt and played together
+    def __init__(self, n, seed=None, record=False, captures=False) -> None:
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.record = record
+        self.captures = captures
+        self.deal()
+
+    def deal(self, decks: np.ndarray = None):
+        """Deals every game, from the given (N, 40) decks or freshly shuffled ones."""
+        if decks is None: self.stock = random_stocks(self.n, self.rng)
+        else: self.stock = np.ascontiguousarray(np.asarray(decks, dtype=np.uint8).T).view(np.int8)
+
+        # Same deal order as GameState.deal: the top of the stock is the last row
+        # stock is (40, N), stock[i] is the i-th card from the bottom in every game
+        self.hands = np.empty((2, 3, self.n), dtype=np.int8)  # hands[seat, slot] matches pl{seat}_{slot + 1}
+        self.hands[0] = self.stock[[-1, -2, -3]]
+        self.hands[1] = self.stock[[-4, -5, -6]]
+        self.briscola = self.stock[-7].copy()
+        self.briscola_suit = np.take(SUIT_ARRAY, self.briscola)
+        self.base = self.briscola_suit.astype(np.int32) * SUIT_BLOCK
+
+        self.leader = np.zeros(self.n, dtype=np.int8)
+        self.no_lead = np.full(self.n, -1, dtype=np.int8)
+        self.scores = np.zeros((2, self.n), dtype=np.int16)  # scores[seat]
+        self.stock_len = STOCK_SIZE
+        self.tricks = 0
+        self.plays = np.full((DECK_SIZE, self.n), -1, dtype=np.int8) if self.record else None  # plays[i] is the i-th card played
+        self.captured0 = np.zeros(self.n, dtype=np.uint64) if self.captures else None  # Cards seat 0 took, as 40 bit masks
+
+    def is_terminal(self) -> bool:
+        return self.tricks == TRICKS_PER_GAME
+
+    def _move(self, policies, movers, lead, seat_rows):
+        """Asks each seat's policy about the games it moves in and takes the cards out of the hands. movers is the
+        (2, 1, N) mask of the games where seat 0 / seat 1 is to move, seat_rows their indexes (None if one policy plays both)."""
+        hands = select(movers[0], self.hands[0], self.hands[1])
+        if seat_rows is None: slots = policies[0](self, hands, lead)
+        else:
+            slots = np.empty(self.n, dtype=np.int8)
+            for policy, rows in zip(policies, seat_rows):
+                if len(rows): slots[rows] = policy(Rows(self, rows), hands.take(rows, axis=1), lead.take(rows))
+        picked = full_mask(SLOTS == slots)
+        played = hands & picked
+        cards = played[0] | played[1] | played[2]
+        if (cards < 0).any(): raise ValueError("a policy picked an empty hand slot")
+        self.hands |= picked & movers  # -1 in the played slot
+        return cards
+
+    def play_trick(self, policies):
+        """Plays one trick in every game, policies is a (seat 0 policy, seat 1 policy) pair."""
+        leaders = np.empty((2, 1, self.n), dtype=np.int8)  # -1 in the games seat 0 / seat 1 leads
+        np.subtract(self.leader, 1, out=leaders[0, 0])
+        np.negative(self.leader, out=leaders[1, 0])
+        if policies[0] is policies[1]: led_by = follow_rows = None
+        else:
+            led_by = (np.nonzero(leaders[0, 0].view(np.bool_))[0], np.nonzero(self.leader.view(np.bool_))[0])
+            follow_rows = led_by[::-1]
+
+        lead = self._move(policies, leaders, self.no_lead, led_by)
+        follow = self._move(policies, leaders[::-1], lead, follow_rows)
+
+        # The table read as if seat 0 led gives 1 when the card that follows takes the trick
+        follow_wins = np.take(WINNER_ARRAY, self.base + lead.astype(np.int32) * DECK_SIZE + follow).view(np.int8)
+        winner = self.leader ^ follow_wins
+        seat0_wins = winner - 1
+
+        if self.record:
+            self.plays[2 * self.tricks] = lead
+            self.plays[2 * self.tricks + 1] = follow
+        if self.captures:
+            trick = np.left_shift(ONE, lead.astype(np.uint64)) | np.left_shift(ONE, follow.astype(np.uint64))
+            self.captured0 |= trick & seat0_wins.astype(np.int64).view(np.uint64)
+        points = np.take(POINTS_ARRAY, lead) + np.take(POINTS_ARRAY, follow)
+        seat0_points = points & seat0_wins.astype(np.int16)
+        self.scores[0] += seat0_points
+        self.scores[1] += points - seat0_points
+
+        # Refill into the slot each player just emptied, the only empty ones while the stock lasts,
+        # player 0 draws first like App's "new_hand" status
+        n = self.stock_len
+        if n:
+            if n > 1: drawn = self.stock[n - 2:n][::-1]  # Seat 0 draws stock[n - 1], seat 1 stock[n - 2]
+            else:  # Last draw: the winner takes the stock card and the loser the briscola
+                last = self.stock[0]
+                drawn = np.stack((select(seat0_wins, last, self.briscola), select(seat0_wins, self.briscola, last)))
+            self.hands = select(full_mask(self.hands < 0), drawn[:, None], self.hands)
+            self.stock_len = max(n - 2, 0)
+
+        self.leader = winner
+        self.tricks += 1
+        return winner
+
+    def run(self, policies) -> np.ndarray:
+        """Plays every game to the end, returns the (2, N) scores."""
+        while not self.is_terminal(): self.play_trick(policies)
+        return self.scores
+
+    def overall_winner(self) -> np.ndarray:  # Same values as App.overall_winner: 0, 1 or 5 for a tie
+        score1 = self.scores[1]
+        return np.where(score1 > 60, 1, np.where(score1 == 60, TIE, 0)).astype(np.int8)
@@ -0,0 +1,279 @@
+from game.consts import DECK_SIZE, POINTS, SUIT
+from game.tricks import TRICK_WINNER, PAIRS, SUIT_BLOCK
+
+# Compact game state for search: every group of cards is a 40 bit int, bit n set means card n (suit * 10 + rank) is in it
+
+
+NO_CARD = -1
+FULL_MASK = (1 << DECK_SIZE) - 1
+
+HAND_PILES = (("pl0_1", "pl0_2", "pl0_3"), ("pl1_1", "pl1_2", "pl1_3"))
+
+
+def mask_of(cards) -> int:  # Card numbers to mask
+    mask = 0
+    for card in cards: mask |= 1 << card
+    return mask
+
+
+def cards_of(mask) -> list:  # Mask to card numbers, lowest first
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+
+def random_card(mask, rng) -> int:  # Uniformly random card of a non empty mask
+    for _ in range(int(rng.random() * mask.bit_count())): mask &= mask - 1
+    return (mask & -mask).bit_length() - 1
+
+
+def mask_points(mask) -> int:
+    """Sums the points of the cards in a mask (only used to rebuild scores, play keeps them up to date)."""
+    total = 0
+    while mask:
+        low = mask & -mask
+        total += POINTS[low.bit_length() - 1]
+        mask ^= low
+    return total
+
+
+class BitState:  # Hands, captured decks, stock and seen cards as masks, plus running scores
+    __slots__ = (
+        "hand0", "hand1", "deck0", "deck1", "stock", "seen",
+        "score0", "score1", "f0", "f1",
+        "briscola", "briscola_suit", "order", "stock_len",
+        "leader", "to_move",
+    )
+
+    def __init__(self) -> None:
+        self.hand0 = self.hand1 = 0
+        self.deck0 = self.deck1 = 0  # Captured cards
+        self.stock = 0  # Cards still in the stock, without the briscola card
+        self.seen = 0  # Cards both players have seen: played ones and the face up briscola
+        self.score0 = self.score1 = 0
+        self.f0 = self.f1 = NO_CARD  # Cards on foundation0 and foundation1
+
+        self.briscola = NO_CARD  # Face up card still on the briscola pile
+        self.briscola_suit = 0
+        self.order = b""  # Stock draw order, the top of the stock is order[stock_len - 1]
+        self.stock_len = 0
+
+        self.leader = 0
+        self.to_move = 0
+
+    @classmethod
+    def from_game(cls, game) -> "BitState":
+        """Builds the masks from a game.engine.GameState."""
+        state = cls()
+        state.hand0 = mask_of(c for c in game.hands[0] if c >= 0)
+        state.hand1 = mask_of(c for c in game.hands[1] if c >= 0)
+        state.deck0 = mask_of(game.decks[0])
+        state.deck1 = mask_of(game.decks[1])
+        state.stock = mask_of(game.stock)
+        state.score0, state.score1 = game.scores
+        state.f0, state.f1 = game.foundations
+        state.briscola = game.briscola
+        state.briscola_suit = game.briscola_suit
+        state.order = bytes(game.stock)
+        state.stock_len = len(game.stock)
+        state.leader = game.leader
+        state.to_move = game.to_move
+        state.seen = state.deck0 | state.deck1 | mask_of(c for c in game.foundations if c >= 0)
+        if game.deck: state.seen |= 1 << game.deck[-7]  # The briscola card was shown at the deal
+        return state
+
+    @classmethod
+    def from_piles(cls, piles, briscola_card, leader) -> "BitState":
+        """Builds the masks from App.piles, briscola_card is the card dealt face up and leader opens the current trick."""
+        state = cls()
+        state.hand0 = mask_of(card.index for name in HAND_PILES[0] for card in piles[name].cards)
+        state.hand1 = mask_of(card.index for name in HAND_PILES[1] for card in piles[name].cards)
+        state.deck0 = mask_of(card.index for card in piles['deck0'].cards)
+        state.deck1 = mask_of(card.index for card in piles['deck1'].cards)
+        state.score0 = mask_points(state.deck0)
+        state.score1 = mask_points(state.deck1)
+
+        stock = [card.index for card in piles['stock'].cards]
+        state.stock = mask_of(stock)
+        state.order = bytes(stock)
+        state.stock_len = len(stock)
+
+        f0 = piles['foundation0'].top_card
+        f1 = piles['foundation1'].top_card
+        state.f0 = f0.index if f0 else NO_CARD
+        state.f1 = f1.index if f1 else NO_CARD
+
+        briscola = piles['briscola'].top_card
+        state.briscola = briscola.index if briscola else NO_CARD
+        state.briscola_suit = SUIT[briscola_card]
+        state.seen = state.deck0 | state.deck1 | (1 << briscola_card)
+        if f0: state.seen |= 1 << state.f0
+        if f1: state.seen |= 1 << state.f1
+
+        state.leader = leader
+        if state.f0 == NO_CARD and state.f1 == NO_CARD: state.to_move = leader
+        else: state.to_move = 0 if state.f0 == NO_CARD else 1
+        return state
+
+    def to_piles(self, piles, cards):
+        """Lays the state out on App.piles, cards is App.cards. Hand cards fill the slots lowest card first."""
+        for pile in piles.values(): pile.clear()
+
+        for player, hand in enumerate((self.hand0, self.hand1)):
+            for name, card in zip(HAND_PILES[player], cards_of(hand)):
+                cards[card].set_face_down()
+                piles[name].add([cards[card]])
+
+        for name, deck in (('deck0', self.deck0), ('deck1', self.deck1)):
+            for card in cards_of(deck): cards[card].set_face_down()
+            piles[name].add([cards[card] for card in cards_of(deck)])
+
+        stock = [cards[card] for card in self.order[:self.stock_len]]
+        for card in stock: card.set_face_down()
+        piles['stock'].add(stock)
+
+        for name, card in (('briscola', self.briscola), ('foundation0', self.f0), ('foundation1', self.f1)):
+            if card != NO_CARD:
+                cards[card].set_face_up()
+                piles[name].add([cards[card]])
+
+    def copy(self) -> "BitState":
+        state = BitState.__new__(BitState)
+        state.hand0 = self.hand0
+        state.hand1 = self.hand1
+        state.deck0 = self.deck0
+        state.deck1 = self.deck1
+        state.stock = self.stock
+        state.seen = self.seen
+        state.score0 = self.score0
+        state.score1 = self.score1
+        state.f0 = self.f0
+        state.f1 = self.f1
+        state.briscola = self.briscola
+        state.briscola_suit = self.briscola_suit
+        state.order = self.order  # bytes, shared between copies
+        state.stock_len = self.stock_len
+        state.leader = self.leader
+        state.to_move = self.to_move
+        return state
+
+    def key(self) -> tuple:  # Everything that tells two positions apart, scores follow from the decks, the stock is drawn in order
+        return (self.hand0, self.hand1, self.deck0, self.deck1, self.order[:self.stock_len], self.f0, self.f1, self.briscola, self.leader, self.to_move)
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BitState) and self.key() == other.key()
+
+    def legal_mask(self) -> int:
+        return self.hand0 if self.to_move == 0 else self.hand1
+
+    def legal_moves(self) -> list:
+        return cards_of(self.hand0 if self.to_move == 0 else self.hand1)
+
+    def play(self, card):
+        """Same rules as GameState.play, returns the trick winner once both cards are down, else None."""
+        bit = 1 << card
+        player = self.to_move
+        if player == 0:
+            if not self.hand0 & bit: raise ValueError(f"card {card} is not in player 0's hand")
+            self.hand0 ^= bit
+            self.f0 = card
+        else:
+            if not self.hand1 & bit: raise ValueError(f"card {card} is not in player 1's hand")
+            self.hand1 ^= bit
+            self.f1 = card
+        self.seen |= bit
+
+        if self.f0 == NO_CARD or self.f1 == NO_CARD:  # First card of the trick
+            self.to_move = 1 - player
+            return None
+
+        f0, f1 = self.f0, self.f1
+        winner = TRICK_WINNER[self.briscola_suit * SUIT_BLOCK + self.leader * PAIRS + f0 * DECK_SIZE + f1]
+        if winner == 0:
+            self.deck0 |= (1 << f0) | (1 << f1)
+            self.score0 += POINTS[f0] + POINTS[f1]
+        else:
+            self.deck1 |= (1 << f0) | (1 << f1)
+            self.score1 += POINTS[f0] + POINTS[f1]
+        self.f0 = self.f1 = NO_CARD
+
+        # Refill: player 0 then player 1 from the stock, on the last draw the winner takes the stock and the loser the briscola
+        n = self.stock_len
+        if n > 1:
+            first, second = self.order[n - 1], self.order[n - 2]
+            self.hand0 |= 1 << first
+            self.hand1 |= 1 << second
+            self.stock ^= (1 << first) | (1 << second)
+            self.stock_len = n - 2
+        elif n == 1 and self.briscola != NO_CARD:
+            last = self.order[0]
+            drawn, briscola = (1 << last), (1 << self.briscola)
+            if winner == 0:
+                self.hand0 |= drawn
+                self.hand1 |= briscola
+            else:
+                self.hand1 |= drawn
+                self.hand0 |= briscola
+            self.stock = 0
+            self.stock_len = 0
+            self.briscola = NO_CARD
+
+        self.leader = winner
+        self.to_move = winner
+        return winner
+
+    def rollout(self, rng) -> tuple:
+        """Plays the rest of the game with uniformly random cards, returns the final (score0, score1).
+        Same moves as calling play(random_card(hand, rng)) until the end, but on local variables because
+        search spends most of its time here. Only the scores are kept, the state is left as it was."""
+        hand0, hand1, f0, f1 = self.hand0, self.hand1, self.f0, self.f1
+        score0, score1 = self.score0, self.score1
+        order, n, briscola = self.order, self.stock_len, self.briscola
+        base, leader, to_move = self.briscola_suit * SUIT_BLOCK, self.leader, self.to_move
+        random = rng.random
+
+        while hand0 | hand1:
+            hand = hand0 if to_move == 0 else hand1
+            for _ in range(int(random() * hand.bit_count())): hand &= hand - 1
+            bit = hand & -hand
+            card = bit.bit_length() - 1
+            if to_move == 0:
+                hand0 ^= bit
+                f0 = card
+            else:
+                hand1 ^= bit
+                f1 = card
+            if f0 == NO_CARD or f1 == NO_CARD:
+                to_move = 1 - to_move
+                continue
+
+            winner = TRICK_WINNER[base + leader * PAIRS + f0 * DECK_SIZE + f1]
+            if winner == 0: score0 += POINTS[f0] + POINTS[f1]
+            else: score1 += POINTS[f0] + POINTS[f1]
+            f0 = f1 = NO_CARD
+            if n > 1:
+                hand0 |= 1 << order[n - 1]
+                hand1 |= 1 << order[n - 2]
+                n -= 2
+            elif n == 1 and briscola != NO_CARD:
+                if winner == 0: hand0, hand1 = hand0 | (1 << order[0]), hand1 | (1 << briscola)
+                else: hand0, hand1 = hand0 | (1 << briscola), hand1 | (1 << order[0])
+                n = 0
+                briscola = NO_CARD
+            leader = to_move = winner
+
+        return score0, score1
+
+    def is_terminal(self) -> bool:
+        return not (self.hand0 | self.hand1)
+
+    def overall_winner(self) -> int:  # Same result as App.overall_winner, 5 on a tie
+        if self.score1 > 60: return 1
+        elif self.score1 == 60: return 5
+        else: return 0
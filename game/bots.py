@@ -0,0 +1,58 @@
+import random
+
+from game.bitboard import BitState
+from game.consts import POINTS
+from game.endgame import EndgameSolver
+from game.engine import GameState, NO_CARD, trick_winner
+from game.mcts import MctsPlayer
+
+# Simple bots for the headless engine: bot(state, rng) -> card to play for state.to_move
+
+
+def random_bot(state: GameState, rng: random.Random) -> int:  # Plays a uniformly random card
+    return rng.choice(state.legal_moves())
+
+
+def greedy_bot(state: GameState, rng: random.Random) -> int:
+    """Leads its lowest point card, follows by taking the trick with its cheapest winning card or throwing its lowest point card.
+    Same choices as game.batch.greedy_policy (ties go to the first slot)."""
+    moves = state.legal_moves()
+    lead = state.foundations[1 - state.to_move]
+    if lead != NO_CARD:
+        winning = [card for card in moves if trick_winner(lead, card, state.briscola_suit) == 1]
+        if winning: return min(winning, key=POINTS.__getitem__)
+    return min(moves, key=POINTS.__getitem__)
+
+
+_solver = EndgameSolver()
+_solver_deal = None  # Deck of the game the solver's table was filled in
+
+
+def endgame_bot(state: GameState, rng: random.Random) -> int:
+    """Greedy until the stock and the briscola pile are empty, then both hands are known and it plays the exact best card."""
+    global _solver_deal
+    if state.stock or state.briscola != NO_CARD: return greedy_bot(state, rng)
+
+    # Among equally good cards the pick depends on what is in the table, starting every game empty keeps
+    # tournament results the same however games are spread over processes
+    if state.deck is not _solver_deal:
+        _solver.clear()
+        _solver_deal = state.deck
+    return _solver.solve(BitState.from_game(state))[1]
+
+
+_mcts_players = {}  # One per seat so each keeps its own tree between tricks
+
+
+def mcts_bot(state: GameState, rng: random.Random) -> int:  # ISMCTS with a fixed iteration budget, so tournaments stay reproducible
+    player = _mcts_players.get(state.to_move)
+    if player is None: player = _mcts_players[state.to_move] = MctsPlayer(iterations=300)
+    return player.choose(state, rng)
+
+
+BOTS = {
+    'random': random_bot,
+    'greedy': greedy_bot,
+    'endgame': endgame_bot,
+    'mcts': mcts_bot,
+}
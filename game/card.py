@@ -1,14 +1,15 @@
 from game.enums import Suit
-from game.consts import CARD_HEIGHT, CARD_WIDTH, CARD_DISTANCE_SPLIT
-import pyxel
+from game.consts import CARD_HEIGHT, CARD_WIDTH, CARD_DISTANCE_SPLIT, RANK_POINTS
+from game import backend
 
 
 class Card:
-    def __init__(self, suit, rank, is_face_up=False) -> None:
+    def __init__(self, suit, rank, is_face_up=False, moving=None) -> None:
         self.suit = suit
         self.rank = rank
         self.is_face_up = is_face_up
         self.pile = None
+        self.moving = moving if moving is not None else set()  # Cards still animating, shared by all the cards of a game
 
         self.x = 0
         self.y = 0
@@ -36,17 +37,14 @@ class Card:
     def suit(self, value):
         self._suit = value
 
+    @property  # Same card number the headless engine uses (game/engine.py)
+    def index(self):
+        return self.suit * 10 + self.rank
+
     @property  # to be used to calculate the points within deck0 or deck1
     def points(self):
         """Returns the Briscola point value of the card based on its rank."""
-        point_values = {
-            0: 11,  # Ace
-            2: 10,  # Three
-            7: 2,  # Jack
-            8: 3,  # Queen
-            9: 4,  # King
-        }
-        return point_values.get(self.rank, 0)  # Default to 0 for ranks not in the dictionary
+        return RANK_POINTS[self.rank]
 
     def update(self):  # Updates the card's position
         if self.x != self.target_x:
@@ -57,14 +55,18 @@ class Card:
             dy = (self.target_y - self.y) // CARD_DISTANCE_SPLIT  # Smooths the movement
             self.y = self.y + dy if dy != 0 else self.target_y
 
+        if self.x == self.target_x and self.y == self.target_y: self.moving.discard(self)  # Arrived, stops ticking
+
     def render(self):  # Renders the card
-        pyxel.blt(self.x, self.y, 0, self.u, self.v, CARD_WIDTH, CARD_HEIGHT, 14)
+        backend.pyxel.blt(self.x, self.y, 0, self.u, self.v, CARD_WIDTH, CARD_HEIGHT, 14)
 
     def set_face_up(self):  # Sets the card face up
+        if self.is_face_up: return
         self.is_face_up = True
         self.update_uv()
 
     def set_face_down(self):  # Sets the card face down
+        if not self.is_face_up: return
         self.is_face_up = False
         self.update_uv()
 
@@ -83,5 +85,8 @@ class Card:
             self.x = x
             self.y = y
 
+        if self.x != x or self.y != y: self.moving.add(self)
+        else: self.moving.discard(self)
+
     def is_moving(self) -> bool:
         return self.x != self.target_x and self.y != self.target_y
\ No newline at end of file
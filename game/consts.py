@@ -1,4 +1,15 @@
 CARD_WIDTH = 16  # This is the width of the card
 CARD_HEIGHT = 24  # This is the height of the card
 CARD_SPACING = CARD_HEIGHT // 3  # This is the spacing between cards
-CARD_DISTANCE_SPLIT = 4  # This is the number of frames it takes to move a card from one position to another
\ No newline at end of file
+CARD_DISTANCE_SPLIT = 4  # This is the number of frames it takes to move a card from one position to another
+
+DECK_SIZE = 40  # Four suits of ten cards, the card number is suit * 10 + rank
+RANK_POINTS = (11, 0, 10, 0, 0, 0, 0, 2, 3, 4)  # Points by rank: Ace, 2, 3, 4, 5, 6, 7, Jack, Queen, King
+RANK_STRENGTH = (9, 0, 8, 1, 2, 3, 4, 5, 6, 7)  # Trick taking order by rank: 2 < 4 < ... < King < 3 < Ace
+
+# Per card lookup tables indexed by card number
+SUIT = tuple(i // 10 for i in range(DECK_SIZE))
+POINTS = tuple(RANK_POINTS[i % 10] for i in range(DECK_SIZE))
+STRENGTH = tuple(RANK_STRENGTH[i % 10] for i in range(DECK_SIZE))
+
+BUDGET_MS = 800  # The bot's thinking time per card (game/ai.py), here so the GUI's options don't load the bot
\ No newline at end of file
@@ -0,0 +1,75 @@
+import numpy as np
+
+from game.consts import DECK_SIZE
+
+# Bulk deal source: shuffled decks generated a block at a time with NumPy instead of one Python shuffle per game
+# Game i of master seed s is always row i % BLOCK_DEALS of block i // BLOCK_DEALS, and every block has its own
+# generator (seeded from s and the block number), so any game can be dealt again from (master_seed, game_index) alone
+
+
+BLOCK_DEALS = 1000  # Decks per block, the same as tournament chunks so chunk k deals block k
+
+
+def random_decks(n, rng: np.random.Generator) -> np.ndarray:
+    """(n, 40) uint8 array of shuffled decks, the last card of a row is the top of the stock. Sorting random 56 bit
+    keys with the card number in the low byte is much faster than Generator.permuted, two equal keys (about 1 in 10^14
+    decks) keep card order."""
+    keys = rng.bit_generator.random_raw((n, DECK_SIZE))
+    keys &= np.uint64(~0xFF & 0xFFFFFFFFFFFFFFFF)
+    keys |= np.arange(DECK_SIZE, dtype=np.uint64)
+    keys.sort(axis=1)  # Sorting contiguous rows is several times faster than sorting columns
+    return keys.astype(np.uint8)
+
+
+def block_rng(master_seed, block) -> np.random.Generator:  # Independent stream for every block of a master seed
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(master_seed, spawn_key=(block,))))
+
+
+def deal_block(master_seed, block) -> np.ndarray:
+    return random_decks(BLOCK_DEALS, block_rng(master_seed, block))
+
+
+def deck_at(master_seed, game_index) -> list:
+    """The deck of one game, without generating the blocks before it."""
+    block, row = divmod(game_index, BLOCK_DEALS)
+    return deal_block(master_seed, block)[row].tolist()
+
+
+class DealStream:
+    """Hands out master_seed's decks in game order from game index `start`. Decks are rows of the current block,
+    returned as views, so nothing is allocated per deal until a GameState turns one into its lists."""
+
+    def __init__(self, master_seed, start=0) -> None:
+        self.master_seed = master_seed
+        self.index = start  # Game index of the next deck
+        self.block = -1
+        self.decks = None  # Current block, (BLOCK_DEALS, 40) uint8
+
+    def __iter__(self) -> "DealStream":
+        return self
+
+    def __next__(self) -> np.ndarray:
+        block, row = divmod(self.index, BLOCK_DEALS)
+        if block != self.block:
+            self.decks = deal_block(self.master_seed, block)
+            self.block = block
+        self.index += 1
+        return self.decks[row]
+
+    def deal(self, state):  # Deals the next game on a game.engine.GameState
+        state.deal_deck(next(self).tolist())
+
+    def take(self, n) -> np.ndarray:
+        """The next n decks as one (n, 40) array, e.g. for BatchSim.deal."""
+        decks = np.empty((n, DECK_SIZE), dtype=np.uint8)
+        done = 0
+        while done < n:
+            block, row = divmod(self.index, BLOCK_DEALS)
+            if block != self.block:
+                self.decks = deal_block(self.master_seed, block)
+                self.block = block
+            count = min(n - done, BLOCK_DEALS - row)
+            decks[done:done + count] = self.decks[row:row + count]
+            done += count
+            self.index += count
+        return decks
@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from time import perf_counter
+import hashlib
+import random
+
+from game.consts import DECK_SIZE, POINTS
+from game.tricks import TRICK_WINNER, PAIRS, SUIT_BLOCK
+from game.bitboard import BitState, NO_CARD, cards_of
+from game.symmetry import canonicalize, map_card
+
+# Exact alpha-beta solver for positions where both hands are known: the last three tricks once the stock and the
+# briscola pile are empty, or deeper positions when the stock order is known too (e.g. the engine's own state)
+# Values are the points player 0 still takes from here on (cards already on the table included)
+
+
+# Zobrist keys, from a fixed seed so every process hashes positions the same way
+_rng = random.Random(0x0B21_5C01A)
+Z_HAND = [[_rng.getrandbits(64) for _ in range(DECK_SIZE)] for _ in range(2)]
+Z_TABLE = [_rng.getrandbits(64) for _ in range(DECK_SIZE)]  # Lead card waiting for the reply
+Z_BRISCOLA = [_rng.getrandbits(64) for _ in range(DECK_SIZE)]  # Face up card still on the briscola pile
+Z_STOCK = [_rng.getrandbits(64) for _ in range(DECK_SIZE + 1)]  # Cards left in the stock
+Z_SUIT = [_rng.getrandbits(64) for _ in range(4)]
+Z_TO_MOVE = _rng.getrandbits(64)  # Set when player 1 is to move
+
+EXACT, LOWER, UPPER = 0, 1, 2  # Transposition table bound types
+
+
+def zobrist(state: BitState) -> int:  # Full hash of a position, the search updates it move by move instead
+    key = Z_SUIT[state.briscola_suit] ^ Z_STOCK[state.stock_len]
+    for card in cards_of(state.hand0): key ^= Z_HAND[0][card]
+    for card in cards_of(state.hand1): key ^= Z_HAND[1][card]
+    if state.f0 != NO_CARD: key ^= Z_TABLE[state.f0]
+    if state.f1 != NO_CARD: key ^= Z_TABLE[state.f1]
+    if state.briscola != NO_CARD: key ^= Z_BRISCOLA[state.briscola]
+    if state.to_move == 1: key ^= Z_TO_MOVE
+    if state.stock_len:  # Positions with a stock are only the same if the cards left come out in the same order, the search keeps the root's digest
+        digest = hashlib.blake2b(state.order[:state.stock_len], digest_size=8).digest()
+        key ^= int.from_bytes(digest, "little")
+    return key
+
+
+class EndgameSolver:  # Keeps its transposition table between solves, so positions seen in earlier searches are free
+    def __init__(self, max_entries=1 << 20, canonical=False) -> None:  # canonical: solve suit relabeled positions once (game/symmetry.py)
+        self.table = OrderedDict()  # key -> (value, bound type, best card), least recently used first
+        self.max_entries = max_entries
+        self.nodes = 0
+        self.hits = 0
+        self.elapsed = 0.0
+        self.best = NO_CARD
+        self.canonical = canonical
+
+    def clear(self):
+        self.table.clear()
+
+    def solve(self, state: BitState) -> tuple:
+        """Returns (points player 0 still takes with perfect play from both sides, best card for the player to move)."""
+        if self.canonical:
+            state, _, inverse = canonicalize(state)
+            value, best = self.solve_position(state)
+            return value, map_card(best, inverse)
+        return self.solve_position(state)
+
+    def solve_position(self, state: BitState) -> tuple:  # solve() without relabeling
+        lead = state.f0 if state.f0 != NO_CARD else state.f1
+        self.order = state.order
+        self.base = state.briscola_suit * SUIT_BLOCK
+
+        start = perf_counter()
+        value = self._search(state.hand0, state.hand1, lead, state.to_move, state.stock_len, state.briscola, zobrist(state), -1, 1000)
+        self.elapsed += perf_counter() - start
+        return value, self.best
+
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def _search(self, h0, h1, lead, mover, n, briscola, key, alpha, beta) -> int:
+        self.nodes += 1
+        if not (h0 | h1): return 0
+
+        table = self.table
+        best_card = NO_CARD
+        entry = table.get(key)
+        if entry is not None:
+            self.hits += 1
+            table.move_to_end(key)
+            value, bound, best_card = entry
+            if bound == EXACT:
+                self.best = best_card
+                return value
+            if bound == LOWER and value > alpha: alpha = value
+            elif bound == UPPER and value < beta: beta = value
+            if alpha >= beta:
+                self.best = best_card
+                return value
+
+        alpha0, beta0 = alpha, beta
+        maximizing = mover == 0
+        best = -1 if maximizing else 1000
+        moves = cards_of(h0 if maximizing else h1)
+        if best_card in moves:  # Try the table's best card first
+            moves.remove(best_card)
+            moves.insert(0, best_card)
+        z_hand = Z_HAND[mover]
+
+        for card in moves:
+            bit = 1 << card
+            nh0, nh1 = (h0 ^ bit, h1) if maximizing else (h0, h1 ^ bit)
+
+            if lead == NO_CARD:  # Opens the trick
+                value = self._search(nh0, nh1, card, 1 - mover, n, briscola, key ^ z_hand[card] ^ Z_TABLE[card] ^ Z_TO_MOVE, alpha, beta)
+            else:  # Answers, the trick is resolved and the hands refilled like GameState.play
+                leader = 1 - mover
+                f0, f1 = (lead, card) if leader == 0 else (card, lead)
+                winner = TRICK_WINNER[self.base + leader * PAIRS + f0 * DECK_SIZE + f1]
+                child_key = key ^ z_hand[card] ^ Z_TABLE[lead]
+                if winner != mover: child_key ^= Z_TO_MOVE
+
+                nn, nb = n, briscola
+                if n > 1:
+                    first, second = self.order[n - 1], self.order[n - 2]
+                    nh0 |= 1 << first
+                    nh1 |= 1 << second
+                    nn = n - 2
+                    child_key ^= Z_HAND[0][first] ^ Z_HAND[1][second] ^ Z_STOCK[n] ^ Z_STOCK[nn]
+                elif n == 1 and briscola != NO_CARD:
+                    last = self.order[0]
+                    if winner == 0: nh0, nh1 = nh0 | (1 << last), nh1 | (1 << briscola)
+                    else: nh0, nh1 = nh0 | (1 << briscola), nh1 | (1 << last)
+                    nn, nb = 0, NO_CARD
+                    child_key ^= Z_HAND[winner][last] ^ Z_HAND[1 - winner][briscola] ^ Z_BRISCOLA[briscola] ^ Z_STOCK[1] ^ Z_STOCK[0]
+
+                gain = POINTS[lead] + POINTS[card] if winner == 0 else 0  # The window moves by what player 0 just took
+                value = gain + self._search(nh0, nh1, NO_CARD, winner, nn, nb, child_key, alpha - gain, beta - gain)
+
+            if maximizing:
+                if value > best: best, best_card = value, card
+                if best > alpha: alpha = best
+            else:
+                if value < best: best, best_card = value, card
+                if best < beta: beta = best
+            if alpha >= beta: break
+
+        if best <= alpha0: bound = UPPER
+        elif best >= beta0: bound = LOWER
+        else: bound = EXACT
+        table[key] = (best, bound, best_card)
+        table.move_to_end(key)
+        if len(table) > self.max_entries: table.popitem(last=False)
+
+        self.best = best_card
+        return best
@@ -0,0 +1,160 @@
+import random
+
+from game.consts import DECK_SIZE, SUIT, POINTS
+from game.tricks import TRICK_WINNER, PAIRS, SUIT_BLOCK, trick_index
+
+# Headless Briscola rules engine, no pyxel in here so it can be used for simulations.
+# Cards are plain ints 0-39 with the same layout as App.cards: suit * 10 + rank
+
+
+NO_CARD = -1  # Marks an empty slot (hand slot, foundation or briscola pile)
+TIE = 5  # Same value App.overall_winner uses for a 60-60 game
+
+HAND_SIZE = 3
+TRICKS_PER_GAME = DECK_SIZE // 2
+
+
+def shuffled_deck(seed=None) -> list:
+    """Returns the 40 card order App.new_game would produce for the same seed."""
+    deck = list(range(DECK_SIZE))
+    random.Random(seed).shuffle(deck)
+    return deck
+
+
+def trick_winner(lead, follow, briscola_suit) -> int:
+    """Returns 0 if the lead card takes the trick, 1 if the follow card does."""
+    return TRICK_WINNER[trick_index(lead, follow, briscola_suit, 0)]
+
+
+class GameState:  # The full state of one game, the same rules App.update runs but without any rendering
+    __slots__ = (
+        "deck", "stock", "briscola", "briscola_suit", "trick_row",
+        "hands", "foundations", "decks", "scores",
+        "leader", "to_move", "last_winner", "tricks", "history", "tracker",
+    )
+
+    def __init__(self) -> None:
+        self.deck = []  # Shuffled order of the whole deck, the last card is the top of the stock
+        self.stock = []  # Cards left to draw, drawn from the end like Pile.draw
+        self.briscola = NO_CARD  # Face up card left on the briscola pile
+        self.briscola_suit = 0
+        self.trick_row = 0  # Start of this briscola suit's block in TRICK_WINNER
+
+        self.hands = [[NO_CARD] * HAND_SIZE, [NO_CARD] * HAND_SIZE]  # Slots match pl0_1..pl0_3 and pl1_1..pl1_3
+        self.foundations = [NO_CARD, NO_CARD]
+        self.decks = [[], []]  # Captured cards
+        self.scores = [0, 0]
+
+        self.leader = 0  # Player that opens the current trick
+        self.to_move = 0
+        self.last_winner = TIE  # Winner of the last trick, TIE until one is played
+        self.tricks = 0
+        self.history = []  # Every card played so far, in order
+        self.tracker = None  # Optional game.tracker.CardTracker told about every card played and drawn
+
+    def deal(self, seed=None):  # Shuffles and deals a new game, same order as App's "new" status
+        self.deal_deck(shuffled_deck(seed))
+
+    def deal_deck(self, deck):  # Deals a new game from an already shuffled deck (a list), e.g. from game.deals
+        self.deck = deck
+        self.stock = deck[:-7]
+        self.hands = [[deck[-1], deck[-2], deck[-3]], [deck[-4], deck[-5], deck[-6]]]
+        self.briscola = deck[-7]
+        self.briscola_suit = SUIT[self.briscola]
+        self.trick_row = self.briscola_suit * SUIT_BLOCK
+
+        self.foundations = [NO_CARD, NO_CARD]
+        self.decks = [[], []]
+        self.scores = [0, 0]
+        self.leader = 0
+        self.to_move = 0
+        self.last_winner = TIE
+        self.tricks = 0
+        self.history = []
+        if self.tracker is not None: self.tracker.sync(self)
+
+    def legal_moves(self) -> list:
+        """Cards the player to move may put on their foundation."""
+        return [card for card in self.hands[self.to_move] if card != NO_CARD]
+
+    def play(self, card):
+        """Plays a card for the player to move, returns the trick winner once both foundations are full, else None."""
+        player = self.to_move
+        hand = self.hands[player]
+        if card == NO_CARD or card not in hand: raise ValueError(f"card {card} is not in player {player}'s hand")
+
+        hand[hand.index(card)] = NO_CARD
+        self.history.append(card)
+        foundations = self.foundations
+        foundations[player] = card
+        tracker = self.tracker
+        if tracker is not None: tracker.played(player, card)
+
+        other = 1 - player
+        lead = foundations[other]
+        if lead == NO_CARD:  # First card of the trick, wait for the other player
+            self.to_move = other
+            return None
+
+        # One lookup in the precomputed table, the leader is the player that did not just play
+        winner = TRICK_WINNER[self.trick_row + other * PAIRS + foundations[0] * DECK_SIZE + foundations[1]]
+
+        # Cards go to the winner's deck in the same order App moves them (foundation0 first)
+        captured = self.decks[winner]
+        captured.append(foundations[0])
+        captured.append(foundations[1])
+        self.scores[winner] += POINTS[card] + POINTS[lead]
+        foundations[0] = foundations[1] = NO_CARD
+
+        # Refilling logic, mirrors the "new_hand" status
+        stock = self.stock
+        hands = self.hands
+        if tracker is not None:
+            tracker.captured(POINTS[card] + POINTS[lead])
+            if len(stock) > 1:
+                tracker.drew(0, stock[-1])
+                tracker.drew(1, stock[-2])
+            elif len(stock) == 1 and self.briscola != NO_CARD:
+                tracker.drew(winner, stock[-1])
+                tracker.drew(1 - winner, self.briscola)
+        if len(stock) > 1:
+            for hand in hands: hand[hand.index(NO_CARD)] = stock.pop()
+        elif len(stock) == 1 and self.briscola != NO_CARD:
+            winner_hand = hands[winner]
+            loser_hand = hands[1 - winner]
+            winner_hand[winner_hand.index(NO_CARD)] = stock.pop()
+            loser_hand[loser_hand.index(NO_CARD)] = self.briscola
+            self.briscola = NO_CARD
+
+        self.last_winner = winner
+        self.leader = winner
+        self.to_move = winner
+        self.tricks += 1
+        return winner
+
+    def is_terminal(self) -> bool:
+        return self.tricks == TRICKS_PER_GAME or (max(self.hands[0]) == NO_CARD and max(self.hands[1]) == NO_CARD)
+
+    def overall_winner(self) -> int:  # Same result as App.overall_winner
+        if self.scores[1] > 60: return 1
+        elif self.scores[1] == 60: return TIE
+        else: return 0
+
+    def copy(self) -> "GameState":
+        state = GameState.__new__(GameState)
+        state.deck = self.deck
+        state.stock = self.stock[:]
+        state.briscola = self.briscola
+        state.briscola_suit = self.briscola_suit
+        state.trick_row = self.trick_row
+        state.hands = [self.hands[0][:], self.hands[1][:]]
+        state.foundations = self.foundations[:]
+        state.decks = [self.decks[0][:], self.decks[1][:]]
+        state.scores = self.scores[:]
+        state.leader = self.leader
+        state.to_move = self.to_move
+        state.last_winner = self.last_winner
+        state.tricks = self.tricks
+        state.history = self.history[:]
+        state.tracker = None  # Copies are for search, they don't report to the original's tracker
+        return state
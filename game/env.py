@@ -0,0 +1,185 @@
+import numpy as np
+
+from game.batch import BatchSim, WINNER_ARRAY, POINTS_ARRAY, SLOTS, select, greedy_policy, seeded_decks
+from game.consts import DECK_SIZE
+
+# Gym style vectorized environment for reinforcement learning, on top of game/batch.py's BatchSim
+# The agent plays one seat of N games against a batch policy (game/batch.py) playing the other. Every step the agent
+# plays one card in every game and the trick is finished, so each step is one trick and every game ends after 20 steps,
+# all at once. The opponent's lead, when it has one, is already on its foundation when the agent is asked.
+#
+#   env = VectorEnv(4096, seed=1)
+#   obs = env.reset()
+#   obs, rewards, dones, info = env.step(slots)  # slots: (N,) hand slot 0-2 with obs["action_mask"] True
+#
+# Observations are the agent's view, game first, written into the same arrays every step (copy what you keep):
+#   hand         (N, 3)  int8   cards in the agent's hand slots, -1 for empty slots
+#   action_mask  (N, 3)  bool   slots the agent may play, every card in its hand (App.validate_move's hand -> foundation rule)
+#   briscola     (N,)    int8   the briscola card turned up at the deal
+#   foundations  (N, 2)  int8   cards on the agent's and the opponent's foundation, -1 when empty
+#   seen         (N, 40) uint8  1 for every card the agent has seen: its hands, the briscola and every card played
+#   scores       (N, 2)  int16  points taken so far by the agent and by the opponent
+#   stock        (N,)    int8   cards left to draw, the briscola included
+# Rewards are the points of the trick (Card.points values) for the agent when it takes it, negative when the opponent
+# does, so an episode sums to the agent's score minus the opponent's. Cards are suit * 10 + rank like everywhere else.
+
+
+class VectorEnv:
+    def __init__(self, n, opponent=greedy_policy, seed=None) -> None:
+        self.n = n
+        self.opponent = opponent
+        self.rng = np.random.default_rng(seed)
+        self.sim = BatchSim(n, seed=self.rng.integers(1 << 63))
+        self.seat = (np.arange(n) % 2).astype(np.int8)  # Agent's seat, alternating so half the games open with the opponent's lead
+        self.agent1 = -self.seat  # -1 where the agent sits in seat 1, the bit masks game/batch.py selects with
+        self.opponent1 = ~self.agent1
+        self.rows = np.arange(n)
+
+        self.agent_seats = np.stack((self.opponent1, self.agent1))[:, None]  # (2, 1, N) -1 in the games where the agent sits in seat 0 / seat 1
+        self.opponent_seats = self.agent_seats[::-1]
+        self.lead = np.full(n, -1, dtype=np.int8)  # Opponent's card waiting for the agent, -1 where the agent leads
+
+        # Scratch arrays, a step writes everything it works out into these and allocates nothing itself
+        self.leading = np.empty(n, dtype=np.int8)  # -1 where the agent leads, then where the opponent does
+        self.card = np.empty(n, dtype=np.int8)  # Agent's card
+        self.follow = np.empty(n, dtype=np.int8)  # Opponent's answer, -1 where it led
+        self.other = np.empty(n, dtype=np.int8)  # Opponent's card
+        self.mask = np.empty(n, dtype=np.int8)
+        self.trick = np.empty((2, n), dtype=np.intp)  # Card led and answer, then the winner table index in row 0
+        self.winner = np.empty(n, dtype=np.uint8)
+        self.points = np.empty((2, n), dtype=np.int16)
+        self.drawn = np.empty((2, n), dtype=np.int8)  # Cards drawn by seat 0 and seat 1 on the last draw
+        self.hand = np.empty((2, 3, n), dtype=np.int8)  # Hand of the player to move, slot picked in it
+        self.picked = np.empty((2, 3, n), dtype=np.int8)  # Slot picked by seat, then the empty slots
+        self.flags = np.empty((2, 3, n), dtype=bool)
+
+        # Preallocated outputs, step and reset only ever write into these
+        self.observation = {
+            "hand": np.empty((n, 3), dtype=np.int8),
+            "action_mask": np.empty((n, 3), dtype=bool),
+            "briscola": np.empty(n, dtype=np.int8),
+            "foundations": np.full((n, 2), -1, dtype=np.int8),
+            "seen": np.zeros((n, DECK_SIZE), dtype=np.uint8),
+            "scores": np.zeros((n, 2), dtype=np.int16),
+            "stock": np.empty(n, dtype=np.int8),
+        }
+        self.rewards = np.zeros(n, dtype=np.float32)
+        self.dones = np.zeros(n, dtype=bool)
+        self.final_scores = np.zeros((n, 2), dtype=np.int16)  # Agent's and opponent's points of the games that just ended
+        self.info = {"final_scores": self.final_scores}
+
+    def reset(self, seeds=None) -> dict:
+        """Deals N new games, with the exact deals GameState.deal(seed) makes if seeds are given, else random ones."""
+        sim = self.sim
+        sim.deal(None if seeds is None else seeded_decks(seeds))
+        obs = self.observation
+        obs["briscola"][:] = sim.briscola
+        seen = obs["seen"]
+        seen.fill(0)
+        seen[self.rows, sim.briscola] = 1
+        for slot in select(self.agent1, sim.hands[1], sim.hands[0]): seen[self.rows, slot] = 1
+        obs["scores"].fill(0)
+        self.lead.fill(-1)
+        self._opponent_leads()
+        self._observe()
+        return obs
+
+    def step(self, slots) -> tuple:
+        """Plays the agent's card from `slots` in every game and finishes the trick, returns (observation, rewards,
+        dones, info). Finished games are dealt again right away, info["final_scores"] then holds their results."""
+        sim = self.sim
+        leading = np.negative(np.less(self.lead, 0, out=self.flags[0, 0]).view(np.int8), out=self.leading)
+        card = self._take(self.agent_seats, np.asarray(slots, dtype=np.int8), -1, self.card)
+
+        # The opponent follows where the agent led
+        hands = select(self.opponent1, sim.hands[1], sim.hands[0], out=self.hand[0])
+        follow_slots = self.opponent(sim, hands, select(leading, card, -1, out=self.other))
+        follow = self._take(self.opponent_seats, follow_slots, leading, self.follow)
+        other = select(leading, follow, self.lead, out=self.other)
+
+        # The table read as if seat 0 led gives 1 where the card that follows takes the trick
+        lead, answer = self.trick
+        select(leading, card, other, out=lead)
+        select(leading, other, card, out=answer)
+        points = np.take(POINTS_ARRAY, self.trick, out=self.points)[0]
+        points += self.points[1]
+        lead *= DECK_SIZE
+        lead += answer
+        lead += sim.base
+        winner = np.take(WINNER_ARRAY, lead, out=self.winner).view(np.int8)
+        winner ^= sim.leader
+        seat0_wins = np.subtract(winner, 1, out=self.mask)
+
+        seat0_points = np.bitwise_and(points, seat0_wins, out=self.points[1])
+        sim.scores[0] += seat0_points
+        sim.scores[1] += points
+        sim.scores[1] -= seat0_points
+        np.copyto(self.rewards, points)
+        np.negative(self.rewards, out=self.rewards, where=np.not_equal(winner, self.seat, out=self.flags[0, 0]))
+
+        seen = self.observation["seen"]
+        seen[self.rows, card] = 1
+        seen[self.rows, other] = 1
+
+        # Refill into the emptied slots, the only empty ones while the stock lasts, player 0 draws first like App's
+        # "new_hand" status, the agent sees the card it draws
+        n = sim.stock_len
+        if n:
+            if n > 1: drawn = sim.stock[n - 2:n][::-1]  # Seat 0 draws stock[n - 1], seat 1 stock[n - 2]
+            else:  # Last draw: the winner takes the stock card and the loser the briscola
+                drawn, last = self.drawn, sim.stock[0]
+                select(seat0_wins, last, sim.briscola, out=drawn[0])
+                select(seat0_wins, sim.briscola, last, out=drawn[1])
+            empty = np.negative(np.less(sim.hands, 0, out=self.flags).view(np.int8), out=self.picked)
+            np.copyto(sim.hands, select(empty, drawn[:, None], sim.hands, out=self.hand))
+            sim.stock_len = max(n - 2, 0)
+            seen[self.rows, select(self.agent1, drawn[1], drawn[0], out=self.other)] = 1
+        np.copyto(sim.leader, winner)
+        sim.tricks += 1
+
+        if sim.is_terminal():
+            self.dones.fill(True)
+            select(self.agent1, sim.scores[1], sim.scores[0], out=self.final_scores[:, 0])
+            select(self.agent1, sim.scores[0], sim.scores[1], out=self.final_scores[:, 1])
+            self.reset()
+        else:
+            self.dones.fill(False)
+            self.lead.fill(-1)
+            self._opponent_leads()
+            self._observe()
+        return self.observation, self.rewards, self.dones, self.info
+
+    def _take(self, seats, slots, moving, cards):
+        """Takes the cards in `slots` out of the hands of the player whose seat the (2, 1, N) seats masks in the games
+        where moving is -1, writes them into `cards` (-1 where not moving) and returns it."""
+        sim = self.sim
+        hands = select(seats[1], sim.hands[1], sim.hands[0], out=self.hand[0])
+        picked = np.negative(np.equal(SLOTS, slots, out=self.flags[0]).view(np.int8), out=self.hand[1])
+        picked &= moving
+        hands &= picked
+        np.bitwise_or(hands[0], hands[1], out=cards)
+        cards |= hands[2]
+        if np.less(cards, 0, out=self.flags[0, 0]).any(): raise ValueError("a move picked an empty hand slot")
+        cards |= np.invert(moving, out=self.mask)
+
+        sim.hands |= np.bitwise_and(picked, seats, out=self.picked)  # -1 in the played slot
+        return cards
+
+    def _opponent_leads(self):  # The opponent opens the trick in the games it leads, its card waits in self.lead
+        sim = self.sim
+        leads = np.negative(np.not_equal(sim.leader, self.seat, out=self.flags[0, 0]).view(np.int8), out=self.leading)
+        if not leads.any(): return
+        slots = self.opponent(sim, select(self.opponent1, sim.hands[1], sim.hands[0], out=self.hand[0]), sim.no_lead)
+        self._take(self.opponent_seats, slots, leads, self.lead)
+        self.observation["seen"][self.rows, self.lead] |= np.greater_equal(self.lead, 0, out=self.flags[0, 0]).view(np.uint8)
+
+    def _observe(self):
+        sim, obs = self.sim, self.observation
+        hand = obs["hand"]
+        select(self.agent1, sim.hands[1], sim.hands[0], out=hand.T)
+        np.greater_equal(hand, 0, out=obs["action_mask"])
+        obs["foundations"][:, 1] = self.lead
+        select(self.agent1, sim.scores[1], sim.scores[0], out=obs["scores"][:, 0])
+        select(self.agent1, sim.scores[0], sim.scores[1], out=obs["scores"][:, 1])
+        obs["stock"].fill(sim.stock_len + (sim.stock_len > 0))  # The briscola is drawn with the last stock card
+
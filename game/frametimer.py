@@ -0,0 +1,89 @@
+from array import array
+from collections import deque
+from time import perf_counter
+import csv
+import json
+
+# Rolling frame times of the GUI loop, to check how much Python work each update and render does
+# With `detail` on, update and render are also split into phases ("update input", "render overlay", ...),
+# and with keep_frames every frame's times are kept to be written out with dump()
+
+
+WINDOW = 600  # Frames kept, 10 seconds at 60 fps, enough for a p99 that isn't just the slowest frame
+PERCENTILES = (50, 95, 99)
+
+
+class FrameTimer:
+    def __init__(self, window=WINDOW, keep_frames=False) -> None:
+        self.samples = {}  # Phase name -> deque of the last `window` durations in seconds
+        self.window = window
+        self.frames = 0
+        self.detail = keep_frames  # Whether split() records anything, off it returns straight away
+        self.mark = 0.0  # Time of the last split
+        self.frame_start = None  # Time the current frame's update started
+        self.current = {} if keep_frames else None  # Phase -> seconds spent in it this frame
+        self.columns = {}  # Phase -> array of seconds per frame, filled when frames end if keep_frames
+        self.kept = 0  # Frames in the columns
+
+    def add(self, phase, seconds):
+        samples = self.samples.get(phase)
+        if samples is None: samples = self.samples[phase] = deque(maxlen=self.window)
+        samples.append(seconds)
+        if phase == 'update': self.frames += 1
+        if self.current is not None: self.current[phase] = self.current.get(phase, 0.0) + seconds
+
+    def time(self, phase, function):  # Calls function() and records how long it took
+        start = self.mark = perf_counter()
+        result = function()
+        self.add(phase, perf_counter() - start)
+        return result
+
+    def split(self, phase):  # Records the time since the last split (or since time() started) as phase
+        if not self.detail: return
+        now = perf_counter()
+        self.add(phase, now - self.mark)
+        self.mark = now
+
+    def begin_frame(self):  # Called before every update, the time between two calls is the 'frame' phase
+        now = perf_counter()
+        if self.frame_start is not None:
+            self.add('frame', now - self.frame_start)
+            if self.current is not None: self.keep_frame()
+        self.frame_start = now
+
+    def keep_frame(self):  # Moves this frame's phase times into the columns, phases it didn't run get 0
+        current, columns = self.current, self.columns
+        for phase in current:
+            if phase not in columns: columns[phase] = array('d', bytes(8 * self.kept))
+        for phase, column in columns.items(): column.append(current.get(phase, 0.0))
+        current.clear()
+        self.kept += 1
+
+    def mean_us(self, phase) -> float:
+        samples = self.samples.get(phase)
+        return sum(samples) / len(samples) * 1e6 if samples else 0.0
+
+    def percentiles(self, phase, percentiles=PERCENTILES) -> tuple:
+        """Nearest rank percentiles of the phase's rolling window, in seconds."""
+        ordered = sorted(self.samples.get(phase, ()))
+        if not ordered: return (0.0,) * len(percentiles)
+        last = len(ordered) - 1
+        return tuple(ordered[min(last, len(ordered) * p // 100)] for p in percentiles)
+
+    def report(self) -> str:
+        return ", ".join(f"{phase} {self.mean_us(phase):.1f}us" for phase in self.samples)
+
+    def dump(self, path):
+        """Writes every kept frame's phase times in microseconds: JSON ({"phases": {phase: [...]}}) if path ends
+        in .json, CSV with a row per frame otherwise."""
+        phases = sorted(self.columns)
+        if path.endswith(".json"):
+            data = {"unit": "us", "frames": self.kept,
+                    "phases": {phase: [round(t * 1e6, 1) for t in self.columns[phase]] for phase in phases}}
+            with open(path, "w") as file: json.dump(data, file)
+            return
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["index"] + [f"{phase} (us)" for phase in phases])
+            for i, row in enumerate(zip(*(self.columns[phase] for phase in phases))):
+                writer.writerow([i] + [round(t * 1e6, 1) for t in row])
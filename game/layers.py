@@ -0,0 +1,44 @@
+from game import backend
+
+# Screen sized layers cached in spare image banks: drawn once, redrawn only when their key changes,
+# and put on screen with one blt per region they drew in
+
+
+BACKGROUND_BANK = 1  # Image banks the asset file leaves empty, bank 0 holds the card sprites
+OVERLAY_BANK = 2
+TRANSPARENT = 14  # Same color key as the card sprites, overlays never draw with it
+
+
+class Layer:
+    def __init__(self, bank, width, height, colkey=None) -> None:
+        self.bank = bank
+        self.width = width
+        self.height = height
+        self.colkey = colkey  # None for opaque layers
+        self.key = None  # What the cached picture was drawn for
+        self.regions = [(0, 0, width, height, colkey is None)]  # (x, y, w, h, opaque) parts with something in them, the only ones put on screen
+        self.redraws = 0
+
+    @property
+    def image(self):
+        return backend.pyxel.images[self.bank]
+
+    def invalidate(self):  # Forces a redraw on the next refresh, e.g. after pyxel.load replaced the banks
+        self.key = None
+
+    def refresh(self, key, draw) -> bool:
+        """Calls draw(image, key) on a cleared bank if key differs from the one the layer was last drawn for.
+        draw can return the (x, y, w, h, opaque) regions it drew in: keyed blits cost per pixel, so overlays should,
+        and flag the parts it filled completely so they are copied without the color key."""
+        if key == self.key: return False
+        image = self.image
+        image.cls(self.colkey if self.colkey is not None else 0)
+        self.regions = draw(image, key) or [(0, 0, self.width, self.height, self.colkey is None)]
+        self.key = key
+        self.redraws += 1
+        return True
+
+    def blt(self):  # Composites the layer's regions on screen, at the same place
+        for u, v, w, h, opaque in self.regions:
+            if opaque: backend.pyxel.blt(u, v, self.bank, u, v, w, h)
+            else: backend.pyxel.blt(u, v, self.bank, u, v, w, h, self.colkey)
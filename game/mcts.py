@@ -0,0 +1,168 @@
+from math import log, sqrt
+from time import perf_counter
+import random
+
+from game.bitboard import BitState, FULL_MASK, cards_of, mask_of, random_card
+from game.engine import GameState, NO_CARD
+
+# Information set Monte Carlo tree search (single observer ISMCTS)
+# Every iteration samples the opponent's hidden hand and the stock order from the cards the player has not seen,
+# walks the shared tree with the moves that are legal in that sample and plays the rest out at random on a BitState
+
+
+EXPLORATION = 0.7  # UCB exploration constant, rewards are points / 120 so they stay within 0..1
+TIME_CHECK = 16  # Iterations between clock reads when searching on a time budget
+
+
+class Node:  # One action (card) in the tree, stats are from the point of view of the player that played it
+    __slots__ = ("card", "player", "parent", "children", "child_mask", "visits", "reward", "avail")
+
+    def __init__(self, card=NO_CARD, player=None, parent=None) -> None:
+        self.card = card
+        self.player = player
+        self.parent = parent
+        self.children = {}
+        self.child_mask = 0  # Cards that already have a child
+        self.visits = 0
+        self.reward = 0.0
+        self.avail = 0  # Iterations in which this card was legal, used instead of the parent's visits
+
+    def size(self) -> int:
+        return 1 + sum(child.size() for child in self.children.values())
+
+
+class InfoSet:  # What `observer` knows in a GameState, and how to sample the rest
+    def __init__(self, game: GameState, observer) -> None:
+        self.observer = observer
+        self.template = BitState.from_game(game)
+
+        own = mask_of(c for c in game.hands[observer] if c != NO_CARD)
+        opponent = [c for c in game.hands[1 - observer] if c != NO_CARD]
+        public = self.template.deck0 | self.template.deck1 | mask_of(c for c in game.foundations if c != NO_CARD)
+
+        # The briscola card is known wherever it is: on its pile, played, in our hand or else in the opponent's hand
+        briscola_card = game.deck[-7]
+        self.known_opponent = 0
+        if game.briscola == NO_CARD and not (own | public) & (1 << briscola_card):
+            self.known_opponent = 1 << briscola_card
+        if game.tracker is not None: hidden = game.tracker.unseen[observer]  # Same cards, kept up to date move by move
+        else: hidden = FULL_MASK & ~(own | public | (1 << briscola_card))
+
+        self.hidden = hidden
+        self.pool = cards_of(hidden)  # Opponent's unknown cards plus the stock
+        self.hidden_in_hand = len(opponent) - (1 if self.known_opponent else 0)
+
+    def sample(self, rng: random.Random) -> BitState:
+        """A full position consistent with what the observer knows."""
+        pool = self.pool
+        rng.shuffle(pool)
+        k = self.hidden_in_hand
+        state = self.template.copy()
+        hand = self.known_opponent | mask_of(pool[:k])
+        if self.observer == 0: state.hand1 = hand
+        else: state.hand0 = hand
+        state.order = bytes(pool[k:])
+        state.stock = self.hidden & ~hand
+        return state
+
+
+class MctsPlayer:
+    """ISMCTS for one seat. Searches for budget_ms milliseconds or `iterations` iterations (whichever is given)
+    and keeps the subtree of the moves actually played for its next decision."""
+
+    def __init__(self, iterations=None, budget_ms=None, exploration=EXPLORATION, rng=None) -> None:
+        if iterations is None and budget_ms is None: iterations = 1000
+        self.iterations = iterations
+        self.budget_ms = budget_ms
+        self.exploration = exploration
+        self.rng = rng or random.Random()
+
+        self.root = None
+        self.root_deck = None  # Deck of the game the root belongs to and the cards played before it, compared by value
+        self.root_history = []
+
+        self.last_iterations = 0
+        self.last_elapsed = 0.0
+        self.reused = 0  # Root visits carried over into the last search
+
+    def iterations_per_second(self) -> float:
+        return self.last_iterations / self.last_elapsed if self.last_elapsed else 0.0
+
+    def _advance_root(self, game: GameState):  # Reuses the subtree reached by the moves played since the last search
+        root = None
+        moves = len(self.root_history)
+        if self.root is not None and game.deck == self.root_deck and game.history[:moves] == self.root_history:
+            root = self.root
+            for card in game.history[moves:]:
+                root = root.children.get(card)
+                if root is None: break
+
+        self.root = root if root is not None else Node()
+        self.root.parent = None
+        self.root_deck = game.deck[:]
+        self.root_history = game.history[:]
+        self.reused = self.root.visits
+
+    def choose(self, game: GameState, rng: random.Random = None, stop=None) -> int:
+        """Searches from the point of view of game.to_move and returns the card to play. stop() is polled with the
+        clock, when it returns True the search ends early with the best card found so far."""
+        rng = rng or self.rng
+        moves = game.legal_moves()
+        if len(moves) == 1: return moves[0]
+
+        self._advance_root(game)
+        info = InfoSet(game, game.to_move)
+        root = self.root
+        start = perf_counter()
+        deadline = start + self.budget_ms / 1000 if self.budget_ms is not None else None
+
+        done = 0
+        while True:
+            if self.iterations is not None and done >= self.iterations: break
+            if deadline is not None and done % TIME_CHECK == 0 and perf_counter() >= deadline: break
+            if stop is not None and done % TIME_CHECK == 0 and stop(): break
+            self._iterate(root, info.sample(rng), rng)
+            done += 1
+
+        self.last_iterations = done
+        self.last_elapsed = perf_counter() - start
+        searched = [root.children[card] for card in moves if card in root.children]
+        if not searched: return moves[0]  # Stopped before the first iteration
+        return max(searched, key=lambda node: node.visits).card
+
+    def _iterate(self, node: Node, state: BitState, rng: random.Random):
+        c = self.exploration
+
+        # Selection and expansion
+        while not state.is_terminal():
+            legal = state.hand0 if state.to_move == 0 else state.hand1
+            untried = legal & ~node.child_mask
+            if untried:
+                card = random_card(untried, rng)
+                child = Node(card, state.to_move, node)
+                node.children[card] = child
+                node.child_mask |= 1 << card
+                for other in node.children.values():
+                    if legal & (1 << other.card): other.avail += 1
+                state.play(card)
+                node = child
+                break
+
+            best, best_value = None, -1.0
+            for child in node.children.values():
+                if not legal & (1 << child.card): continue
+                child.avail += 1
+                value = child.reward / child.visits + c * sqrt(log(child.avail) / child.visits)
+                if value > best_value: best, best_value = child, value
+            state.play(best.card)
+            node = best
+
+        # Random playout
+        score0, score1 = state.rollout(rng)
+
+        # Backpropagation
+        scores = (score0 / 120, score1 / 120)
+        while node is not None:
+            node.visits += 1
+            if node.player is not None: node.reward += scores[node.player]
+            node = node.parent
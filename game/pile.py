@@ -1,10 +1,37 @@
+from itertools import islice
 from typing import List
 from game.card import Card
-from game.consts import CARD_HEIGHT, CARD_WIDTH, CARD_SPACING
-import pyxel
+from game.consts import CARD_HEIGHT, CARD_WIDTH, CARD_SPACING, DECK_SIZE
 import random
 
 
+class CardView:  # Read-only window on the cards of a pile, indexes and iterates its buffer without copying it
+    __slots__ = ("pile",)
+
+    def __init__(self, pile) -> None:
+        self.pile = pile
+
+    def __len__(self) -> int:
+        return self.pile.size
+
+    def __getitem__(self, i):
+        size = self.pile.size
+        if isinstance(i, slice): return [self.pile.buffer[j] for j in range(*i.indices(size))]
+        if i < 0: i += size
+        if i < 0 or i >= size: raise IndexError("pile index out of range")
+        return self.pile.buffer[i]
+
+    def __iter__(self):
+        return islice(self.pile.buffer, self.pile.size)
+
+    def __reversed__(self):
+        buffer = self.pile.buffer
+        return (buffer[i] for i in range(self.pile.size - 1, -1, -1))
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+
 class Pile:  # This class will represent a pile of cards, i.e. the stock
     def __init__(self, x, y, render_all= True, render_slot = True) -> None:
         self.x = x
@@ -12,16 +39,28 @@ class Pile:  # This class will represent a pile of cards, i.e. the stock
         self.render_all = render_all
         self.render_slot = render_slot
 
-        self.cards:List[Card] = []  # This list will store ALL the cards in the stock
+        self.buffer:List[Card] = [None] * DECK_SIZE  # Preallocated, the cards of the pile are buffer[:size] bottom to top
+        self.size = 0
+        self.view = CardView(self)
+        self.dirty = False  # Set when the cards changed and have to be positioned again
         
     def render(self):
-        if len(self.cards) == 0:
+        if self.size == 0:
             return
         
-        self.cards[-1].render()
+        self.buffer[self.size - 1].render()
     
     def __len__(self) -> int:
-        return len(self.cards)
+        return self.size
+
+    @property  # Read-only view of ALL the cards in the pile, bottom first
+    def cards(self) -> CardView:
+        return self.view
+
+    @cards.setter  # Replaces the cards of the pile
+    def cards(self, cards):
+        self.size = 0
+        self.add(list(cards))
 
     @property
     def width(self):
@@ -37,73 +76,93 @@ class Pile:  # This class will represent a pile of cards, i.e. the stock
 
     @property
     def is_empty(self):
-        return len(self.cards) == 0
+        return self.size == 0
 
     @property  # this might also determine the look of the cards that are laid out in solitaire
     def top_card(self) -> Card:
-        """The top card is the last list element."""
-        return self.cards[-1] if len(self.cards) > 0 else None
-
-    def position_cards(self, offset_x = None, offset_y = None, hand_size = 0, now = False):
-        pile_cards = []
-        hand_cards = []
-
-        if hand_size > 0:
-            pile_cards = self.cards[:-hand_size]
-            hand_cards = self.cards[-hand_size:]
-        else:
-            pile_cards = self.cards[:]
-            
-        for i in range(len(pile_cards)):
-            card = pile_cards[i]
-            if not card:
-                break
-
-            # Set card coordinates
-            x = self.x
-            y = self.y + (i * self.card_spacing) if self.render_all else self.y
-            card.move_to(x, y, now)
-
-        for i in range(len(hand_cards)):
-            card = hand_cards[i]
-            if not card:
-                break
-
-            # Set card coordinates
-            x = offset_x 
-            y = offset_y + (i * self.card_spacing) if self.render_all else offset_y
-            card.move_to(x, y, now)
+        """The top card is the last card of the buffer."""
+        return self.buffer[self.size - 1] if self.size > 0 else None
+
+    def position_cards(self, offset_x = None, offset_y = None, hand_size = 0, now = False, start = 0):
+        cards = self.buffer
+        split = self.size - hand_size if hand_size > 0 else self.size  # Cards from split on are held by the cursor
+        spacing = self.card_spacing if self.render_all else 0
+
+        for i in range(start, split):  # Indexes instead of slices, no list copies every frame
+            cards[i].move_to(self.x, self.y + i * spacing, now)
+
+        for i in range(split, self.size):
+            cards[i].move_to(offset_x, offset_y + (i - split) * spacing, now)
+
+        if start == 0: self.dirty = hand_size > 0  # Held cards go back to the pile once they are released
+
+    def push(self, card:Card):  # Puts one card on top, O(1)
+        self.buffer[self.size] = card
+        self.size += 1
+        card.pile = self
+        self.position_cards(start = self.size - 1)
+
+    def pop(self) -> Card:  # Takes the top card, O(1)
+        if self.size == 0: raise IndexError("pop from an empty pile")
+        self.size -= 1
+        card = self.buffer[self.size]
+        self.buffer[self.size] = None
+        self.dirty = True
+        return card
 
     def add(self, cards:List[Card]): # this will add cards to the pile
         """Add cards from list to the pile."""
         if isinstance(cards, list):
-            self.cards = self.cards + cards
+            start = self.size
             for card in cards:
+                self.buffer[self.size] = card
+                self.size += 1
                 card.pile = self
 
-            self.position_cards()
+            self.position_cards(start = start)  # Cards already in the pile keep their place
             
     def draw(self, amount:int = 1) -> List[Card]: # this will draw cards from the pile
         """Return a list of cards drawn from the top of the pile (the last elements of the list)."""
-        amount = max(1, min(amount, len(self.cards)))
-        
-        staying_cards = self.cards[:-amount]
-        moving_cards = self.cards[-amount:]
+        amount = max(1, min(amount, self.size))
+        start = max(self.size - amount, 0)
 
-        self.cards = staying_cards
+        moving_cards = self.buffer[start:self.size]
+        for i in range(start, self.size): self.buffer[i] = None
+        self.size = start
+        self.dirty = True
 
         return moving_cards
 
+    def move_cards(self, target:"Pile", amount:int = 1):  # Same as target.add(self.draw(amount)) without the list in between
+        amount = max(1, min(amount, self.size))
+        start = max(self.size - amount, 0)
+        first = target.size
+        for i in range(start, self.size):
+            card = self.buffer[i]
+            self.buffer[i] = None
+            target.buffer[target.size] = card
+            target.size += 1
+            card.pile = target
+
+        self.size = start
+        self.dirty = True
+        target.position_cards(start = first)
+
     def clear(self):  # this will clear the pile
-        self.cards.clear()
+        for i in range(self.size): self.buffer[i] = None
+        self.size = 0
+        self.dirty = True
         
 #    def reverse(self):  # this will reverse the order of the cards in the pile - not necessary
 #        """Reverse order of cards list."""
 #        self.cards.reverse()
 
-    def shuffle(self):  # this will shuffle the cards in the pile - necessary
-        """Shuffle pile."""
-        random.shuffle(self.cards)
+    def shuffle(self, rng:random.Random = None):  # this will shuffle the cards in the pile - necessary
+        """Shuffle pile with the game's own generator (the module one if none is given)."""
+        cards = self.buffer[:self.size]
+        (rng or random).shuffle(cards)
+        self.buffer[:self.size] = cards
+        self.dirty = True
 
     def flip(self):  # this will flip the cards in the pile - not necessary but cute
         """Reverse pile and flip all cards."""
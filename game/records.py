@@ -0,0 +1,152 @@
+from threading import Lock
+import mmap
+import os
+import struct
+
+from game.consts import DECK_SIZE
+
+# Binary game records: a game is fully determined by its deal seed and the cards played, so that is all we store
+# File = 16 byte header, then fixed width records of RECORD.size bytes:
+#   seed (uint64 little endian), briscola card, number of cards played, the cards played in order padded with NO_PLAY
+# Fixed width means game i starts at HEADER.size + i * RECORD.size, readers jump straight to it without an index
+
+
+MAGIC = b"BRISREC\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHH4x")  # Magic, version, record size
+RECORD = struct.Struct(f"<QBB{DECK_SIZE}s")
+NO_PLAY = 0xFF  # Padding after the last card of an unfinished game
+
+FLUSH_RECORDS = 4096  # Records buffered before the writer hits the file, ~200 KB
+
+
+def pack_record(seed, briscola, plays) -> bytes:
+    """One record, plays is any iterable of card numbers (a GameState's history)."""
+    plays = bytes(plays)
+    return RECORD.pack(seed, briscola, len(plays), plays.ljust(DECK_SIZE, bytes((NO_PLAY,))))
+
+
+def read_header(data) -> int:  # Checks a file's header, returns its record size
+    magic, version, record_size = HEADER.unpack_from(data)
+    if magic != MAGIC: raise ValueError("not a Briscola game record file")
+    if version != VERSION or record_size != RECORD.size: raise ValueError(f"unsupported record format v{version} ({record_size} byte records)")
+    return record_size
+
+
+class RecordWriter:
+    """Append only writer. Records are buffered and written FLUSH_RECORDS at a time with a single write on an O_APPEND
+    descriptor, so a crash never leaves more than one partial record at the end (readers skip it), and threads can share
+    one writer. Use as a context manager or call close() so the last records are flushed."""
+
+    def __init__(self, path, flush_records=FLUSH_RECORDS) -> None:
+        self.path = path
+        self.flush_records = flush_records
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.buffer = bytearray()
+        self.pending = 0
+        self.games = 0
+        self.lock = Lock()
+
+        try:
+            size = os.fstat(self.fd).st_size
+            if size == 0: self._write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            else:
+                if size < HEADER.size: raise ValueError("not a Briscola game record file")
+                with open(path, "rb") as file: read_header(file.read(HEADER.size))
+                partial = (size - HEADER.size) % RECORD.size
+                if partial: os.truncate(self.fd, size - partial)  # Drops what a crash left of a record, so appends stay aligned
+        except Exception:  # Nothing stays open when the file is refused
+            os.close(self.fd)
+            self.fd = None
+            raise
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, data):
+        view = memoryview(data)
+        while view: view = view[os.write(self.fd, view):]
+
+    def write_game(self, seed, briscola, plays):
+        self.write_records(pack_record(seed, briscola, plays), 1)
+
+    def write_records(self, data, count):  # Already packed records, e.g. a tournament chunk built in a worker
+        with self.lock:
+            self.buffer += data
+            self.pending += count
+            self.games += count
+            if self.pending >= self.flush_records: self._flush()
+
+    def flush(self):
+        with self.lock: self._flush()
+
+    def _flush(self):
+        if self.buffer: self._write(self.buffer)
+        self.buffer = bytearray()
+        self.pending = 0
+
+    def close(self):
+        if self.fd is None: return
+        self.flush()
+        os.close(self.fd)
+        self.fd = None
+
+
+class RecordReader:
+    """Memory maps a record file. Indexing and iteration read straight from the map, only the game asked for is
+    unpacked, so multi-gigabyte files open instantly and stream at disk speed."""
+
+    def __init__(self, path) -> None:
+        self.file = open(path, "rb")
+        self.map = self.view = None
+        size = os.fstat(self.file.fileno()).st_size
+        try:
+            if size < HEADER.size: raise ValueError("not a Briscola game record file")
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            read_header(self.map)
+        except Exception:  # Nothing stays open when the file is refused
+            self.close()
+            raise
+        self.count = (size - HEADER.size) // RECORD.size  # A partial record left by a crash is ignored
+        self.view = memoryview(self.map)[HEADER.size:HEADER.size + self.count * RECORD.size]
+
+    def __enter__(self) -> "RecordReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i) -> tuple:
+        """(seed, briscola, plays) of game i, plays is a zero copy memoryview of the cards played."""
+        if i < 0: i += self.count
+        if i < 0 or i >= self.count: raise IndexError("game index out of range")
+        offset = i * RECORD.size
+        seed, briscola, played = struct.unpack_from("<QBB", self.view, offset)
+        start = offset + RECORD.size - DECK_SIZE
+        return seed, briscola, self.view[start:start + played]
+
+    def __iter__(self):
+        """Yields (seed, briscola, plays) for every game in file order, plays as bytes."""
+        for seed, briscola, played, plays in RECORD.iter_unpack(self.view):
+            yield seed, briscola, plays[:played]
+
+    def array(self):
+        """All records as a NumPy structured array on top of the map (needs numpy), for vectorized analysis."""
+        import numpy as np
+        dtype = np.dtype([("seed", "<u8"), ("briscola", "u1"), ("played", "u1"), ("plays", "u1", DECK_SIZE)])
+        return np.frombuffer(self.view, dtype=dtype, count=self.count)
+
+    def close(self):  # Plays views and arrays handed out stay valid, the map goes away with the last of them
+        try:
+            if self.view is not None: self.view.release()
+            if self.map is not None: self.map.close()
+        except BufferError: pass
+        self.view = None
+        self.map = None
+        self.file.close()
@@ -0,0 +1,110 @@
+import struct
+
+from game.bitboard import HAND_PILES
+from game.consts import SUIT
+from game.engine import GameState, NO_CARD
+from game.tricks import SUIT_BLOCK
+
+# Fast forward replay of a recorded game (seed + cards played, see game/records.py)
+# Moves are applied to a GameState directly, no animation frames, and a compact snapshot is kept every few tricks
+# so seeking to any move restores the nearest snapshot before it and plays at most a few tricks forward
+
+
+CHECKPOINT_TRICKS = 2  # Tricks between snapshots, seeks replay at most 2 * CHECKPOINT_TRICKS - 1 cards
+EMPTY = 0xFF  # NO_CARD in a snapshot
+
+# Hand slots, foundations, stock length, briscola, leader, to move, last winner, tricks, scores, cards in deck0
+SNAPSHOT = struct.Struct("<6s2sBBBBBBBBB")
+
+
+def pack_state(state: GameState) -> bytes:
+    """Everything the deal and the move number don't tell, about 20 bytes plus the captured cards."""
+    slots = bytes(card & EMPTY for card in state.hands[0] + state.hands[1])
+    foundations = bytes(card & EMPTY for card in state.foundations)
+    return SNAPSHOT.pack(
+        slots, foundations, len(state.stock), state.briscola & EMPTY,
+        state.leader, state.to_move, state.last_winner, state.tricks,
+        state.scores[0], state.scores[1], len(state.decks[0]),
+    ) + bytes(state.decks[0]) + bytes(state.decks[1])
+
+
+def unpack_state(data, deck, history) -> GameState:
+    """Rebuilds the GameState pack_state saved, deck is the shuffled deck of the game and history the cards played."""
+    slots, foundations, stock_len, briscola, leader, to_move, last_winner, tricks, score0, score1, deck0 = SNAPSHOT.unpack_from(data)
+    captured = data[SNAPSHOT.size:]
+
+    state = GameState.__new__(GameState)
+    state.deck = deck
+    state.stock = deck[:stock_len]
+    state.briscola = briscola if briscola != EMPTY else NO_CARD
+    state.briscola_suit = SUIT[deck[-7]]
+    state.trick_row = state.briscola_suit * SUIT_BLOCK
+    cards = [card if card != EMPTY else NO_CARD for card in slots]
+    state.hands = [cards[:3], cards[3:]]
+    state.foundations = [card if card != EMPTY else NO_CARD for card in foundations]
+    state.decks = [list(captured[:deck0]), list(captured[deck0:])]
+    state.scores = [score0, score1]
+    state.leader = leader
+    state.to_move = to_move
+    state.last_winner = last_winner
+    state.tricks = tricks
+    state.history = list(history)
+    state.tracker = None
+    return state
+
+
+def lay_out(state: GameState, piles, cards, now=True):
+    """Puts the cards of a GameState on App.piles (cards is App.cards) in their places, at once or sliding there with
+    now=False. Only the briscola and the foundations are face up."""
+    for pile in piles.values(): pile.clear()
+    for card in cards: card.set_face_down()
+
+    piles['stock'].add([cards[card] for card in state.stock])
+    for player, names in enumerate(HAND_PILES):
+        for name, card in zip(names, state.hands[player]):
+            if card != NO_CARD: piles[name].add([cards[card]])
+    for player in (0, 1):
+        piles[f'deck{player}'].add([cards[card] for card in state.decks[player]])
+
+    for name, card in (('briscola', state.briscola), ('foundation0', state.foundations[0]), ('foundation1', state.foundations[1])):
+        if card != NO_CARD:
+            cards[card].set_face_up()
+            piles[name].add([cards[card]])
+
+    for pile in piles.values(): pile.position_cards(now=now)
+
+
+class Replay:  # One recorded game, snapshots every `every` tricks are taken the first time a seek plays past them
+    def __init__(self, seed, plays, every=CHECKPOINT_TRICKS) -> None:
+        self.seed = seed
+        self.plays = bytes(plays)
+        self.stride = 2 * every  # Cards between snapshots
+
+        state = GameState()
+        state.deal(seed)
+        self.deck = state.deck
+        self.snapshots = [pack_state(state)]  # snapshots[k] is the state after k * stride cards
+
+    @classmethod
+    def from_record(cls, record, every=CHECKPOINT_TRICKS) -> "Replay":
+        """From a (seed, briscola, plays) record of game/records.py, checks the briscola against the deal."""
+        seed, briscola, plays = record
+        replay = cls(seed, plays, every)
+        if replay.deck[-7] != briscola: raise ValueError(f"record's briscola {briscola} does not match the deal of seed {seed}")
+        return replay
+
+    def __len__(self) -> int:  # Number of moves, positions go from 0 (the deal) to len(replay)
+        return len(self.plays)
+
+    def state_at(self, move) -> GameState:
+        """The game after its first `move` cards."""
+        if not 0 <= move <= len(self.plays): raise IndexError(f"move {move} out of range 0..{len(self.plays)}")
+        snapshots, stride = self.snapshots, self.stride
+        checkpoint = min(move // stride, len(snapshots) - 1)
+        start = checkpoint * stride
+        state = unpack_state(snapshots[checkpoint], self.deck, self.plays[:start])
+
+        for i in range(start, move):
+            state.play(self.plays[i])
+            if (i + 1) % stride == 0 and (i + 1) // stride == len(snapshots): snapshots.append(pack_state(state))
+        return state
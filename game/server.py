@@ -0,0 +1,206 @@
+from time import perf_counter, process_time
+import argparse
+import asyncio
+import json
+import random
+
+from game.engine import GameState, NO_CARD
+from game.records import RecordWriter
+
+# Briscola as a service: one asyncio process hosting many independent tables, driven by line delimited JSON over TCP
+# Every table goes through the statuses App.update does ("play" -> "foudations_ready" -> "pause" -> "new_hand" ->
+# "play" or "win"), with client messages where the GUI polls the mouse and the R key. A connection can open any
+# number of tables, every request gets exactly one reply line, in order, so clients can pipeline requests.
+#
+# Requests                                             Replies
+#   {"op": "new", "table": 1, "seed": 7}                 {"table": 1, "status": "play", "seed": 7, "briscola": 23, ...}
+#   {"op": "play", "table": 1, "card": 12}               the table's view, see Table.view
+#   {"op": "end_round", "table": 1}                      (the R key, leaves "pause")
+#   {"op": "close", "table": 1}                          {"table": 1, "status": "closed"}
+#   {"op": "stats"}                                      {"tables": ..., "connections": ..., "moves": ...}
+# Errors reply {"error": "...", "table": ...} and leave the table as it was.
+# Backpressure: a connection whose client doesn't read its replies stops being read until the replies drain.
+
+
+PORT = 7357
+MAX_LINE = 4096  # Longest request, a client sending more without a newline is disconnected
+MAX_TABLES = 100000  # Open tables over all connections
+WRITE_HIGH_WATER = 64 * 1024  # Unsent reply bytes at which a connection stops being read
+
+# Bound methods of one decoder and encoder, json.loads and json.dumps build them again on every call
+decode = json.JSONDecoder().decode
+encode = json.JSONEncoder(separators=(",", ":"), check_circular=False).encode
+
+
+def is_integer(value) -> bool:  # JSON true and false decode to bools, which Python counts as ints
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class Table:  # One game, a GameState driven through App.update's statuses
+    __slots__ = ("state", "seed", "status", "trick_winner")
+
+    def __init__(self, seed) -> None:
+        self.state = GameState()
+        self.seed = seed
+        self.state.deal(seed)  # "new": the same deal App.new_game(seed) makes
+        self.status = "play"
+        self.trick_winner = None
+
+    def play(self, card):
+        if self.status != "play": raise ValueError(f"can't play a card during {self.status}")
+        winner = self.state.play(card)  # ValueError if the card isn't in the hand of the player to move
+        if winner is not None:
+            # "foudations_ready": both cards are down and the engine has decided the trick, the table waits in
+            # "pause" with the winner shown until the client ends the round
+            self.trick_winner = winner
+            self.status = "pause"
+
+    def end_round(self):
+        if self.status != "pause": raise ValueError(f"no round to end during {self.status}")
+        # "new_hand": the engine already gave the cards to the winner and refilled the hands when it decided the trick
+        self.status = "win" if self.state.is_terminal() else "play"
+
+    def view(self, table_id) -> dict:
+        """What the client needs to drive the table, like the GUI only the hand of the player to move is shown."""
+        state = self.state
+        if self.status == "play":
+            return {"table": table_id, "status": "play", "to_move": state.to_move,
+                    "hand": [card for card in state.hands[state.to_move] if card != NO_CARD],
+                    "foundations": state.foundations, "stock": len(state.stock), "briscola": state.briscola}
+        if self.status == "pause": return {"table": table_id, "status": "pause", "trick": self.trick_winner, "scores": state.scores}
+        return {"table": table_id, "status": "win", "winner": state.overall_winner(), "scores": state.scores}
+
+
+class TableServer:  # Tables and counters shared by every connection
+    def __init__(self, max_tables=MAX_TABLES, record_path=None, seed=None) -> None:
+        self.max_tables = max_tables
+        self.rng = random.Random(seed)  # Seeds of the games whose client gave none
+        self.records = RecordWriter(record_path) if record_path else None  # Every finished game (game/records.py)
+        self.tables = 0
+        self.connections = 0
+        self.moves = 0
+        self.games = 0
+        self.requests = 0
+        self.started = perf_counter()
+
+    def stats(self) -> dict:
+        elapsed = perf_counter() - self.started
+        return {"tables": self.tables, "connections": self.connections, "moves": self.moves, "games": self.games,
+                "requests": self.requests, "seconds": round(elapsed, 3), "cpu_seconds": round(process_time(), 3)}
+
+    def protocol(self) -> "TableProtocol":  # Factory for loop.create_server
+        return TableProtocol(self)
+
+    def close(self):
+        if self.records: self.records.close()
+
+
+class TableProtocol(asyncio.Protocol):  # One client connection and the tables it opened
+    def __init__(self, server: TableServer) -> None:
+        self.server = server
+        self.tables = {}  # Client's table id -> Table
+        self.buffer = b""  # Start of a request whose newline hasn't arrived yet
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=WRITE_HIGH_WATER)
+        self.server.connections += 1
+
+    def connection_lost(self, exc):
+        self.server.connections -= 1
+        self.server.tables -= len(self.tables)
+        self.tables.clear()
+
+    # Backpressure, asyncio calls these when the unsent replies go over the high water mark and back under the low one
+    def pause_writing(self):
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.transport.resume_reading()
+
+    def data_received(self, data):
+        complete, _, self.buffer = (self.buffer + data).rpartition(b"\n")
+        if len(self.buffer) > MAX_LINE:
+            self.transport.write(b'{"error":"request too long"}\n')
+            self.transport.close()
+            return
+        if not complete: return
+
+        # Tables are plain Python objects, every request is handled right here and all replies go out in one write
+        replies = [encode(self.handle(line)) for line in complete.decode(errors="replace").split("\n") if line.strip()]
+        if replies: self.transport.write(("\n".join(replies) + "\n").encode())
+
+    def handle(self, line) -> dict:
+        server = self.server
+        server.requests += 1
+        try: request = decode(line)
+        except ValueError: return {"error": "invalid JSON"}
+        if not isinstance(request, dict): return {"error": "requests are JSON objects"}
+
+        op = request.get("op")
+        table_id = request.get("table")
+        if op == "stats": return server.stats()
+        if not (is_integer(table_id) or isinstance(table_id, str)): return {"error": "missing table id"}
+
+        table = self.tables.get(table_id)
+        if op == "new":
+            seed = request.get("seed")
+            if seed is None: seed = server.rng.getrandbits(64)
+            elif not is_integer(seed) or not 0 <= seed < 1 << 64: return {"error": "seed must be an integer from 0 to 2^64-1", "table": table_id}
+            if table is None:
+                if server.tables >= server.max_tables: return {"error": "server full", "table": table_id}
+                server.tables += 1
+            table = self.tables[table_id] = Table(seed)
+            reply = table.view(table_id)
+            reply["seed"] = seed
+            return reply
+
+        if table is None: return {"error": "no such table", "table": table_id}
+        try:
+            if op == "play":
+                card = request.get("card")
+                if not is_integer(card): return {"error": "card must be an integer", "table": table_id}
+                table.play(card)
+                server.moves += 1
+            elif op == "end_round":
+                table.end_round()
+                if table.status == "win":
+                    server.games += 1
+                    state = table.state
+                    if server.records: server.records.write_game(table.seed, state.deck[-7], state.history)
+            elif op == "close":
+                del self.tables[table_id]
+                server.tables -= 1
+                return {"table": table_id, "status": "closed"}
+            else: return {"error": f"unknown op {op!r}", "table": table_id}
+        except ValueError as error: return {"error": str(error), "table": table_id}
+        except (KeyError, TypeError) as error: return {"error": f"malformed request: {error!r}", "table": table_id}
+        return table.view(table_id)
+
+
+async def serve(host="127.0.0.1", port=PORT, server: TableServer = None, ready=None):
+    """Runs the server until cancelled, ready(port) is called once it listens (port=0 picks a free one)."""
+    server = server or TableServer()
+    listener = await asyncio.get_running_loop().create_server(server.protocol, host, port)
+    if ready: ready(listener.sockets[0].getsockname()[1])
+    try:
+        async with listener: await listener.serve_forever()
+    finally: server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="briscola.py server", description="Mini-Briscola table server (line delimited JSON over TCP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=PORT)
+    parser.add_argument("--max-tables", type=int, default=MAX_TABLES)
+    parser.add_argument("-r", "--record", metavar="PATH", help="append every finished game to a binary record file (game/records.py)")
+    args = parser.parse_args(argv)
+
+    server = TableServer(args.max_tables, args.record)
+    try: asyncio.run(serve(args.host, args.port, server, ready=lambda port: print(f"serving tables on {args.host}:{port}", flush=True)))
+    except KeyboardInterrupt: pass
+
+
+if __name__ == '__main__':
+    main()
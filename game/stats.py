@@ -0,0 +1,192 @@
+from array import array
+import argparse
+import json
+
+import numpy as np
+
+from game.bitboard import mask_of
+from game.consts import DECK_SIZE
+from game.enums import Suit
+from game.tracker import RANK_NAMES
+
+# Streaming statistics of finished games in fixed memory: every game lands in integer count tables and is then
+# forgotten, so shards aggregated in different processes or on different machines merge exactly by adding the tables,
+# in any order. Seat 0 always leads the first trick (GameState.deal), so seat 0 is the first mover.
+# Points are integers from 0 to 120, so a histogram is an exact quantile sketch and the moments are exact integer sums
+# (a Welford running mean would only add rounding that depends on the merge order). Read back from the tables:
+# win/tie/loss rates (60-60 is a tie, like overall_winner), points by seat, mean, variance and quantiles, by
+# briscola suit, and how often each card ends in each seat's deck.
+# Games between two players A and B record whether they swapped seats, so results by player come out too.
+#
+#   stats = GameStats()
+#   stats.add(state)                      a finished GameState, buffered and counted in bulk
+#   stats.add_batch(sim)                  every game of a finished BatchSim(n, captures=True)
+#   stats.merge(shard)                    another GameStats, e.g. from a worker
+#   GameStats.from_json(stats.to_json())  shards travel as JSON, exact integers
+
+
+SUITS = 4
+GROUPS = 2 * SUITS  # Swapped seats (0 or 1) times briscola suit
+POINTS_BINS = 121
+BUFFER = 1 << 14  # Games add() keeps before counting them with NumPy
+PERCENTILES = (5, 25, 50, 75, 95)
+SUIT_NAMES = tuple(Suit(suit).name for suit in range(SUITS))
+
+
+class GameStats:
+    def __init__(self) -> None:
+        self.points = np.zeros((2, SUITS, POINTS_BINS), dtype=np.int64)  # [swapped, briscola suit, seat 0's points] -> games
+        self.captures = np.zeros((2, SUITS, DECK_SIZE), dtype=np.int64)  # [swapped, briscola suit, card] -> games seat 0 took it
+        self._groups = array('B')  # Buffered games: swapped * SUITS + briscola suit, seat 0's points, seat 0's captured cards
+        self._scores = array('B')
+        self._masks = array('Q')
+
+    @property
+    def games(self) -> int:
+        self.flush()
+        return int(self.points.sum())
+
+    def add(self, state, swapped=False):
+        """A finished game.engine.GameState, swapped=True when player B sat in seat 0."""
+        self._groups.append(swapped * SUITS + state.briscola_suit)
+        self._scores.append(state.scores[0])
+        self._masks.append(mask_of(state.decks[0]))
+        if len(self._scores) >= BUFFER: self.flush()
+
+    def add_arrays(self, scores0, briscola_suit, captured0, swapped=None):
+        """N games at once: seat 0's points, briscola suits, seat 0's captured cards as uint64 masks, swapped seats."""
+        groups = np.asarray(briscola_suit, dtype=np.intp)
+        if swapped is not None: groups = groups + np.asarray(swapped, dtype=np.intp) * SUITS
+        scores0 = np.asarray(scores0, dtype=np.intp)
+        self.points += np.bincount(groups * POINTS_BINS + scores0, minlength=GROUPS * POINTS_BINS).reshape(self.points.shape)
+
+        # One row of 40 bits per game, summed per group
+        masks = np.ascontiguousarray(captured0, dtype=np.uint64)
+        bits = np.unpackbits(masks.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')[:, :DECK_SIZE]
+        captures = self.captures.reshape(GROUPS, DECK_SIZE)
+        for group in np.unique(groups): captures[group] += bits[groups == group].sum(axis=0, dtype=np.int64)
+
+    def add_batch(self, sim, swapped=None):  # Every game of a finished game.batch.BatchSim made with captures=True
+        if sim.captured0 is None: raise ValueError("the BatchSim doesn't track captures, make it with captures=True")
+        self.add_arrays(sim.scores[0], sim.briscola_suit, sim.captured0, swapped)
+
+    def flush(self):  # Counts the games add() buffered
+        if not self._scores: return
+        self.add_arrays(np.frombuffer(self._scores, dtype=np.uint8), np.frombuffer(self._groups, dtype=np.uint8) % SUITS,
+                        np.frombuffer(self._masks, dtype=np.uint64), np.frombuffer(self._groups, dtype=np.uint8) // SUITS)
+        self._groups = array('B')
+        self._scores = array('B')
+        self._masks = array('Q')
+
+    def merge(self, other: "GameStats"):
+        self.flush()
+        other.flush()
+        self.points += other.points
+        self.captures += other.captures
+
+    def __eq__(self, other) -> bool:
+        self.flush()
+        other.flush()
+        return np.array_equal(self.points, other.points) and np.array_equal(self.captures, other.captures)
+
+    def to_json(self) -> str:
+        self.flush()
+        return json.dumps({"points": self.points.tolist(), "captures": self.captures.tolist()})
+
+    @classmethod
+    def from_json(cls, text) -> "GameStats":
+        data = json.loads(text)
+        stats = cls()
+        stats.points[:] = data["points"]
+        stats.captures[:] = data["captures"]
+        return stats
+
+    # Queries, all from the seat 0 histograms: `suit` picks one briscola suit, `player` (0: A, 1: B) looks
+    # from a player's side, whichever seat they had, instead of from a seat
+    def histogram(self, seat=0, suit=None, player=None) -> np.ndarray:
+        """Games by points, index 0-120, of the seat (or player)."""
+        self.flush()
+        points = self.points if suit is None else self.points[:, suit:suit + 1]
+        if player is None:
+            histogram = points.sum(axis=(0, 1))
+            return histogram if seat == 0 else histogram[::-1]
+        own, other = points[player].sum(axis=0), points[1 - player].sum(axis=0)  # Seat 0's points when player sat there, or not
+        return own + other[::-1]
+
+    def outcomes(self, seat=0, suit=None, player=None) -> tuple:  # (wins, ties, losses) of the seat or player
+        histogram = self.histogram(seat, suit, player)
+        return int(histogram[61:].sum()), int(histogram[60]), int(histogram[:60].sum())
+
+    def moments(self, seat=0, suit=None, player=None) -> tuple:  # (games, mean, variance) of the points, exact sums
+        histogram = self.histogram(seat, suit, player)
+        values = np.arange(POINTS_BINS)
+        n = int(histogram.sum())
+        if n == 0: return 0, 0.0, 0.0
+        total, squares = int(histogram @ values), int(histogram @ values ** 2)
+        return n, total / n, (squares * n - total * total) / (n * n)
+
+    def quantiles(self, seat=0, suit=None, player=None, percentiles=PERCENTILES) -> tuple:
+        """Nearest rank percentiles of the points, like FrameTimer.percentiles."""
+        histogram = self.histogram(seat, suit, player)
+        n = int(histogram.sum())
+        if n == 0: return (0,) * len(percentiles)
+        cumulative = np.cumsum(histogram)
+        return tuple(int(np.searchsorted(cumulative, min(n - 1, n * p // 100), side='right')) for p in percentiles)
+
+    def capture_rates(self, seat=0, suit=None) -> np.ndarray:  # (40,) share of the games in which the seat took each card
+        self.flush()
+        captures = self.captures if suit is None else self.captures[:, suit:suit + 1]
+        games = self.points if suit is None else self.points[:, suit:suit + 1]
+        n = max(int(games.sum()), 1)
+        taken = captures.sum(axis=(0, 1))
+        return (taken if seat == 0 else n - taken) / n
+
+    def trump_capture_rates(self, seat=0) -> np.ndarray:  # (10,) share of the games in which the seat took each trump rank, Ace first
+        self.flush()
+        taken = sum(self.captures[:, suit, suit * 10:suit * 10 + 10].sum(axis=0) for suit in range(SUITS))
+        n = max(int(self.points.sum()), 1)
+        return (taken if seat == 0 else n - taken) / n
+
+    def report(self) -> str:
+        n = self.games
+        if n == 0: return "no games"
+        lines = [f"{n:,} games"]
+
+        def row(label, **view):
+            wins, ties, losses = self.outcomes(**view)
+            games, mean, variance = self.moments(**view)
+            if games == 0: return
+            quantiles = " ".join(f"{q:3d}" for q in self.quantiles(**view))
+            lines.append(f"{label:24s} {games:>11,} {wins / games:7.2%} {ties / games:6.2%} {losses / games:7.2%} "
+                         f"{mean:6.2f} {variance ** 0.5:5.2f}   {quantiles}")
+
+        lines.append(f"{'points of':24s} {'games':>11s} {'wins':>7s} {'ties':>6s} {'losses':>7s} {'mean':>6s} {'std':>5s}   "
+                     + " ".join(f"p{p:<2d}" for p in PERCENTILES))
+        row("seat 0 (first mover)", seat=0)
+        row("seat 1", seat=1)
+        if self.points[1].any():
+            row("player A", player=0)
+            row("player B", player=1)
+        for suit in range(SUITS): row(f"seat 0, briscola {SUIT_NAMES[suit]}", seat=0, suit=suit)
+
+        rates = self.trump_capture_rates()
+        lines.append("trumps taken by seat 0: " + " ".join(f"{RANK_NAMES[rank]} {rates[rank]:.0%}" for rank in range(10)))
+        rates = self.capture_rates()
+        most, least = int(rates.argmax()), int(rates.argmin())
+        lines.append(f"cards taken by seat 0: {rates.mean():.1%} on average, most {RANK_NAMES[most % 10]} of {SUIT_NAMES[most // 10]} "
+                     f"{rates[most]:.1%}, least {RANK_NAMES[least % 10]} of {SUIT_NAMES[least // 10]} {rates[least]:.1%}")
+        return "\n".join(lines)
+
+
+def main(argv=None):  # python briscola.py stats shard.json ... [-o merged.json]: merges shards and prints the report
+    parser = argparse.ArgumentParser(prog="briscola.py stats", description="Merge and report game statistics shards")
+    parser.add_argument("shards", nargs="+", metavar="JSON", help="files written by GameStats.to_json (e.g. tournament --stats)")
+    parser.add_argument("-o", "--output", metavar="PATH", help="also write the merged shards")
+    args = parser.parse_args(argv)
+
+    stats = GameStats()
+    for path in args.shards:
+        with open(path) as file: stats.merge(GameStats.from_json(file.read()))
+    if args.output:
+        with open(args.output, "w") as file: file.write(stats.to_json())
+    print(stats.report())
@@ -0,0 +1,91 @@
+from game.bitboard import BitState, NO_CARD
+
+# Suit symmetry: only the briscola suit (and the suit led, which the cards on the table carry) is special, the other
+# suits play the same, so relabeling suits gives a position of the same value. canonicalize() picks one labeling
+# for every class of equivalent positions, caches keyed on the canonical position share their entries.
+# A permutation perm is a tuple with perm[suit] = new label, cards are suit * 10 + rank so a relabeled card keeps its rank
+
+
+SUITS = 4
+RANKS = 10
+SUIT_BITS = (1 << RANKS) - 1  # One suit's cards in a 40 bit mask, shifted by suit * RANKS
+IDENTITY = (0, 1, 2, 3)
+
+SUIT_ORDER = [bytes(card % RANKS + 1 if card // RANKS == suit else 0 for card in range(256)) for suit in range(SUITS)]  # translate tables for suit_signatures
+_translations = {}  # perm -> bytes.translate table relabeling card numbers, at most 24 of them
+
+
+def map_card(card, perm) -> int:
+    return card if card == NO_CARD else perm[card // RANKS] * RANKS + card % RANKS
+
+
+def map_mask(mask, perm) -> int:
+    a, b, c, d = perm
+    return ((mask & SUIT_BITS) << a * RANKS | (mask >> RANKS & SUIT_BITS) << b * RANKS
+            | (mask >> 2 * RANKS & SUIT_BITS) << c * RANKS | (mask >> 3 * RANKS) << d * RANKS)
+
+
+def invert(perm) -> tuple:  # The permutation that undoes perm
+    inverse = [0] * SUITS
+    for suit, label in enumerate(perm): inverse[label] = suit
+    return tuple(inverse)
+
+
+def suit_signatures(state: BitState) -> list:
+    """Everything about each suit's cards in a position, seen from the suit: two suits with the same signature can
+    swap labels without changing the position. Signatures are (int of the suit's masks and table cards, the stock
+    order with the suit's cards as rank + 1 and every other card as 0)."""
+    table = [0] * SUITS
+    for card, place in ((state.f0, 8), (state.f1, 4), (state.briscola, 0)):
+        if card != NO_CARD: table[card // RANKS] |= (card % RANKS + 1) << place
+
+    hand0, hand1, deck0, deck1, stock = state.hand0, state.hand1, state.deck0, state.deck1, state.stock
+    order = state.order[:state.stock_len]
+    signatures = []
+    for suit in range(SUITS):
+        shift = suit * RANKS
+        masks = ((hand0 >> shift & SUIT_BITS) << 4 * RANKS | (hand1 >> shift & SUIT_BITS) << 3 * RANKS
+                 | (deck0 >> shift & SUIT_BITS) << 2 * RANKS | (deck1 >> shift & SUIT_BITS) << RANKS | (stock >> shift & SUIT_BITS))
+        signatures.append((masks << 12 | table[suit], order.translate(SUIT_ORDER[suit])))
+    return signatures
+
+
+def canonical_permutation(state: BitState) -> tuple:
+    """The briscola suit becomes suit 0 and the other three are ordered by their signatures."""
+    signatures = suit_signatures(state)
+    others = sorted((suit for suit in range(SUITS) if suit != state.briscola_suit), key=signatures.__getitem__, reverse=True)
+    perm = [0] * SUITS
+    for label, suit in enumerate(others, 1): perm[suit] = label
+    perm[state.briscola_suit] = 0
+    return tuple(perm)
+
+
+def relabel(state: BitState, perm) -> BitState:
+    """Copy of the position with every card's suit relabeled."""
+    relabeled = state.copy()
+    if perm == IDENTITY: return relabeled
+    relabeled.hand0 = map_mask(state.hand0, perm)
+    relabeled.hand1 = map_mask(state.hand1, perm)
+    relabeled.deck0 = map_mask(state.deck0, perm)
+    relabeled.deck1 = map_mask(state.deck1, perm)
+    relabeled.stock = map_mask(state.stock, perm)
+    relabeled.seen = map_mask(state.seen, perm)
+    relabeled.f0 = map_card(state.f0, perm)
+    relabeled.f1 = map_card(state.f1, perm)
+    relabeled.briscola = map_card(state.briscola, perm)
+    relabeled.briscola_suit = perm[state.briscola_suit]
+    table = _translations.get(perm)
+    if table is None: table = _translations[perm] = bytes(map_card(card, perm) if card < SUITS * RANKS else card for card in range(256))
+    relabeled.order = state.order.translate(table)
+    return relabeled
+
+
+def canonicalize(state: BitState) -> tuple:
+    """(canonical position, perm, inverse): perm maps the position's cards to the canonical one's, inverse maps
+    answers about the canonical position (e.g. a best card) back with map_card(card, inverse)."""
+    perm = canonical_permutation(state)
+    return relabel(state, perm), perm, invert(perm)
+
+
+def canonical_key(state: BitState) -> tuple:  # BitState.key() of the canonical position
+    return relabel(state, canonical_permutation(state)).key()
@@ -0,0 +1,213 @@
+from math import comb
+from multiprocessing import get_context
+import argparse
+import mmap
+import os
+
+from game.bitboard import NO_CARD, cards_of, mask_points
+from game.consts import DECK_SIZE, POINTS
+from game.symmetry import map_card, map_mask
+from game.tricks import TRICK_WINNER, PAIRS
+
+# Endgame tablebase: the value of every position of the last three tricks, generated once offline and read through
+# a memory map, so a lookup is a few byte reads and every process that opens the file shares its pages.
+# Once the stock and the briscola pile are empty both hands are known. At the start of a trick a position is the
+# leader's hand, the other hand (k cards each, k = 1..3) and the briscola suit. The table holds the points the
+# leader still takes with perfect play from both sides, one byte per position. The briscola suit is relabeled to
+# suit 0 (game/symmetry.py), which makes the table 4x smaller. Only the briscola suit is: ordering the other three
+# too (symmetry.canonical_permutation) would save up to 6x more, but the positions left could not be numbered from
+# the two hands alone and the file would need a sorted key index. Positions are numbered with the combinatorial number
+# system, so every position has its own slot and the file needs no keys:
+#   index = OFFSET[k] + rank(leader's hand) * C(40 - k, k) + rank(other hand, numbered among the cards left)
+# where rank is the colex rank of a set of cards, sum of C(card, i + 1) over its cards in order.
+# Positions with a card on the table and best cards are one ply of lookups away (Tablebase.solve).
+# Generated level by level (1 card each first) on a process pool with NumPy, each worker writing its slice of the file.
+#
+#   python briscola.py tablebase [--workers N]      writes game/endgame.tb, about 77 MB
+#   table = tablebase.load()                        None if the file wasn't generated
+#   value, card = table.solve(bit_state)            same answer as EndgameSolver.solve
+
+
+TABLEBASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "endgame.tb")
+MAGIC = b"briscola endgame tablebase 1\n"
+TRICKS = 3
+COUNTS = [comb(DECK_SIZE, k) * comb(DECK_SIZE - k, k) for k in range(TRICKS + 1)]  # Positions with k cards in each hand
+OFFSETS = [len(MAGIC) + sum(COUNTS[1:k]) for k in range(TRICKS + 2)]  # File offset of level k, OFFSETS[TRICKS + 1] is the file size
+CHUNK = 64  # Leader's hands per job
+SWAPS = tuple(tuple(0 if suit == briscola_suit else briscola_suit if suit == 0 else suit for suit in range(4)) for briscola_suit in range(4))  # Briscola suit <-> suit 0
+COMB = [[comb(card, i) for i in range(TRICKS + 1)] for card in range(DECK_SIZE)]
+
+
+def rank(mask, skip=0) -> int:  # Colex rank of a set of cards, numbered among the cards not in `skip`
+    total = i = 0
+    while mask:
+        low = mask & -mask
+        i += 1
+        total += COMB[low.bit_length() - 1 - (skip & (low - 1)).bit_count()][i]
+        mask ^= low
+    return total
+
+
+def leads(lead, card) -> bool:  # The card led takes the trick, with the briscola relabeled to suit 0
+    return TRICK_WINNER[lead * DECK_SIZE + card] == 0
+
+
+class Tablebase:
+    def __init__(self, path=TABLEBASE) -> None:
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)  # Read only and shared, pages load on first use
+        if self.data[:len(MAGIC)] != MAGIC or len(self.data) != OFFSETS[TRICKS + 1]:
+            self.close()
+            raise ValueError(f"{path} is not an endgame tablebase, generate it again with: python briscola.py tablebase")
+
+    def close(self):
+        if not self.data.closed: self.data.close()
+        self.file.close()
+
+    def points(self, leader, other) -> int:
+        """Points the leader still takes with perfect play, hands as masks with the briscola as suit 0."""
+        k = leader.bit_count()
+        if k == 0: return 0
+        return self.data[OFFSETS[k] + rank(leader) * COMB[DECK_SIZE - k][k] + rank(other, leader)]
+
+    def lead(self, own, other) -> tuple:  # (points the player to lead takes, best card to lead), briscola as suit 0
+        best, best_card = -1, NO_CARD
+        for card in cards_of(own):
+            rest = own ^ 1 << card
+            worst = 1000
+            for answer in cards_of(other):
+                after = other ^ 1 << answer
+                if leads(card, answer): value = POINTS[card] + POINTS[answer] + self.points(rest, after)
+                else: value = mask_points(rest | after) - self.points(after, rest)
+                if value < worst: worst = value
+            if worst > best: best, best_card = worst, card
+        return best, best_card
+
+    def answer(self, lead, own, other) -> tuple:  # (points the player answering `lead` takes, best answer), briscola as suit 0
+        best, best_card = -1, NO_CARD
+        for card in cards_of(own):
+            rest = own ^ 1 << card
+            trick = POINTS[lead] + POINTS[card]
+            if leads(lead, card): value = mask_points(rest | other) - self.points(other, rest)
+            else: value = trick + self.points(rest, other)
+            if value > best: best, best_card = value, card
+        return best, best_card
+
+    def solve(self, state) -> tuple:
+        """(points player 0 still takes with perfect play from both sides, best card for the player to move) of a
+        game.bitboard.BitState with the stock and the briscola pile empty, like EndgameSolver.solve."""
+        if state.stock_len or state.briscola != NO_CARD: raise ValueError("the tablebase only has positions with the stock and the briscola pile empty")
+        perm = SWAPS[state.briscola_suit]  # Its own inverse
+        mover = state.to_move
+        hands = (map_mask(state.hand0, perm), map_mask(state.hand1, perm))
+        lead = state.f0 if state.f0 != NO_CARD else state.f1
+        stake = mask_points(state.hand0 | state.hand1)
+        if lead == NO_CARD:
+            if not hands[mover]: return 0, NO_CARD
+            value, card = self.lead(hands[mover], hands[1 - mover])
+        else:
+            stake += POINTS[lead]
+            value, card = self.answer(map_card(lead, perm), hands[mover], hands[1 - mover])
+        return (value if mover == 0 else stake - value), map_card(card, perm)
+
+
+_loaded = {}  # path -> Tablebase or None, one map per process
+
+
+def load(path=TABLEBASE):
+    """The tablebase at `path`, opened once per process, None if it doesn't exist."""
+    if path not in _loaded: _loaded[path] = Tablebase(path) if os.path.exists(path) else None
+    return _loaded[path]
+
+
+# Generator, NumPy is only imported here
+def hands_array(k):  # Every set of k cards as sorted rows, in colex rank order
+    import numpy as np
+    from itertools import combinations
+    return np.array(sorted(combinations(range(DECK_SIZE), k), key=lambda cards: cards[::-1]), dtype=np.intp).reshape(-1, k)
+
+
+def ranks(cards, skip=None):
+    """Colex ranks of sorted rows of cards, numbered among the cards not in the rows of `skip`."""
+    import numpy as np
+    if skip is not None and skip.shape[1]: cards = cards - (skip[:, :, None] < cards[:, None, :]).sum(axis=1)
+    return np.asarray(COMB, dtype=np.intp)[cards, np.arange(1, cards.shape[1] + 1)].sum(axis=1)
+
+
+def solve_chunk(job):
+    """Pool worker: (path, k, first, last) solves the positions of the leader's hands ranked first..last - 1 from the
+    k - 1 level already in the file, and writes them."""
+    import numpy as np
+    path, k, first, last = job
+    table = np.memmap(path, dtype=np.uint8, mode="r+")
+    points = np.asarray(POINTS, dtype=np.intp)
+    lead_wins = np.frombuffer(TRICK_WINNER, dtype=np.uint8)[:PAIRS].reshape(DECK_SIZE, DECK_SIZE) == 0
+
+    leaders = hands_array(k)[first:last]
+    n, m = len(leaders), COUNTS[k] // comb(DECK_SIZE, k)
+    free = np.ones((n, DECK_SIZE), dtype=bool)
+    free[np.arange(n)[:, None], leaders] = False
+    left = np.nonzero(free)[1].reshape(n, DECK_SIZE - k)  # Cards not in each leader's hand
+    others = left[np.arange(n)[:, None, None], hands_array(k)[:m][None]].reshape(n * m, k)  # Every other hand, in rank order
+    leaders = np.repeat(leaders, m, axis=0)
+
+    below = table[OFFSETS[k - 1]:OFFSETS[k]] if k > 1 else None
+    stride = comb(DECK_SIZE - k + 1, k - 1)
+    columns = np.arange(k)
+    best = np.zeros(n * m, dtype=np.intp)
+    for i in range(k):
+        rest = leaders[:, columns != i]
+        worst = np.full(n * m, 1000, dtype=np.intp)
+        for j in range(k):
+            after = others[:, columns != j]
+            lead, card = leaders[:, i], others[:, j]
+            if below is None: won = lost = 0  # Last trick
+            else:  # The winner leads the rest: the leader keeps leading or takes what the other player leaves
+                won = below[ranks(rest) * stride + ranks(after, rest)]
+                lost = points[rest].sum(axis=1) + points[after].sum(axis=1) - below[ranks(after) * stride + ranks(rest, after)]
+            value = np.where(lead_wins[lead, card], points[lead] + points[card] + won, lost)
+            np.minimum(worst, value, out=worst)
+        np.maximum(best, worst, out=best)
+
+    start = OFFSETS[k] + first * m
+    table[start:start + n * m] = best
+    table.flush()
+    return n
+
+
+def generate(path=TABLEBASE, workers=None, progress=None):
+    """Solves every position and writes the table to `path`, through a temporary file so readers never see half of one."""
+    workers = workers or os.cpu_count() or 1
+    partial = path + ".partial"
+    with open(partial, "wb") as file:
+        file.write(MAGIC)
+        file.truncate(OFFSETS[TRICKS + 1])
+
+    pool = get_context("spawn").Pool(workers) if workers > 1 else None
+    try:
+        for k in range(1, TRICKS + 1):  # Each level reads the one below it
+            hands = comb(DECK_SIZE, k)
+            jobs = [(partial, k, first, min(first + CHUNK, hands)) for first in range(0, hands, CHUNK)]
+            done = 0
+            for solved in (pool.imap_unordered(solve_chunk, jobs) if pool else map(solve_chunk, jobs)):
+                done += solved
+                if progress: progress(k, done, hands)
+    finally:
+        if pool: pool.terminate()
+    os.replace(partial, path)
+    _loaded.pop(path, None)
+
+
+def main(argv=None):  # python briscola.py tablebase [--workers N] [-o PATH]: generates the tablebase
+    from time import perf_counter
+    parser = argparse.ArgumentParser(prog="briscola.py tablebase", description="Generate the endgame tablebase")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("-o", "--output", metavar="PATH", default=TABLEBASE, help=f"where to write it (default: {TABLEBASE})")
+    args = parser.parse_args(argv)
+
+    def progress(k, done, hands):
+        print(f"\r{k} card{'s' * (k > 1)} each: {done}/{hands} leader's hands", end="\n" if done == hands else "", flush=True)
+
+    start = perf_counter()
+    generate(args.output, args.workers, progress)
+    print(f"{sum(COUNTS):,} positions in {perf_counter() - start:.1f} s, {OFFSETS[TRICKS + 1] / 1e6:.1f} MB written to {args.output}")
@@ -0,0 +1,279 @@
+from math import log, sqrt
+from multiprocessing import get_context
+from time import perf_counter
+import argparse
+import hashlib
+import os
+import random
+
+from game.bots import BOTS
+from game.engine import GameState
+from game.records import RecordWriter, pack_record
+
+# Bot vs bot tournaments spread over a process pool
+# Games are cut into fixed size chunks, chunk k always gets the same random.Random (seeded from the master seed and k)
+# whatever the number of workers, and the aggregator takes the chunks back in order, so the output never depends on the pool
+# Duplicate tournaments play every deal twice with the seats swapped and score the pair, so the luck of the deal
+# cancels out, and an SPRT can end a match as soon as the result is significant
+
+
+CHUNK_GAMES = 1000
+SPRT_CHUNK_GAMES = 100  # Smaller chunks for SPRT matches, so little is played past the decision
+
+
+def chunk_rng(master_seed, chunk) -> random.Random:  # String seeds are hashed with SHA-512, stable across runs and platforms
+    return random.Random(f"briscola:{master_seed}:{chunk}")
+
+
+def play_chunk(job) -> tuple:
+    """Plays one chunk, returns (chunk, bot A's points in every game as bytes, bot A's seats as bytes,
+    the games as packed game/records.py records or b"" when not recording).
+    With stream deals the decks come from game.deals (NumPy, block `chunk` of the master seed) instead of one seeded
+    Python shuffle per game, much cheaper but games have no seed to record.
+    With duplicate deals games 2k and 2k + 1 are the same deal, bot A in seat 0 then in seat 1.
+    With stats the chunk's game/stats.py GameStats shard is returned too, as a fifth element."""
+    chunk, games, bot_a, bot_b, master_seed, record, stream, duplicate, chunk_games, stats = job
+    rng = chunk_rng(master_seed, chunk)
+    bots = (BOTS[bot_a], BOTS[bot_b])
+    state = GameState()
+    if stream:
+        from game.deals import DealStream
+        deals = DealStream(master_seed, chunk * chunk_games)
+    points = bytearray(games)
+    seats = bytearray(games)
+    records = bytearray()
+    if stats:
+        from game.stats import GameStats
+        shard = GameStats()
+
+    for i in range(games):
+        seat_a = (chunk * chunk_games + i) % 2  # Bot A alternates seats
+        players = bots if seat_a == 0 else bots[::-1]
+        if duplicate and i % 2: state.deal_deck(list(state.deck))  # Same deal again, seats swapped, a new list so endgame_bot sees a new game
+        elif stream: deals.deal(state)
+        else:
+            seed = rng.getrandbits(64)
+            state.deal(seed)
+        while not state.is_terminal():
+            state.play(players[state.to_move](state, rng))
+        points[i] = state.scores[seat_a]
+        seats[i] = seat_a
+        if record: records += pack_record(seed, state.deck[-7], state.history)
+        if stats: shard.add(state, swapped=seat_a)
+
+    if stats: return chunk, bytes(points), bytes(seats), bytes(records), shard
+    return chunk, bytes(points), bytes(seats), bytes(records)
+
+
+def expected_score(elo) -> float:  # Score (1 a win, 0.5 a tie) the stronger side expects with this Elo advantage
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+class Sprt:
+    """Sequential probability ratio test on bot A's score, H0: A is elo0 stronger than B, H1: A is elo1 stronger,
+    or with points=True on A's point margin per game, H0: it is elo0, H1: it is elo1.
+    Generalized SPRT with the normal approximation: samples are games, or pairs of games for duplicate deals
+    (their mean), their variance is measured as they come, so the pairs' smaller variance ends matches sooner."""
+
+    def __init__(self, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05, points=False) -> None:
+        self.elo0, self.elo1 = elo0, elo1
+        self.points = points
+        self.s0, self.s1 = (elo0, elo1) if points else (expected_score(elo0), expected_score(elo1))
+        self.lower = log(beta / (1 - alpha))  # Accept H0 at or below this log likelihood ratio
+        self.upper = log((1 - beta) / alpha)  # Accept H1 at or above
+        self.n = 0
+        self.total = 0.0
+        self.squares = 0.0
+        self.result = None  # "H0" or "H1" once decided
+
+    def add(self, score):  # One sample's score or margin, decides once the log likelihood ratio leaves the bounds
+        self.n += 1
+        self.total += score
+        self.squares += score * score
+        llr = self.llr()
+        if llr >= self.upper: self.result = "H1"
+        elif llr <= self.lower: self.result = "H0"
+
+    def llr(self) -> float:
+        if self.n < 2: return 0.0
+        mean = self.total / self.n
+        variance = self.squares / self.n - mean * mean
+        if variance <= 0: return 0.0
+        return self.n * (self.s1 - self.s0) * (2 * mean - self.s0 - self.s1) / (2 * variance)
+
+    def report(self) -> str:
+        unit = "points a game better" if self.points else "Elo stronger"
+        verdict = {"H1": f"H1, A is at least {self.elo1:g} {unit}", "H0": f"H0, A is at most {self.elo0:g} {unit}", None: "undecided"}[self.result]
+        return f"SPRT [{self.elo0:g}, {self.elo1:g}]: {verdict} (LLR {self.llr():.2f}, bounds {self.lower:.2f} {self.upper:.2f})"
+
+
+def game_score(points) -> float:
+    return 1.0 if points > 60 else 0.5 if points == 60 else 0.0
+
+
+class Tally:  # Aggregates the chunks as they stream back
+    def __init__(self, duplicate=False, sprt: Sprt = None, stats=None) -> None:
+        self.duplicate = duplicate  # Games come in pairs on the same deal
+        self.sprt = sprt  # Stops taking games once it has decided
+        self.stats = stats  # game/stats.py GameStats the chunks' shards are merged into, if any
+        self.games = 0
+        self.wins_a = 0
+        self.wins_b = 0
+        self.ties = 0
+        self.points_a = 0
+        self.first_mover_wins = 0  # Games won by the player that led the first trick (seat 0)
+        self.digest = hashlib.sha256()  # Over every game's result in order, equal digests mean identical runs
+        self.margins = 0  # Sums of A's point margin (its points minus B's) per game, and of its square
+        self.margin_squares = 0
+        self.pairs = 0  # Duplicate deals: pairs won by A (more than 120 points over both games), by B and split
+        self.pair_wins_a = 0
+        self.pair_wins_b = 0
+        self.pair_margin_squares = 0  # Sum of the squared margin of every pair
+
+    @property
+    def decided(self) -> bool:
+        return self.sprt is not None and self.sprt.result is not None
+
+    def add(self, points: bytes, seats: bytes, shard=None):
+        """Takes a chunk's games (and its GameStats shard) in order. With an SPRT the games after its decision are left out."""
+        if shard is not None: self.stats.merge(shard)
+        if self.sprt is None and not self.duplicate: return self.add_games(points, seats)
+        step = 2 if self.duplicate else 1
+        for i in range(0, len(points), step):
+            if self.decided: return
+            pair = points[i:i + step]
+            self.add_games(pair, seats[i:i + step])
+            if self.duplicate:
+                total = pair[0] + pair[1]
+                self.pairs += 1
+                if total > 120: self.pair_wins_a += 1
+                elif total < 120: self.pair_wins_b += 1
+                self.pair_margin_squares += (2 * total - 240) ** 2
+            if self.sprt: self.sprt.add(sum(2 * p - 120 for p in pair) / step if self.sprt.points else sum(map(game_score, pair)) / step)
+
+    def add_games(self, points: bytes, seats: bytes):
+        for score, seat_a in zip(points, seats):
+            if score > 60: self.wins_a += 1
+            elif score == 60: self.ties += 1
+            else: self.wins_b += 1
+            if score != 60 and (score > 60) == (seat_a == 0): self.first_mover_wins += 1
+            self.margins += 2 * score - 120
+            self.margin_squares += (2 * score - 120) ** 2
+        self.games += len(points)
+        self.points_a += sum(points)
+        self.digest.update(points)
+
+    def margin(self) -> tuple:
+        """A's mean point margin per game and its standard error, from the pairs' spread with duplicate deals."""
+        games = max(self.games, 1)
+        mean = self.margins / games
+        if self.duplicate:  # A pair's margin over its two games has the deal's luck cancelled out
+            pairs = max(self.pairs, 1)
+            variance = self.pair_margin_squares / pairs - (2 * mean) ** 2
+            return mean, sqrt(max(variance, 0) / pairs) / 2
+        return mean, sqrt(max(self.margin_squares / games - mean * mean, 0) / games)
+
+    def variance_reduction(self) -> float:
+        """Independent games needed for the margin's standard error of one duplicate game, measured on these games:
+        each game alone is a random deal, their spread is what independent deals would give."""
+        games, pairs = max(self.games, 1), max(self.pairs, 1)
+        mean = self.margins / games
+        game_variance = self.margin_squares / games - mean * mean
+        pair_variance = (self.pair_margin_squares / pairs - (2 * mean) ** 2) / 4  # Of the pair's mean margin
+        return game_variance / (2 * pair_variance) if pair_variance > 0 else float("inf")
+
+    def report(self, bot_a, bot_b) -> str:
+        games = max(self.games, 1)
+        return "\n".join((
+            f"{self.games} games, {bot_a} (A) vs {bot_b} (B)",
+            f"A wins: {self.wins_a} ({self.wins_a / games:.2%})",
+            f"B wins: {self.wins_b} ({self.wins_b / games:.2%})",
+            f"ties:   {self.ties} ({self.ties / games:.2%})",
+            f"A average points: {self.points_a / games:.2f}",
+            f"first mover wins: {self.first_mover_wins / games:.2%}",
+            "A margin: {:+.2f} +- {:.2f} points a game".format(*self.margin()),
+        ) + ((
+            f"pairs:  {self.pairs}, A wins {self.pair_wins_a}, B wins {self.pair_wins_b}, split {self.pairs - self.pair_wins_a - self.pair_wins_b}",
+            f"duplicate deals: {self.variance_reduction():.2f}x fewer games than independent deals for the same error",
+        ) if self.duplicate else ()) + ((self.sprt.report(),) if self.sprt else ()) + (
+            f"digest: {self.digest.hexdigest()}",
+        ))
+
+
+def jobs(games, bot_a, bot_b, master_seed, record=False, stream=False, duplicate=False, chunk_games=CHUNK_GAMES, stats=False):
+    for chunk, start in enumerate(range(0, games, chunk_games)):
+        yield chunk, min(chunk_games, games - start), bot_a, bot_b, master_seed, record, stream, duplicate, chunk_games, stats
+
+
+def run_tournament(bot_a, bot_b, games, workers=1, master_seed=0, on_chunk=None, writer: RecordWriter = None, stream=False,
+                   duplicate=False, sprt: Sprt = None, stats=None) -> Tally:
+    """Plays the games with `workers` processes (inline with 1), calls on_chunk(tally) after every chunk.
+    With a writer every game is also recorded, in the same order whatever the number of workers.
+    stream=True deals from game.deals (needs numpy), it can't be combined with a writer.
+    duplicate=True plays every deal twice with the seats swapped (games must be even). With an sprt the match ends
+    once it has decided: the tally stops at that game, chunks already sent to the pool are played (and recorded) whole.
+    SPRT matches are cut into chunks of SPRT_CHUNK_GAMES, their results depend on the seed but differ from a full run's.
+    With a game/stats.py GameStats every chunk's statistics are merged into it (whole chunks, like the records)."""
+    if stream and writer is not None: raise ValueError("stream deals have no seed, games dealt from them can't be recorded")
+    if duplicate and games % 2: raise ValueError("duplicate deals are played in pairs, games must be even")
+    tally = Tally(duplicate, sprt, stats)
+    chunks = jobs(games, bot_a, bot_b, master_seed, writer is not None, stream, duplicate, SPRT_CHUNK_GAMES if sprt else CHUNK_GAMES, stats is not None)
+    if workers <= 1:
+        results = map(play_chunk, chunks)
+        for _, points, seats, records, *shard in results:
+            tally.add(points, seats, *shard)
+            if writer: writer.write_records(records, len(points))
+            if on_chunk: on_chunk(tally)
+            if tally.decided: break
+        return tally
+
+    with get_context("fork").Pool(workers) as pool:
+        for _, points, seats, records, *shard in pool.imap(play_chunk, chunks):
+            tally.add(points, seats, *shard)
+            if writer: writer.write_records(records, len(points))
+            if on_chunk: on_chunk(tally)
+            if tally.decided: break  # Leaving the pool's block terminates the chunks still running
+    return tally
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="briscola.py tournament", description="Bot vs bot Briscola tournament")
+    parser.add_argument("bot_a", choices=sorted(BOTS))
+    parser.add_argument("bot_b", choices=sorted(BOTS))
+    parser.add_argument("-n", "--games", type=int, default=100000)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-s", "--seed", type=int, default=0, help="master seed, same seed same results for any worker count")
+    parser.add_argument("-r", "--record", metavar="PATH", help="append every game to a binary record file (game/records.py)")
+    parser.add_argument("-d", "--deals", choices=("seed", "stream"), default="seed",
+                        help="seed: one seeded shuffle per game (recordable, default), stream: bulk NumPy deals (game/deals.py)")
+    parser.add_argument("--duplicate", action="store_true", help="play every deal twice with the seats swapped and score the pairs")
+    parser.add_argument("--sprt", nargs=2, type=float, metavar=("ELO0", "ELO1"),
+                        help="stop as soon as an SPRT decides between A being ELO0 or ELO1 Elo stronger than B (--games is the limit)")
+    parser.add_argument("--sprt-points", action="store_true", help="--sprt bounds are A's point margin per game instead of Elo")
+    parser.add_argument("--stats", metavar="PATH", help="write game statistics (game/stats.py, needs numpy) as JSON, merge files with: briscola.py stats")
+    parser.add_argument("--alpha", type=float, default=0.05, help="SPRT false positive rate (default: 0.05)")
+    parser.add_argument("--beta", type=float, default=0.05, help="SPRT false negative rate (default: 0.05)")
+    args = parser.parse_args(argv)
+    if args.deals == "stream" and args.record: parser.error("--record needs --deals seed, stream deals have no seed to record")
+    if args.duplicate and args.games % 2: parser.error("--duplicate plays deals in pairs, --games must be even")
+
+    writer = RecordWriter(args.record) if args.record else None
+    sprt = Sprt(*args.sprt, args.alpha, args.beta, args.sprt_points) if args.sprt else None
+    stats = None
+    if args.stats:
+        from game.stats import GameStats
+        stats = GameStats()
+    start = perf_counter()
+    tally = run_tournament(args.bot_a, args.bot_b, args.games, args.workers, args.seed, writer=writer, stream=args.deals == "stream",
+                           duplicate=args.duplicate, sprt=sprt, stats=stats)
+    if writer: writer.close()
+    elapsed = perf_counter() - start
+
+    print(tally.report(args.bot_a, args.bot_b))
+    print(f"{elapsed:.2f}s, {tally.games / elapsed:,.0f} games/s with {args.workers} worker(s)")
+    if stats:
+        with open(args.stats, "w") as file: file.write(stats.to_json())
+
+
+if __name__ == '__main__':
+    main()
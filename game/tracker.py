@@ -0,0 +1,73 @@
+from game.consts import DECK_SIZE, POINTS, RANK_POINTS, RANK_STRENGTH
+
+# Card tracking: which cards each player hasn't seen yet (the stock and the other player's hand, the briscola card is
+# shown to both at the deal), the points still to be taken and the trumps not played yet.
+# A GameState with a tracker (state.tracker = CardTracker()) reports every card played, drawn and captured to it,
+# so everything is kept up to date in O(1) per move instead of rescanning the piles.
+
+
+NO_CARD = -1
+FULL_MASK = (1 << DECK_SIZE) - 1
+RANKS = 10
+RANK_BITS = (1 << RANKS) - 1
+RANK_NAMES = ("A", "2", "3", "4", "5", "6", "7", "J", "Q", "K")
+STRONGEST_FIRST = sorted(range(RANKS), key=RANK_STRENGTH.__getitem__, reverse=True)
+
+
+class CardTracker:
+    __slots__ = ("unseen", "unseen_points", "points_in_play", "trumps", "briscola_suit")
+
+    def __init__(self) -> None:
+        self.unseen = [FULL_MASK, FULL_MASK]  # Per player, bit n set if card n is still hidden from them
+        self.unseen_points = [120, 120]  # Per player, points of their unseen cards
+        self.points_in_play = 120  # Points nobody has captured yet
+        self.trumps = RANK_BITS  # Briscola suit ranks not played yet (in the hands, the stock or on the briscola pile)
+        self.briscola_suit = 0
+
+    def sync(self, game):
+        """Rebuilds everything from a GameState, e.g. after a deal or a replay seek. Moves after this are O(1)."""
+        self.briscola_suit = game.briscola_suit
+        played = 0
+        for card in game.history: played |= 1 << card
+        for player in (0, 1):
+            unseen = FULL_MASK & ~played & ~(1 << game.deck[-7])
+            for card in game.hands[player]:
+                if card != NO_CARD: unseen &= ~(1 << card)
+            self.unseen[player] = unseen
+            self.unseen_points[player] = sum(POINTS[card] for card in range(DECK_SIZE) if unseen >> card & 1)
+        self.points_in_play = 120 - game.scores[0] - game.scores[1]
+        self.trumps = RANK_BITS & ~(played >> game.briscola_suit * RANKS)
+
+    # Called by GameState
+    def played(self, player, card):  # The other player sees the card
+        bit = 1 << card
+        other = 1 - player
+        if self.unseen[other] & bit:
+            self.unseen[other] ^= bit
+            self.unseen_points[other] -= POINTS[card]
+        if card // RANKS == self.briscola_suit: self.trumps &= ~(1 << card % RANKS)
+
+    def drew(self, player, card):  # The player sees the card they draw (the briscola card was seen at the deal already)
+        bit = 1 << card
+        if self.unseen[player] & bit:
+            self.unseen[player] ^= bit
+            self.unseen_points[player] -= POINTS[card]
+
+    def captured(self, points):
+        self.points_in_play -= points
+
+    # Queries
+    def unseen_count(self, player) -> int:
+        return self.unseen[player].bit_count()
+
+    def unseen_trumps(self, player) -> int:  # Rank mask of the trumps the player hasn't seen
+        return self.unseen[player] >> self.briscola_suit * RANKS & RANK_BITS
+
+    def trumps_by_rank(self) -> tuple:  # 1 for every rank of the briscola suit still to be played, Ace first
+        return tuple(self.trumps >> rank & 1 for rank in range(RANKS))
+
+    def trump_points(self) -> int:  # Points of the trumps still to be played
+        return sum(RANK_POINTS[rank] for rank in range(RANKS) if self.trumps >> rank & 1)
+
+    def trump_names(self) -> str:  # Trumps still to be played, strongest first, e.g. "A 3 K 7"
+        return " ".join(RANK_NAMES[rank] for rank in STRONGEST_FIRST if self.trumps >> rank & 1)
@@ -0,0 +1,77 @@
+from game.consts import DECK_SIZE, RANK_POINTS, SUIT, STRENGTH
+
+# Precomputed trick resolution: one byte per (briscola suit, leader, foundation0 card, foundation1 card)
+# The value is the player that takes the trick, exactly what App.determine_winning_turn used to work out
+
+
+PAIRS = DECK_SIZE * DECK_SIZE  # Entries for one (briscola suit, leader) combination
+SUIT_BLOCK = 2 * PAIRS  # Entries for one briscola suit
+TABLE_SIZE = 4 * SUIT_BLOCK
+
+
+def trick_base(briscola_suit, leader) -> int:  # Offset of the (briscola suit, leader) block, add f0 * 40 + f1 to it
+    return briscola_suit * SUIT_BLOCK + leader * PAIRS
+
+
+def trick_index(f0, f1, briscola_suit, leader) -> int:
+    return briscola_suit * SUIT_BLOCK + leader * PAIRS + f0 * DECK_SIZE + f1
+
+
+def build_table() -> bytes:
+    """Builds the winner table from the trick taking order (same suit: stronger card, else briscola, else the leader)."""
+    table = bytearray(TABLE_SIZE)
+    for briscola_suit in range(4):
+        for leader in range(2):
+            base = trick_base(briscola_suit, leader)
+            for f0 in range(DECK_SIZE):
+                for f1 in range(DECK_SIZE):
+                    lead, follow = (f0, f1) if leader == 0 else (f1, f0)
+                    if SUIT[follow] == SUIT[lead]: lead_wins = STRENGTH[lead] > STRENGTH[follow]
+                    else: lead_wins = SUIT[follow] != briscola_suit
+                    table[base + f0 * DECK_SIZE + f1] = leader if lead_wins else 1 - leader
+    return bytes(table)
+
+
+TRICK_WINNER = build_table()
+
+
+def reference_winner(f0, f1, briscola_suit, leader) -> int:
+    """The original case by case rules of App.determine_winning_turn, kept to check the table against."""
+    f0_suit, f0_rank, f0_points = SUIT[f0], f0 % 10, RANK_POINTS[f0 % 10]
+    f1_suit, f1_rank, f1_points = SUIT[f1], f1 % 10, RANK_POINTS[f1 % 10]
+    f0_is_briscola = f0_suit == briscola_suit
+    f1_is_briscola = f1_suit == briscola_suit
+    win_turn = 5
+
+    # Case 1: One of the played cards is briscola and one is not
+    if f0_is_briscola and not f1_is_briscola: win_turn = 0
+    elif f1_is_briscola and not f0_is_briscola: win_turn = 1
+
+    # Case 2: Both of the played cards are briscola
+    elif f1_is_briscola and f0_is_briscola:
+        if f0_points == 0 and f1_points == 0: win_turn = 1 if f1_rank > f0_rank else 0
+        elif f0_points > f1_points: win_turn = 0
+        elif f1_points > f0_points: win_turn = 1
+
+    # Case 3: None is briscola
+    elif f1_suit == f0_suit:
+        if f0_points == 0 and f1_points == 0: win_turn = 1 if f1_rank > f0_rank else 0
+        elif f0_points > f1_points: win_turn = 0
+        elif f1_points > f0_points: win_turn = 1
+    else: win_turn = 1 if leader == 1 else 0
+
+    return win_turn
+
+
+def verify_table(table: bytes = TRICK_WINNER) -> list:
+    """Compares the table with reference_winner over every pair of different cards, returns the mismatches."""
+    mismatches = []
+    for briscola_suit in range(4):
+        for leader in range(2):
+            for f0 in range(DECK_SIZE):
+                for f1 in range(DECK_SIZE):
+                    if f0 == f1: continue
+                    expected = reference_winner(f0, f1, briscola_suit, leader)
+                    if table[trick_index(f0, f1, briscola_suit, leader)] != expected:
+                        mismatches.append((f0, f1, briscola_suit, leader, expected))
+    return mismatches
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the game from the project folder, and the GUI tests render offscreen without a display or sound card
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -0,0 +1,40 @@
+import random
+
+from game.bitboard import BitState, NO_CARD
+from game.engine import GameState
+
+# Reference helpers shared by the tests and the benchmarks that check the same things: endgame positions and plain
+# minimax. Kept here so that editing a benchmark can't change what the tests check
+
+
+def positions(count, tricks, seed=0) -> list:  # Random games played up to `tricks` tricks, opening the next trick
+    rng = random.Random(seed)
+    found = []
+    for game in range(count):
+        state = GameState()
+        state.deal(rng.getrandbits(64))
+        while state.tricks < tricks or state.foundations != [NO_CARD, NO_CARD]:
+            state.play(rng.choice(state.legal_moves()))
+        found.append(BitState.from_game(state))
+    return found
+
+
+def minimax(state: BitState) -> int:  # Points player 0 still takes, no pruning and no table
+    if state.is_terminal(): return 0
+    values = []
+    for card in state.legal_moves():
+        child = state.copy()
+        before = child.score0
+        child.play(card)
+        values.append(child.score0 - before + minimax(child))
+    return max(values) if state.to_move == 0 else min(values)
+
+
+def with_a_card_led(states, seed=0) -> list:  # Copies of the positions with a random card led
+    rng = random.Random(seed)
+    led = []
+    for state in states:
+        state = state.copy()
+        state.play(rng.choice(state.legal_moves()))
+        led.append(state)
+    return led
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from game.batch import BatchSim, seeded_decks, random_policy, greedy_policy, first_card_policy
+from game.consts import DECK_SIZE, POINTS
+from game.engine import GameState
+
+GAMES = 500
+
+
+def play(policies, games=GAMES):  # Batch games dealt like GameState.deal(seed) for seeds 0..games - 1
+    sim = BatchSim(games, record=True, captures=True)
+    sim.deal(seeded_decks(range(games)))
+    sim.run(policies)
+    return sim
+
+
+@pytest.mark.parametrize("seats", [("random", "random"), ("random", "greedy"), ("greedy", "first")])
+def test_batch_matches_the_engine(seats):  # Every batch game's cards replayed through GameState give the same scores
+    rng = np.random.default_rng(1)
+    shared = random_policy(rng)
+    named = {"random": shared, "greedy": greedy_policy, "first": first_card_policy}
+    sim = play(tuple(named[seat] for seat in seats))  # The same object twice is asked once, different ones per seat
+
+    for seed in range(GAMES):
+        state = GameState()
+        state.deal(seed)
+        for card in sim.plays[:, seed]: state.play(int(card))  # Raises if the batch played a card the engine would not allow
+        assert state.scores == sim.scores[:, seed].tolist(), f"game {seed}"
+
+    won = np.array([sum(POINTS[card] for card in range(DECK_SIZE) if int(mask) >> card & 1) for mask in sim.captured0])
+    assert (won == sim.scores[0]).all()
+
+
+def test_policies_only_see_the_games_they_move_in():
+    def seat_policy(seat):
+        def policy(sim, hands, lead):
+            assert hands.shape == (3, sim.n) and lead.shape == (sim.n,) and sim.base.shape == (sim.n,)
+            assert ((sim.leader == seat) == (lead < 0)).all()  # Leads where the seat leads, answers everywhere else
+            return first_card_policy(sim, hands, lead)
+        return policy
+
+    first = play((first_card_policy, first_card_policy), 100)
+    split = play((seat_policy(0), seat_policy(1)), 100)
+    assert (first.plays == split.plays).all()
+
+
+def test_an_empty_slot_is_refused():
+    sim = BatchSim(10, seed=0)
+    with pytest.raises(ValueError):
+        while True: sim.play_trick((lambda sim, hands, lead: np.zeros(sim.n, dtype=np.int8),) * 2)
@@ -0,0 +1,34 @@
+import random
+
+from game.bitboard import BitState
+from game.engine import GameState
+
+
+def midgame(seed, cards=7) -> GameState:
+    rng = random.Random(seed)
+    state = GameState()
+    state.deal(seed)
+    for _ in range(cards): state.play(rng.choice(state.legal_moves()))
+    return state
+
+
+def test_positions_drawing_in_another_order_differ():
+    state = BitState.from_game(midgame(0))
+    swapped = state.copy()
+    swapped.order = state.order[:state.stock_len - 2] + state.order[state.stock_len - 1:state.stock_len - 3:-1]
+    assert swapped.stock == state.stock
+    assert swapped != state and swapped.key() != state.key()
+    assert len({state, swapped, state.copy()}) == 2
+
+
+def test_bitstate_plays_like_the_engine():
+    for seed in range(20):
+        game = midgame(seed, 0)
+        state = BitState.from_game(game)
+        rng = random.Random(seed)
+        while not game.is_terminal():
+            card = rng.choice(game.legal_moves())
+            game.play(card)
+            state.play(card)
+            assert state == BitState.from_game(game)
+            assert (state.score0, state.score1) == tuple(game.scores)
@@ -0,0 +1,42 @@
+import numpy as np
+
+from game.deals import BLOCK_DEALS, DealStream, deal_block, deck_at
+from game.engine import GameState
+
+SEED = 1234
+START = BLOCK_DEALS - 3  # Streams start just before a block boundary
+
+
+def test_decks_depend_only_on_the_master_seed_and_game_index():
+    stream = DealStream(SEED, START)
+    decks = [next(stream).copy() for _ in range(6)]
+    for index, deck in enumerate(decks, START): assert deck.tolist() == deck_at(SEED, index)
+    assert (np.array(decks[3:]) == deal_block(SEED, 1)[:3]).all()
+    assert [next(DealStream(SEED, index)).tolist() for index in range(START, START + 6)] == [deck.tolist() for deck in decks]
+    assert deck_at(SEED + 1, START) != deck_at(SEED, START)
+
+
+def test_take_matches_next():
+    taken = DealStream(SEED, START).take(BLOCK_DEALS + 10)  # Spans three blocks
+    stream = DealStream(SEED, START)
+    assert (taken == np.array([next(stream) for _ in range(len(taken))])).all()
+
+    stream = DealStream(SEED, START)  # Mixed calls keep the game order
+    first, middle, last = next(stream).copy(), stream.take(5), next(stream)
+    assert (np.vstack([first, middle, last]) == taken[:7]).all()
+
+
+def test_every_deck_is_a_permutation():
+    decks = deal_block(SEED, 0)
+    assert decks.shape == (BLOCK_DEALS, 40)
+    assert (np.sort(decks, axis=1) == np.arange(40)).all()
+
+
+def test_deal_sets_up_a_game_from_the_next_deck():
+    stream = DealStream(SEED, START)
+    state = GameState()
+    stream.deal(state)
+    expected = GameState()
+    expected.deal_deck(deck_at(SEED, START))
+    assert (state.hands, state.briscola, state.stock) == (expected.hands, expected.briscola, expected.stock)
+    assert stream.index == START + 1
@@ -0,0 +1,26 @@
+import pytest
+
+from game.endgame import EndgameSolver
+from tests.reference import minimax, positions, with_a_card_led
+
+CHECK = positions(100, 17, seed=1) + positions(10, 15, seed=2)  # Last three tricks, and the last five with the stock known
+
+
+@pytest.mark.parametrize("solver", [lambda: EndgameSolver(), lambda: EndgameSolver(canonical=True)], ids=["plain", "canonical"])
+def test_solver_matches_minimax(solver):
+    shared = solver()  # Reused across positions, so later ones also read entries stored by earlier searches
+    for state in CHECK + with_a_card_led(CHECK):
+        expected = minimax(state)
+        for search in (solver(), shared):
+            value, card = search.solve(state)
+            assert value == expected
+            child = state.copy()
+            before = child.score0
+            child.play(card)
+            assert child.score0 - before + minimax(child) == expected  # The best card reaches the value
+
+
+def test_a_small_table_gives_the_same_values():
+    solver = EndgameSolver(max_entries=50)
+    for state in CHECK: assert solver.solve(state)[0] == minimax(state)
+    assert len(solver.table) <= 50
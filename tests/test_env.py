@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from game.batch import first_card_policy
+from game.engine import GameState
+
+GAMES = 200
+
+
+@pytest.mark.parametrize("agent", ["first card", "random"])
+def test_env_plays_the_engine_games(agent):
+    """The agent (seat g % 2 of game g) against an opponent playing its first card, step by step next to GameStates
+    dealt from the same seeds: hands, the opponent's lead, the cards seen, rewards and final scores all match."""
+    from game.env import VectorEnv
+    rng = np.random.default_rng(0)
+    env = VectorEnv(GAMES, opponent=first_card_policy, seed=0)
+    obs = env.reset(seeds=range(GAMES))
+    states = []
+    for seed in range(GAMES):
+        states.append(GameState())
+        states[-1].deal(seed)
+
+    for step in range(20):
+        slots = np.argmax(obs["action_mask"], axis=1) if agent == "first card" else np.empty(GAMES, dtype=np.int8)
+        scores = []
+        for g, state in enumerate(states):
+            seat = g % 2
+            if state.to_move != seat:
+                state.play(state.legal_moves()[0])
+                assert obs["foundations"][g, 1] == state.foundations[1 - seat]
+            else: assert obs["foundations"][g, 1] == -1
+            assert obs["hand"][g].tolist() == state.hands[seat]
+            assert set(np.flatnonzero(obs["seen"][g])) == set(state.history) | {card for card in state.hands[seat] if card >= 0} | {state.deck[-7]}
+            if agent == "random": slots[g] = rng.choice([slot for slot in range(3) if state.hands[seat][slot] >= 0])
+            scores.append((state.scores[seat], state.scores[1 - seat]))
+            state.play(state.hands[seat][slots[g]])
+            if state.foundations[seat] != -1: state.play(state.legal_moves()[0])  # The agent led, the opponent follows
+
+        obs, rewards, dones, info = env.step(slots)
+        for g, state in enumerate(states):
+            seat = g % 2
+            gained = state.scores[seat] - scores[g][0] - (state.scores[1 - seat] - scores[g][1])
+            assert rewards[g] == gained
+        assert dones.all() == (step == 19)
+
+    assert info["final_scores"].tolist() == [[state.scores[g % 2], state.scores[1 - g % 2]] for g, state in enumerate(states)]
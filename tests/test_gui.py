@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from game.bitboard import HAND_PILES
+from game.engine import NO_CARD
+
+pytest.importorskip("pyxel")
+
+
+@pytest.fixture(scope="module")
+def app():  # pyxel can only be initialized once per process, every test shares the window
+    from briscola import App
+    return App(run=False)
+
+
+def indexes(pile) -> list:
+    return [card.index for card in pile.cards]
+
+
+def assert_piles_match(app):
+    engine, piles = app.engine, app.piles
+    for player, names in enumerate(HAND_PILES):
+        assert [indexes(piles[name]) for name in names] == [[card] if card != NO_CARD else [] for card in engine.hands[player]]
+        assert indexes(piles[f'deck{player}']) == engine.decks[player]
+    assert indexes(piles['stock']) == engine.stock
+    assert indexes(piles['briscola']) == ([engine.briscola] if engine.briscola != NO_CARD else [])
+
+
+def step(app):  # One frame, the trick pause is skipped like pressing R
+    if app.pause: app.end_round = True
+    app.update()
+    app.render()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_piles_follow_the_engine(app, seed):
+    rng = random.Random(seed)
+    app.new_game(seed)
+    step(app)
+    assert_piles_match(app)
+
+    while app.game_status != "win":
+        if app.game_status == "play" and app.next_move.source == None:
+            player = app.engine.to_move
+            foundation = app.piles[f'foundation{player}']
+            if foundation.is_empty:
+                source = app.cards[rng.choice(app.engine.legal_moves())].pile
+                for pile in HAND_PILES[player]:
+                    if not app.piles[pile].is_empty: app.piles[pile].top_card.set_face_up()
+                assert app.validate_move(source, foundation, 1)
+                app.perform_move(source, foundation, 1)
+                if app.engine.foundations != [NO_CARD, NO_CARD]: assert_piles_match(app)  # Led, the piles follow at once
+        step(app)
+        if app.game_status == "play" and app.engine.foundations == [NO_CARD, NO_CARD]: assert_piles_match(app)
+
+    assert_piles_match(app)
+    assert app.engine.is_terminal()
+    assert sum(card.points for card in app.piles['deck0'].cards) == app.engine.scores[0]
+
+
+def test_hands_are_refilled_by_the_engine_only(app):
+    app.new_game(0)
+    step(app)
+    hand = app.piles['pl0_1']
+    hand.cards = []
+    assert not app.validate_move(app.piles['stock'], hand, 1)
+    assert not app.validate_move(app.piles['briscola'], hand, 1)
+
+
+def test_finishing_a_replay_is_not_recorded_again(app, tmp_path):
+    from game.engine import GameState
+    from game.records import RecordReader, RecordWriter
+    from game.replay import Replay
+
+    state = GameState()
+    state.deal(7)
+    while not state.is_terminal(): state.play(state.legal_moves()[0])
+    app.records = RecordWriter(tmp_path / "games.rec", flush_records = 1)
+    try:
+        app.load_replay(Replay(7, state.history), len(state.history) - 1)
+        card = app.engine.legal_moves()[0]
+        app.perform_move(app.cards[card].pile, app.piles[f'foundation{app.engine.to_move}'], 1)
+        assert app.engine.is_terminal()
+        app.new_game(0)
+    finally:
+        app.records.close()
+        app.records = None
+    with RecordReader(tmp_path / "games.rec") as reader: assert len(reader) == 0
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from game.consts import BUDGET_MS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("module, lazy", [
+    ("briscola", ("pyxel", "multiprocessing", "game.ai", "game.analysis")),  # Loaded with the window, the bot and the analysis
+    ("game.engine", ("pyxel", "numpy")),
+    ("game.server", ("pyxel", "numpy")),
+])
+def test_imports_leave_heavy_modules_for_later(module, lazy):
+    probe = f"import sys, {module}; print(' '.join(name for name in {lazy!r} if name in sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()
+    assert loaded == []
+
+
+# briscola.main() up to opening the window, App is replaced by a stub that prints the options it was given
+MAIN_PROBE = """
+import sys, briscola
+briscola.App = lambda **options: print(options["ai_player"], options["ai_budget_ms"])
+sys.argv = ["briscola.py"] + {argv!r}
+briscola.main()
+print(' '.join(name for name in ("multiprocessing", "game.ai", "game.mcts", "game.tablebase") if name in sys.modules))
+"""
+
+
+def run_main(argv) -> list:
+    return subprocess.run([sys.executable, "-c", MAIN_PROBE.format(argv=argv)], cwd=ROOT, capture_output=True, text=True, check=True).stdout.splitlines()
+
+
+def test_a_two_player_game_starts_without_the_bot():
+    assert run_main([]) == [f"None {BUDGET_MS}", ""]  # Nothing of the bot loaded
+
+
+def test_the_bot_options_reach_the_app():
+    assert run_main(["--ai", "--ai-ms", "50"])[0] == "1 50"
@@ -0,0 +1,66 @@
+import os
+import random
+
+import pytest
+
+from game.engine import GameState
+from game.records import HEADER, RECORD, RecordReader, RecordWriter
+
+
+def sample_games(count, seed=0) -> list:  # (seed, briscola, plays) of random games, the last one left unfinished
+    rng = random.Random(seed)
+    games = []
+    for i in range(count):
+        state = GameState()
+        deal = rng.getrandbits(64)
+        state.deal(deal)
+        while not state.is_terminal() and (i < count - 1 or len(state.history) < 11): state.play(rng.choice(state.legal_moves()))
+        games.append((deal, state.deck[-7], bytes(state.history)))
+    return games
+
+
+def open_files() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def test_games_read_back_as_written(tmp_path):
+    path = tmp_path / "games.rec"
+    games = sample_games(50)
+    with RecordWriter(path, flush_records=16) as writer:
+        for game in games: writer.write_game(*game)
+
+    with RecordReader(path) as reader:
+        assert len(reader) == len(games)
+        assert [(seed, briscola, bytes(plays)) for seed, briscola, plays in reader] == games
+        assert [(seed, briscola, bytes(plays)) for seed, briscola, plays in (reader[i] for i in range(-1, 2))] == [games[-1]] + games[:2]
+        with pytest.raises(IndexError): reader[len(games)]
+
+
+def test_a_partial_record_is_ignored(tmp_path):
+    path = tmp_path / "games.rec"
+    games = sample_games(3)
+    with RecordWriter(path) as writer:
+        for game in games: writer.write_game(*game)
+    with open(path, "ab") as file: file.write(b"\0" * (RECORD.size // 2))  # A write cut short by a crash
+
+    with RecordReader(path) as reader:
+        assert [(seed, briscola, bytes(plays)) for seed, briscola, plays in reader] == games
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="counts open files through /proc")
+@pytest.mark.parametrize("data", [b"BRI", b"not a record file at all", HEADER.pack(b"BRISREC\0", 99, RECORD.size)])
+@pytest.mark.parametrize("opener", [RecordReader, RecordWriter])
+def test_refused_files_are_closed(tmp_path, opener, data):
+    path = tmp_path / "bad.rec"
+    path.write_bytes(data)
+    before = open_files()
+    with pytest.raises(ValueError) as error: opener(path)
+    assert open_files() == before  # Even with the reader or writer still referenced from the traceback
+    assert path.read_bytes() == data
+    del error
+
+
+def test_an_empty_file_is_refused_for_reading(tmp_path):
+    path = tmp_path / "empty.rec"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError): RecordReader(path)
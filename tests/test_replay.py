@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from game.engine import GameState
+from game.replay import Replay, pack_state, unpack_state
+
+
+def played(seed, cards=40) -> GameState:  # A game dealt from seed with `cards` random cards played
+    rng = random.Random(seed)
+    state = GameState()
+    state.deal(seed)
+    while len(state.history) < cards and not state.is_terminal(): state.play(rng.choice(state.legal_moves()))
+    return state
+
+
+def fields(state) -> tuple:
+    return (state.deck, state.hands, state.foundations, state.stock, state.briscola, state.briscola_suit, state.decks,
+            state.scores, state.leader, state.to_move, state.last_winner, state.tricks, state.history)
+
+
+@pytest.mark.parametrize("every", [1, 2, 20])
+def test_any_move_matches_replaying_from_the_deal(every):
+    rng = random.Random(every)
+    for seed in range(10):
+        game = played(seed, 40 if seed % 3 else 17)  # Some games were left before the end
+        replay = Replay(seed, game.history, every)
+        moves = list(range(len(replay) + 1))
+        rng.shuffle(moves)  # Seeks back and forth, before and after the snapshots are taken
+        for move in moves:
+            expected = GameState()
+            expected.deal(seed)
+            for card in game.history[:move]: expected.play(card)
+            state = replay.state_at(move)
+            assert fields(state) == fields(expected), f"seed {seed}, move {move}"
+            if move < len(replay): assert state.play(game.history[move]) == expected.play(game.history[move])  # Plays on like the engine
+
+
+def test_snapshots_round_trip():
+    for cards in range(0, 41, 3):
+        state = played(cards, cards)
+        assert fields(unpack_state(pack_state(state), state.deck, state.history)) == fields(state)
+
+
+def test_out_of_range_moves_and_wrong_records_are_refused():
+    game = played(5)
+    replay = Replay(5, game.history)
+    for move in (-1, len(replay) + 1):
+        with pytest.raises(IndexError): replay.state_at(move)
+    with pytest.raises(ValueError): Replay.from_record((5, (game.deck[-7] + 1) % 40, bytes(game.history)))
+    assert fields(Replay.from_record((5, game.deck[-7], bytes(game.history))).state_at(len(replay))) == fields(game)
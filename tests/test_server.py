@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from game.server import TableProtocol, TableServer
+
+
+@pytest.fixture
+def client():  # handle() of a connection, requests and replies as dicts, no socket
+    connection = TableProtocol(TableServer(seed=0))
+    return lambda request: connection.handle(json.dumps(request))
+
+
+def test_a_game_is_played_to_the_end(client):
+    view = client({"op": "new", "table": 1, "seed": 7})
+    assert view["status"] == "play" and view["seed"] == 7
+    while view["status"] != "win":
+        if view["status"] == "play": view = client({"op": "play", "table": 1, "card": view["hand"][0]})
+        else: view = client({"op": "end_round", "table": 1})
+    assert sum(view["scores"]) == 120
+
+
+@pytest.mark.parametrize("request_", [
+    {"op": "new", "table": True},
+    {"op": "new", "table": 1, "seed": True},
+    {"op": "play", "table": 1, "card": True},
+    {"op": "play", "table": 1, "card": "12"},
+    {"op": "play", "table": 1, "card": 1000},
+    {"op": "play", "table": 1, "card": [1]},
+    {"op": "end_round", "table": 1},
+    {"op": ["play"], "table": 1},
+    {"op": "play", "table": [1]},
+    {"op": "play", "table": 2, "card": 1},
+])
+def test_malformed_requests_get_an_error_and_leave_the_table_as_it_was(client, request_):
+    before = client({"op": "new", "table": 1, "seed": 3})
+    assert "error" in client(request_)
+    assert client({"op": "play", "table": 1, "card": before["hand"][0]})["status"] == "play"
@@ -0,0 +1,79 @@
+import random
+import statistics
+
+import numpy as np
+import pytest
+
+from game import stats as stats_module
+from game.batch import BatchSim, random_policy, seeded_decks
+from game.engine import GameState
+from game.stats import GameStats
+
+GAMES = 300
+
+
+def finished(seed) -> GameState:
+    rng = random.Random(seed)
+    state = GameState()
+    state.deal(seed)
+    while not state.is_terminal(): state.play(rng.choice(state.legal_moves()))
+    return state
+
+
+GAMES_PLAYED = [finished(seed) for seed in range(GAMES)]
+SWAPPED = [seed % 3 == 0 for seed in range(GAMES)]
+
+
+def aggregate(indexes) -> GameStats:
+    stats = GameStats()
+    for i in indexes: stats.add(GAMES_PLAYED[i], SWAPPED[i])
+    return stats
+
+
+@pytest.mark.parametrize("buffer", [stats_module.BUFFER, 7])  # Also with add() flushing every few games
+def test_merged_shards_equal_one_aggregation(monkeypatch, buffer):
+    monkeypatch.setattr(stats_module, "BUFFER", buffer)
+    whole = aggregate(range(GAMES))
+    cuts = [0, 1, 40, 41, 200, GAMES]
+    shards = [aggregate(range(start, end)) for start, end in zip(cuts, cuts[1:])]
+    for order in (shards, shards[::-1]):
+        merged = GameStats()
+        for shard in order: merged.merge(GameStats.from_json(shard.to_json()))  # Shards travel as JSON
+        assert merged == whole
+        assert merged.report() == whole.report()
+    assert whole.games == GAMES
+
+
+def test_queries_match_the_games():
+    stats = aggregate(range(GAMES))
+    for player in (None, 0, 1):
+        seats = [1 - swapped if player == 1 else swapped if player == 0 else 0 for swapped in SWAPPED]  # The seat to read
+        points = [state.scores[seat] for state, seat in zip(GAMES_PLAYED, seats)]
+        assert stats.outcomes(player=player) == (sum(p > 60 for p in points), points.count(60), sum(p < 60 for p in points))
+        n, mean, variance = stats.moments(player=player)
+        assert (n, mean) == (GAMES, pytest.approx(statistics.fmean(points)))
+        assert variance == pytest.approx(statistics.pvariance(points))
+        assert stats.quantiles(player=player, percentiles=(0, 50, 100)) == (min(points), sorted(points)[GAMES // 2], max(points))
+    for seat in (0, 1):
+        taken = np.zeros(40)
+        for state in GAMES_PLAYED:
+            for card in state.decks[seat]: taken[card] += 1
+        assert stats.capture_rates(seat) == pytest.approx(taken / GAMES)
+
+
+def test_add_batch_matches_add():
+    sim = BatchSim(GAMES, record=True, captures=True)
+    sim.deal(seeded_decks(range(GAMES)))
+    sim.run((random_policy(np.random.default_rng(2)),) * 2)
+    swapped = np.array(SWAPPED)
+    batch = GameStats()
+    batch.add_batch(sim, swapped)
+
+    one_by_one = GameStats()
+    for seed in range(GAMES):
+        state = GameState()
+        state.deal(seed)
+        for card in sim.plays[:, seed]: state.play(int(card))
+        one_by_one.add(state, SWAPPED[seed])
+    assert batch == one_by_one
+    with pytest.raises(ValueError): GameStats().add_batch(BatchSim(4))
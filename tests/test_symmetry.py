@@ -0,0 +1,50 @@
+import itertools
+import random
+
+import pytest
+
+from game.bitboard import NO_CARD
+from game.endgame import EndgameSolver
+from game.symmetry import canonical_key, canonicalize, invert, map_card, map_mask, relabel
+from tests.reference import positions, with_a_card_led
+
+PERMS = list(itertools.permutations(range(4)))
+CHECK = positions(40, 16, seed=3)
+CHECK += with_a_card_led(CHECK, seed=3)
+
+
+def test_relabeling_round_trips():
+    for perm in PERMS:
+        inverse = invert(perm)
+        assert [map_card(map_card(card, perm), inverse) for card in range(40)] == list(range(40))
+        assert map_card(NO_CARD, perm) == NO_CARD
+        for card in range(40): assert map_mask(1 << card, perm) == 1 << map_card(card, perm)
+    for state in CHECK[:5]:
+        for perm in PERMS: assert relabel(relabel(state, perm), invert(perm)).key() == state.key()
+
+
+def test_canonical_key_is_the_same_for_every_labeling():
+    rng = random.Random(0)
+    for state in CHECK:
+        key = canonical_key(state)
+        for perm in rng.sample(PERMS, 6): assert canonical_key(relabel(state, perm)) == key
+        canonical, perm, inverse = canonicalize(state)
+        assert canonical.key() == key and canonical.briscola_suit == 0
+        assert relabel(canonical, inverse).key() == state.key()
+
+
+def test_different_positions_keep_different_keys():
+    keys = {canonical_key(state) for state in CHECK}
+    assert len(keys) == len({state.key() for state in CHECK})  # Random games never land on relabelings of each other
+
+
+@pytest.mark.parametrize("canonical", [False, True], ids=["plain", "canonical"])
+def test_relabeled_positions_solve_to_the_same_value(canonical):
+    rng = random.Random(1)
+    for state in CHECK:
+        value = EndgameSolver().solve(state)[0]
+        for perm in rng.sample(PERMS, 3):
+            relabeled = relabel(state, perm)
+            solved, card = EndgameSolver(canonical=canonical).solve(relabeled)
+            assert solved == value
+            assert card in relabeled.legal_moves()
@@ -0,0 +1,53 @@
+from math import comb
+import os
+
+import pytest
+
+from game.endgame import EndgameSolver
+from game.tablebase import CHUNK, MAGIC, OFFSETS, TABLEBASE, TRICKS, Tablebase, solve_chunk
+from tests.reference import positions, with_a_card_led
+
+
+@pytest.fixture(scope="module")
+def small_table(tmp_path_factory):  # The tablebase with only the levels of 1 and 2 cards each solved, the rest left 0
+    path = str(tmp_path_factory.mktemp("tablebase") / "endgame.tb")
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.truncate(OFFSETS[TRICKS + 1])
+    for k in (1, 2):
+        for first in range(0, comb(40, k), CHUNK): solve_chunk((path, k, first, min(first + CHUNK, comb(40, k))))
+    table = Tablebase(path)
+    yield table
+    table.close()
+
+
+def assert_solves_like_the_solver(table, states):
+    for state in states:
+        value, card = EndgameSolver().solve(state)
+        looked_up, best = table.solve(state)
+        assert looked_up == value
+        child = state.copy()
+        before = child.score0
+        child.play(best)
+        assert child.score0 - before + (EndgameSolver().solve(child)[0] if not child.is_terminal() else 0) == value
+
+
+def test_two_card_endgames_match_the_solver(small_table):
+    assert_solves_like_the_solver(small_table, positions(300, 18) + with_a_card_led(positions(300, 18)))
+
+
+def test_positions_with_cards_left_to_draw_are_refused(small_table):
+    with pytest.raises(ValueError): small_table.solve(positions(1, 5)[0])
+
+
+@pytest.mark.skipif(not os.path.exists(TABLEBASE), reason="generate it with: python briscola.py tablebase")
+def test_three_card_endgames_match_the_solver():
+    table = Tablebase()
+    try: assert_solves_like_the_solver(table, positions(200, 17) + with_a_card_led(positions(200, 17)))
+    finally: table.close()
+
+
+def test_other_files_are_refused(tmp_path):
+    path = tmp_path / "endgame.tb"
+    path.write_bytes(MAGIC)
+    with pytest.raises(ValueError): Tablebase(str(path))
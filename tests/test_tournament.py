@@ -0,0 +1,89 @@
+from math import log
+import os
+import subprocess
+import sys
+
+import pytest
+
+from game.records import RECORD
+from game.tournament import CHUNK_GAMES, Sprt, expected_score, play_chunk, run_tournament
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def chunk(games, duplicate, bots=("greedy", "random"), seed=7):  # A chunk of recorded games, as play_chunk returns it
+    return play_chunk((0, games, *bots, seed, True, False, duplicate, CHUNK_GAMES, False))
+
+
+def test_duplicate_pairs_play_one_deal_with_the_seats_swapped():
+    _, _, seats, records = chunk(40, True)
+    games = list(RECORD.iter_unpack(records))
+    assert list(seats) == [0, 1] * 20
+    for first, second in zip(games[::2], games[1::2]):
+        assert first[:2] == second[:2]  # Same seed and briscola: the same deck
+    assert len({game[0] for game in games}) == 20  # Every pair has its own deal
+
+    _, _, _, plain = chunk(40, False)
+    assert len({game[0] for game in RECORD.iter_unpack(plain)}) == 40
+
+
+def test_a_bot_against_itself_scores_even_pairs():
+    _, points, _, _ = chunk(40, True, ("greedy", "greedy"))  # greedy is deterministic, so both games of a pair mirror each other
+    assert all(points[i] + points[i + 1] == 120 for i in range(0, 40, 2))
+    tally = run_tournament("greedy", "greedy", 40, duplicate=True)
+    assert (tally.pairs, tally.pair_wins_a, tally.pair_wins_b) == (20, 0, 0)
+    with pytest.raises(ValueError): run_tournament("greedy", "random", 41, duplicate=True)
+
+
+def decide(sprt, pattern, limit=10000) -> int:  # Feeds the pattern over and over, returns the samples taken to decide
+    while sprt.result is None and sprt.n < limit: sprt.add(pattern[sprt.n % len(pattern)])
+    return sprt.n
+
+
+def test_sprt_bounds_and_ratio():
+    sprt = Sprt(0, 10, alpha=0.05, beta=0.1)
+    assert (sprt.lower, sprt.upper) == (log(0.1 / 0.95), log(0.9 / 0.05))
+    assert sprt.llr() == 0.0
+    for score in (1, 0, 1, 1): sprt.add(score)
+    s0, s1 = expected_score(0), expected_score(10)
+    assert sprt.llr() == pytest.approx(4 * (s1 - s0) * (2 * 0.75 - s0 - s1) / (2 * 0.1875))
+
+    same = Sprt()
+    for _ in range(100): same.add(0.5)
+    assert (same.llr(), same.result) == (0.0, None)  # No spread, no evidence
+
+
+def test_sprt_accepts_and_rejects():
+    strong, weak, even = Sprt(0, 10), Sprt(0, 10), Sprt(0, 10)
+    assert decide(strong, (1, 1, 0)) < 1000 and strong.result == "H1" and strong.llr() >= strong.upper
+    assert decide(weak, (0, 1, 0)) < 1000 and weak.result == "H0" and weak.llr() <= weak.lower
+    decide(even, (1, 0))
+    assert even.result == "H0" and even.n > 10 * strong.n  # A score of exactly 50% is H0's, it gets there much more slowly
+
+    points = Sprt(0, 5, points=True)  # Margins averaging +12.5 points a game
+    assert decide(points, (20, -10, 20, 20)) < 100 and points.result == "H1"
+
+
+def test_a_decided_sprt_ends_the_match():
+    sprt = Sprt(0, 10)
+    tally = run_tournament("greedy", "random", 5000, sprt=sprt)
+    assert sprt.result == "H1" and tally.decided
+    assert tally.games == sprt.n < 5000
+
+
+
+def run(workers, *options) -> list:  # The tournament's report minus the timing line, from a fresh interpreter
+    # A subprocess because workers forked from pytest would inherit the threads other tests leave behind (pyxel's)
+    command = [sys.executable, "-m", "game.tournament", "greedy", "random", "-n", "2100", "-s", "3", "-w", str(workers), *options]
+    return subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True).stdout.splitlines()[:-1]
+
+
+@pytest.mark.parametrize("deals", ["seed", "stream"])
+def test_the_worker_count_does_not_change_the_results(tmp_path, deals):
+    runs = []
+    for workers in (1, 2):  # 2100 games are three chunks
+        record = ["-r", str(tmp_path / f"{workers}.rec")] if deals == "seed" else []
+        report = run(workers, "-d", deals, *record)
+        runs.append((report, (tmp_path / f"{workers}.rec").read_bytes() if record else b""))
+    assert runs[0] == runs[1]
+    assert runs[0][0][0] == "2100 games, greedy (A) vs random (B)" and runs[0][0][-1].startswith("digest: ")
@@ -0,0 +1,45 @@
+import random
+
+from game.consts import POINTS, SUIT
+from game.engine import GameState
+from game.tracker import CardTracker, NO_CARD, RANKS
+
+
+def recount(state, player) -> set:  # Cards hidden from the player: the stock and the other hand, but not the briscola card
+    hidden = set(state.stock) | {card for card in state.hands[1 - player] if card != NO_CARD}
+    return hidden - {state.deck[-7]}
+
+
+def check(tracker, state):
+    for player in (0, 1):
+        unseen = recount(state, player)
+        assert tracker.unseen[player] == sum(1 << card for card in unseen)
+        assert tracker.unseen_points[player] == sum(POINTS[card] for card in unseen)
+        assert tracker.unseen_count(player) == len(unseen)
+    assert tracker.points_in_play == 120 - sum(state.scores)
+    trumps = [card % RANKS for card in range(40) if SUIT[card] == state.briscola_suit and card not in state.history]
+    assert tracker.trumps == sum(1 << rank for rank in trumps)
+
+
+def test_tracker_matches_a_recount_after_every_play():
+    rng = random.Random(0)
+    tracker = CardTracker()
+    state = GameState()
+    state.tracker = tracker
+    for seed in range(30):  # The same tracker across deals, each deal resyncs it
+        state.deal(seed)
+        check(tracker, state)
+        while not state.is_terminal():
+            state.play(rng.choice(state.legal_moves()))
+            check(tracker, state)
+
+
+def test_sync_rebuilds_a_game_in_progress():
+    rng = random.Random(1)
+    for seed in range(10):
+        state = GameState()
+        state.deal(seed)
+        for _ in range(rng.randrange(40)): state.play(rng.choice(state.legal_moves()))
+        tracker = CardTracker()
+        tracker.sync(state)
+        check(tracker, state)
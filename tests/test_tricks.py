@@ -0,0 +1,14 @@
+from game.consts import DECK_SIZE
+from game.tricks import TRICK_WINNER, TABLE_SIZE, trick_index, verify_table
+
+
+def test_table_matches_the_case_by_case_rules():
+    assert len(TRICK_WINNER) == TABLE_SIZE
+    assert verify_table() == []
+
+
+def test_a_wrong_entry_is_reported():
+    table = bytearray(TRICK_WINNER)
+    index = trick_index(3, DECK_SIZE - 1, 2, 1)
+    table[index] ^= 1
+    assert verify_table(bytes(table)) == [(3, DECK_SIZE - 1, 2, 1, TRICK_WINNER[index])]